@@ -20,6 +20,7 @@ interface Stream {
     format?: "file" | "hls";
     live?: boolean;
     playlist?: string | null;
+    previewPlaylist?: string | null;
 }
 
 interface TimelineState {
@@ -97,22 +98,48 @@ export function AllStreams() {
     const totalPages = Math.ceil(streams.length / videosPerPage);
 
     useEffect(() => {
-        const fetchStreams = async () => {
-            try {
-                const response = await fetch(`${BACKEND_URL}/api/streams`);
-                const data = await response.json();
-                setStreams(data.streams || []);
-            } catch (err) {
-                console.error("Error fetching streams:", err);
-            } finally {
-                setLoading(false);
+        let cancelled = false;
+        let etag: string | null = null;
+        const controller = new AbortController();
+        const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+        // Long-poll: with a known ETag the backend holds the request until the list changes
+        const pollStreams = async () => {
+            while (!cancelled) {
+                try {
+                    const response = await fetch(`${BACKEND_URL}/api/streams?wait=${etag ? 25 : 0}`, {
+                        headers: etag ? { "If-None-Match": etag } : {},
+                        cache: "no-store",
+                        signal: controller.signal,
+                    });
+                    if (response.status === 200) {
+                        const data = await response.json();
+                        setStreams(data.streams || []);
+                        etag = response.headers.get("ETag");
+                        if (!etag) {
+                            await sleep(3000);
+                        }
+                    } else if (response.status !== 304) {
+                        throw new Error(`Unexpected status ${response.status}`);
+                    }
+                } catch (err) {
+                    if (cancelled) {
+                        return;
+                    }
+                    console.error("Error fetching streams:", err);
+                    await sleep(3000);
+                } finally {
+                    setLoading(false);
+                }
             }
         };
 
-        fetchStreams();
+        pollStreams();
 
-        const interval = setInterval(fetchStreams, 3000);
-        return () => clearInterval(interval);
+        return () => {
+            cancelled = true;
+            controller.abort();
+        };
     }, []);
 
     useEffect(() => {
@@ -487,21 +514,24 @@ function StreamCard({
         }
     }, [timeline?.atLiveEdge]);
 
+    // Grid tiles are thumbnails, so prefer the low-resolution variant when there is one
+    const gridPlaylist = stream.previewPlaylist ?? stream.playlist;
+
     const playlistUrl = useMemo(() => {
-        if (!stream.playlist) {
+        if (!gridPlaylist) {
             return undefined;
         }
         let resolved =
-            stream.playlist.startsWith("http://") ||
-            stream.playlist.startsWith("https://")
-                ? stream.playlist
-                : `${backendUrl}${stream.playlist}`;
+            gridPlaylist.startsWith("http://") ||
+            gridPlaylist.startsWith("https://")
+                ? gridPlaylist
+                : `${backendUrl}${gridPlaylist}`;
         if (playlistVersion > 0) {
             const separator = resolved.includes("?") ? "&" : "?";
             resolved = `${resolved}${separator}v=${playlistVersion}`;
         }
         return resolved;
-    }, [backendUrl, playlistVersion, stream.playlist]);
+    }, [backendUrl, gridPlaylist, playlistVersion]);
 
     useEffect(() => {
         if (stream.format === "hls" && stream.live && stream.playlist) {
@@ -607,7 +637,7 @@ function StreamCard({
                     }
                 };
             } else {
-                assignNativeSource(`${backendUrl}/api/stream?streamId=${stream.id}`);
+                assignNativeSource(`${backendUrl}/api/stream?streamId=${stream.id}&quality=preview`);
                 cleanup = teardown;
             }
         } else {
@@ -620,7 +650,7 @@ function StreamCard({
             } else if (stream.url?.startsWith("/")) {
                 resolvedSrc = `${backendUrl}${stream.url}`;
             } else {
-                resolvedSrc = `${backendUrl}/api/stream?streamId=${stream.id}`;
+                resolvedSrc = `${backendUrl}/api/stream?streamId=${stream.id}&quality=preview`;
             }
             assignNativeSource(resolvedSrc);
             cleanup = teardown;
@@ -6,6 +6,8 @@ interface PriorityAlertCardProps {
   level: AlertLevelType;
   location?: string;
   time?: Date;
+  count?: number;
+  closed?: boolean;
   onSelect?: () => void;
   isActive?: boolean;
 }
@@ -14,6 +16,8 @@ export function PriorityAlertCard({
   level,
   location,
   time,
+  count,
+  closed,
   onSelect,
   isActive,
 }: PriorityAlertCardProps) {
@@ -71,6 +75,8 @@ export function PriorityAlertCard({
         <div>
           <span className={`priority-dot ${levelClass}`}></span>
           {level}
+          {count && count > 1 ? ` ×${count}` : ""}
+          {closed ? " · ended" : ""}
         </div>
         <div>{relativeTime}</div>
       </div>
@@ -52,6 +52,8 @@ export function PriorityAlerts() {
               level={alert.level}
               location={alert.location}
               time={alert.time}
+              count={alert.count}
+              closed={alert.closed}
               isActive={selectedAlert?.id === alertId}
               onSelect={() => selectAlert(alertId)}
             />
@@ -25,68 +25,95 @@ export function AlertsProvider({ children }: { children: ReactNode }): JSX.Eleme
   useEffect(() => {
     const wsProtocol = BACKEND_URL.startsWith("https://") ? "wss://" : "ws://";
     const wsUrl = `${wsProtocol}${BACKEND_URL.replace(/^https?:\/\//, "")}/api/websocket/alerts`;
-    const ws = new WebSocket(wsUrl);
-    wsRef.current = ws;
-
-    ws.onopen = () => {
-      console.log("Connected to priority alerts websocket");
-    };
+    let lastSeq: number | null = null;
+    let epoch: string | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let disposed = false;
+
+    const connect = () => {
+      const resume = lastSeq !== null && epoch !== null
+        ? `?since=${lastSeq}&epoch=${encodeURIComponent(epoch)}`
+        : "";
+      const ws = new WebSocket(`${wsUrl}${resume}`);
+      wsRef.current = ws;
+
+      ws.onopen = () => {
+        console.log("Connected to priority alerts websocket");
+      };
+
+      ws.onmessage = (event: MessageEvent<string>) => {
+        try {
+          const payload = JSON.parse(event.data);
+          // Remember the journal position so a reconnect resumes instead of missing alerts
+          if (typeof payload?.seq === "number" && typeof payload?.epoch === "string") {
+            lastSeq = payload.seq;
+            epoch = payload.epoch;
+          }
+          if (payload?.type !== "priority_alert") {
+            return;
+          }
 
-    ws.onmessage = (event: MessageEvent<string>) => {
-      try {
-        const payload = JSON.parse(event.data);
-        if (payload?.type !== "priority_alert") {
-          return;
+          const generatedId =
+            typeof crypto !== "undefined" && typeof crypto.randomUUID === "function"
+              ? crypto.randomUUID()
+              : Math.random().toString(36).slice(2);
+
+          const alertId = typeof payload.id === "string" && payload.id.length > 0 ? payload.id : generatedId;
+          const normalizedLevel = typeof payload.level === "string" ? payload.level.toUpperCase() : "";
+          const allLevels = Object.values(AlertLevel) as AlertLevelType[];
+          const level: AlertLevelType = allLevels.includes(normalizedLevel as AlertLevelType)
+            ? (normalizedLevel as AlertLevelType)
+            : AlertLevel.MEDIUM;
+
+          const alert: PriorityAlert = {
+            id: alertId,
+            alertName: payload.alertName ?? payload.reason ?? "Priority alert",
+            level,
+            url: payload.url ?? "",
+            location: payload.location ?? (payload.source ? payload.source : "Unknown"),
+            time: payload.time ? new Date(payload.time) : new Date(),
+            rawLevel: payload.rawLevel,
+            source: payload.source,
+            count: typeof payload.count === "number" ? payload.count : undefined,
+            closed: payload.closed === true,
+          };
+
+          setPriorityAlerts((prev) => {
+            const next = new Map(prev);
+            next.set(alertId, alert);
+            // keep only the latest 50 alerts to limit memory
+            while (next.size > 50) {
+              const firstKey = next.keys().next().value;
+              next.delete(firstKey!);
+            }
+            return next;
+          });
+        } catch (err) {
+          console.error("Failed to parse priority alert message", err);
         }
+      };
 
-        const generatedId =
-          typeof crypto !== "undefined" && typeof crypto.randomUUID === "function"
-            ? crypto.randomUUID()
-            : Math.random().toString(36).slice(2);
-
-        const alertId = typeof payload.id === "string" && payload.id.length > 0 ? payload.id : generatedId;
-        const normalizedLevel = typeof payload.level === "string" ? payload.level.toUpperCase() : "";
-        const allLevels = Object.values(AlertLevel) as AlertLevelType[];
-        const level: AlertLevelType = allLevels.includes(normalizedLevel as AlertLevelType)
-          ? (normalizedLevel as AlertLevelType)
-          : AlertLevel.MEDIUM;
-
-        const alert: PriorityAlert = {
-          id: alertId,
-          alertName: payload.alertName ?? payload.reason ?? "Priority alert",
-          level,
-          url: payload.url ?? "",
-          location: payload.location ?? (payload.source ? payload.source : "Unknown"),
-          time: payload.time ? new Date(payload.time) : new Date(),
-          rawLevel: payload.rawLevel,
-          source: payload.source,
-        };
-
-        setPriorityAlerts((prev) => {
-          const next = new Map(prev);
-          next.set(alertId, alert);
-          // keep only the latest 50 alerts to limit memory
-          while (next.size > 50) {
-            const firstKey = next.keys().next().value;
-            next.delete(firstKey!);
-          }
-          return next;
-        });
-      } catch (err) {
-        console.error("Failed to parse priority alert message", err);
-      }
-    };
+      ws.onerror = (err) => {
+        console.error("Priority alerts websocket error", err);
+      };
 
-    ws.onerror = (err) => {
-      console.error("Priority alerts websocket error", err);
+      // The server closes sockets that fall behind; reconnect and replay what was missed
+      ws.onclose = () => {
+        console.warn("Priority alerts websocket disconnected");
+        if (!disposed) {
+          reconnectTimer = setTimeout(connect, 1000);
+        }
+      };
     };
 
-    ws.onclose = () => {
-      console.warn("Priority alerts websocket disconnected");
-    };
+    connect();
 
     return () => {
-      ws.close();
+      disposed = true;
+      if (reconnectTimer !== null) {
+        clearTimeout(reconnectTimer);
+      }
+      wsRef.current?.close();
       wsRef.current = null;
     };
   }, []);
@@ -7,6 +7,8 @@ export type PriorityAlert = {
   time: Date;
   rawLevel?: string;
   source?: string;
+  count?: number;
+  closed?: boolean;
 };
 
 export const AlertLevel = {
@@ -0,0 +1,106 @@
+"""
+Load test: alert fan-out to many dashboard websockets
+Starts the real app in-process, connects N clients to /api/websocket/alerts and
+measures publish -> receive latency through AlertHub.publish
+Usage (from backend/): python -m benchmarks.alert_fanout [--subscribers 1000] [--alerts 20]
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import time
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('YOLO_PREFILTER_ENABLED', 'false')
+
+import uvicorn
+import websockets
+
+from src import server
+
+
+def raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def subscriber(url, expected, latencies, ready):
+    async with websockets.connect(url, max_queue=None) as websocket:
+        ready.release()
+        for _ in range(expected):
+            message = await websocket.recv()
+            sent_at = float(message.split('"sentAt":', 1)[1].split(',', 1)[0].rstrip('}'))
+            latencies.append(time.perf_counter() - sent_at)
+
+
+async def main(args):
+    raise_fd_limit(args.subscribers * 2 + 256)
+    config = uvicorn.Config(server.app, host='127.0.0.1', port=args.port, log_level='warning', ws='websockets')
+    uvicorn_server = uvicorn.Server(config)
+    serve_task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.05)
+
+    url = f'ws://127.0.0.1:{args.port}/api/websocket/alerts'
+    latencies = []
+    ready = asyncio.Semaphore(0)
+    clients = []
+    for _ in range(args.subscribers):
+        clients.append(asyncio.create_task(subscriber(url, args.alerts, latencies, ready)))
+        await asyncio.sleep(0)
+    for _ in range(args.subscribers):
+        await ready.acquire()
+    while len(server.alert_hub.subscribers) < args.subscribers:
+        await asyncio.sleep(0.05)
+    print(f'{args.subscribers} subscribers connected')
+
+    publish_times = []
+    start = time.perf_counter()
+    for index in range(args.alerts):
+        alert = {
+            'type': 'priority_alert',
+            'id': f'bench-{index}',
+            'level': 'high',
+            'title': 'Load test alert',
+            'description': 'Synthetic alert for fan-out benchmarking',
+            'location': 'Benchmark',
+            'source': 'benchmark',
+            'sentAt': time.perf_counter(),
+        }
+        published = time.perf_counter()
+        server.alert_hub.publish(alert)
+        publish_times.append(time.perf_counter() - published)
+        await asyncio.sleep(args.gap_ms / 1000)
+    await asyncio.wait_for(asyncio.gather(*clients), timeout=args.timeout)
+    elapsed = time.perf_counter() - start
+
+    deliveries = len(latencies)
+    print(f'alerts={args.alerts} deliveries={deliveries} elapsed={elapsed:.2f}s '
+          f'throughput={deliveries / elapsed:,.0f} msg/s')
+    print(f'publish call: avg={sum(publish_times) / len(publish_times) * 1e3:.3f}ms '
+          f'max={max(publish_times) * 1e3:.3f}ms')
+    print(f'delivery latency: p50={percentile(latencies, 0.5) * 1e3:.1f}ms '
+          f'p99={percentile(latencies, 0.99) * 1e3:.1f}ms max={max(latencies) * 1e3:.1f}ms')
+    print(f'hub: {server.alert_hub.stats()}')
+
+    uvicorn_server.should_exit = True
+    await serve_task
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--alerts', type=int, default=20)
+    parser.add_argument('--gap-ms', type=float, default=50.0)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: IncidentDetector.calculate_danger_score per-frame cost
+Compares the vectorized scorer against the original per-detection loop
+and checks both produce exactly the same (score, person_count, objects)
+Usage (from backend/): python -m benchmarks.danger_score [--frames 2000]
+"""
+
+import argparse
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+from yolo.incident_detector import IncidentDetector
+
+MODEL_PATH = Path(__file__).parent.parent / 'yolo' / 'yolov8n.pt'
+FRAME_SHAPE = (720, 1280, 3)
+
+
+class LoopScorer:
+    """The original per-detection loop, kept as the reference implementation"""
+
+    def __init__(self, names, danger_weights):
+        self.names = names
+        self.danger_weights = danger_weights
+        self.person_count_history = deque(maxlen=60)
+
+    def calculate_danger_score(self, detections, frame_shape):
+        score = 0
+        person_count = 0
+        detected_objects = []
+
+        for detection in detections:
+            class_name = self.names[int(detection[5])]
+            confidence = detection[4]
+            if confidence > 0.5:
+                detected_objects.append(class_name)
+                if class_name == 'person':
+                    person_count += 1
+                if class_name in self.danger_weights:
+                    score += self.danger_weights[class_name] * confidence
+
+        frame_area = frame_shape[0] * frame_shape[1]
+        if person_count > 0:
+            density = person_count / (frame_area / 100000)
+            if density > 3:
+                score += 20
+            elif density > 1.5:
+                score += 10
+
+        self.person_count_history.append(person_count)
+        if len(self.person_count_history) > 10:
+            recent_avg = np.mean(list(self.person_count_history)[-10:])
+            older_avg = np.mean(list(self.person_count_history)[-20:-10]) if len(self.person_count_history) > 20 else recent_avg
+            if recent_avg > older_avg * 1.5:
+                score += 15
+            elif recent_avg < older_avg * 0.5 and older_avg > 3:
+                score += 25
+
+        return score, person_count, detected_objects
+
+
+def make_frames(count, detections_per_frame, num_classes, rng):
+    """Random detections biased towards people, like a busy platform"""
+    frames = []
+    for _ in range(count):
+        n = rng.integers(0, detections_per_frame + 1) if detections_per_frame else 0
+        boxes = rng.uniform(0, 640, size=(n, 4))
+        confidences = rng.uniform(0.2, 1.0, size=(n, 1))
+        class_ids = np.where(rng.random(n) < 0.7, 0, rng.integers(0, num_classes, size=n))[:, None]
+        # float32 like ultralytics' boxes.data, so accumulation order matters
+        frames.append(np.hstack([boxes, confidences, class_ids]).astype(np.float32) if n else [])
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Danger scoring benchmark')
+    parser.add_argument('--frames', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'detections':<12}{'loop us':>10}{'vector us':>11}{'speedup':>10}{'match':>8}")
+    for detections_per_frame in (0, 50, 300):
+        # Fresh detector per row so temporal history starts empty for both scorers
+        detector = IncidentDetector(model_path=str(MODEL_PATH))
+        reference = LoopScorer(detector.model.names, detector.danger_weights)
+        frames = make_frames(args.frames, detections_per_frame, len(detector.class_names), rng)
+
+        start = time.perf_counter()
+        expected = [reference.calculate_danger_score(frame, FRAME_SHAPE) for frame in frames]
+        loop_us = (time.perf_counter() - start) / len(frames) * 1e6
+
+        start = time.perf_counter()
+        actual = [detector.calculate_danger_score(frame, FRAME_SHAPE) for frame in frames]
+        vector_us = (time.perf_counter() - start) / len(frames) * 1e6
+
+        match = all(
+            a[0] == e[0] and a[1] == e[1] and a[2] == e[2]
+            for a, e in zip(actual, expected)
+        )
+        print(f"{detections_per_frame:<12}{loop_us:>10.1f}{vector_us:>11.1f}{loop_us / vector_us:>9.1f}x{str(match):>8}")
+
+
+if __name__ == '__main__':
+    main()
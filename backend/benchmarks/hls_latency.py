@@ -0,0 +1,189 @@
+"""
+Latency probe: webcam frame ingest -> HLS segment/part availability
+Starts the real app in-process, publishes JPEG frames over /api/websocket/webcam with their
+ingest time, follows the webcam playlist (blocking reloads in LL-HLS mode, 100ms polling
+otherwise) and reports how long each frame waited before the part or segment holding it
+was listed. Add the player hold-back for a glass-to-glass estimate. Needs ffmpeg.
+Usage (from backend/): python -m benchmarks.hls_latency [--low-latency] [--fps 15] [--seconds 20]
+"""
+
+import argparse
+import asyncio
+import bisect
+import os
+import re
+import sys
+import time
+
+if '--low-latency' in sys.argv:
+    os.environ['WEBCAM_HLS_LOW_LATENCY'] = 'true'
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('YOLO_PREFILTER_ENABLED', 'false')
+os.environ.setdefault('MOTION_GATE_ENABLED', 'false')
+os.environ.setdefault('WEBCAM_ANALYSIS_INTERVAL', '1e9')  # Keep Bedrock out of the measurement
+
+import httpx
+import uvicorn
+import websockets
+
+from benchmarks.jpeg_payload import make_jpeg
+from src import server
+
+STREAM_ID = 'webcam-latency'
+MJPEG_DEMUXER_FPS = 25.0  # Media clock of ffmpeg's mjpeg pipe input without wall-clock timestamps
+PART_LINE = re.compile(r'#EXT-X-PART:DURATION=([\d.]+),URI="([^"]+)"')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def publisher(url, frame, fps, seconds, ingest_at, sent, release):
+    async with websockets.connect(url, max_size=None) as websocket:
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            ingest_at.append(time.time())
+            await websocket.send(frame)
+            await asyncio.sleep(1 / fps)
+        # The server drops a webcam's state (and its metrics) once the publisher leaves
+        sent.set()
+        await release.wait()
+
+
+def next_part(text):
+    """(_HLS_msn, _HLS_part) of the part after the newest one in an LL-HLS playlist."""
+    msn = int(re.search(r'#EXT-X-MEDIA-SEQUENCE:(\d+)', text).group(1))
+    part = 0
+    for line in text.splitlines():
+        if line.startswith('#EXT-X-PART:'):
+            part += 1
+        elif line.startswith('#EXTINF:'):
+            msn, part = msn + 1, 0
+    return msn, part
+
+
+async def follow_parts(client, url, units, stop):
+    """LL-HLS: ask for the next part with a blocking reload, note when each part shows up."""
+    seen = set()
+    media_end = 0.0
+    msn, part = 0, 0
+    while not stop.is_set():
+        try:
+            response = await client.get(url, params={'_HLS_msn': msn, '_HLS_part': part})
+        except httpx.HTTPError:
+            await asyncio.sleep(0.1)
+            continue
+        if response.status_code != 200:
+            await asyncio.sleep(0.1)
+            continue
+        now = time.time()
+        for duration, uri in PART_LINE.findall(response.text):
+            if uri not in seen:
+                seen.add(uri)
+                media_end += float(duration)
+                units.append((media_end, now))
+        msn, part = next_part(response.text)
+
+
+async def follow_segments(client, url, units, stop):
+    """Classic HLS: poll the playlist, note when each segment shows up."""
+    seen = set()
+    media_end = 0.0
+    while not stop.is_set():
+        response = await client.get(url)
+        now = time.time()
+        if response.status_code == 200:
+            duration = None
+            for line in response.text.splitlines():
+                if line.startswith('#EXTINF:'):
+                    duration = float(line[8:].split(',')[0])
+                elif line and not line.startswith('#') and duration is not None:
+                    if line not in seen:
+                        seen.add(line)
+                        media_end += duration
+                        units.append((media_end, now))
+                    duration = None
+        await asyncio.sleep(0.1)
+
+
+def frame_latencies(ingest_at, units, wallclock_media):
+    """Seconds from each frame's ingest until the first part/segment covering it was listed."""
+    ends = [end for end, _ in units]
+    latencies = []
+    for index, ingested in enumerate(ingest_at):
+        media_time = ingested - ingest_at[0] if wallclock_media else index / MJPEG_DEMUXER_FPS
+        position = bisect.bisect_right(ends, media_time)
+        if position < len(units):
+            latencies.append(units[position][1] - ingested)
+    return latencies
+
+
+async def main(args):
+    config = uvicorn.Config(server.app, host='127.0.0.1', port=args.port, log_level='warning', ws='websockets')
+    uvicorn_server = uvicorn.Server(config)
+    serve_task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.05)
+
+    width, height = map(int, args.resolution.split('x'))
+    frame = make_jpeg(width, height)
+    mode = 'LL-HLS' if server.WEBCAM_HLS_LOW_LATENCY else 'HLS'
+    print(f'{mode}: {args.fps} fps for {args.seconds}s, segments of {server.WEBCAM_HLS_SEGMENT_SECONDS}s')
+
+    ingest_at = []
+    units = []
+    stop = asyncio.Event()
+    base = f'http://127.0.0.1:{args.port}'
+    playlist_url = f'{base}{server.webcam_playlist_path(STREAM_ID)}'
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        ws_url = f'ws://127.0.0.1:{args.port}/api/websocket/webcam?streamId={STREAM_ID}'
+        sent, release = asyncio.Event(), asyncio.Event()
+        publish_task = asyncio.create_task(
+            publisher(ws_url, frame, args.fps, args.seconds, ingest_at, sent, release)
+        )
+        while server.webcam_registry.get(STREAM_ID) is None:
+            await asyncio.sleep(0.01)
+        recorder = server.webcam_registry.get(STREAM_ID).recorder
+        if recorder.ll_playlist is not None:
+            follow = follow_parts(client, playlist_url, units, stop)
+            hold_back = 3 * recorder.ll_playlist.part_target
+        else:
+            follow = follow_segments(client, playlist_url, units, stop)
+            hold_back = 3 * server.WEBCAM_HLS_SEGMENT_SECONDS  # hls.js liveSyncDurationCount
+        follow_task = asyncio.create_task(follow)
+        await sent.wait()
+        metrics = (await client.get(f'{base}/api/metrics')).json()
+        release.set()
+        await publish_task
+        await asyncio.sleep(args.drain)
+        stop.set()
+        follow_task.cancel()
+        await asyncio.gather(follow_task, return_exceptions=True)
+
+    latencies = frame_latencies(ingest_at, units, wallclock_media=recorder.ll_playlist is not None)
+    if not latencies:
+        print('No parts or segments were listed; is ffmpeg installed (FFMPEG_PATH)?')
+    else:
+        print(f'frames={len(ingest_at)} covered={len(latencies)} listed={len(units)}')
+        print(f'ingest -> listed: p50={percentile(latencies, 0.5) * 1e3:.0f}ms '
+              f'p90={percentile(latencies, 0.9) * 1e3:.0f}ms max={max(latencies) * 1e3:.0f}ms')
+        print(f'+ player hold-back {hold_back:.1f}s: p50 ~{percentile(latencies, 0.5) + hold_back:.1f}s glass-to-glass')
+    if STREAM_ID in metrics.get('llHls', {}):
+        print(f"server: {metrics['llHls'][STREAM_ID]}")
+
+    uvicorn_server.should_exit = True
+    await serve_task
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--low-latency', action='store_true', help='Record with WEBCAM_HLS_LOW_LATENCY')
+    parser.add_argument('--fps', type=float, default=15.0)
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--drain', type=float, default=3.0, help='Seconds to keep following after the last frame')
+    parser.add_argument('--resolution', default='1280x720')
+    parser.add_argument('--port', type=int, default=8767)
+    asyncio.run(main(parser.parse_args()))
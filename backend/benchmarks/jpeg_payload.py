@@ -0,0 +1,66 @@
+"""
+Micro-benchmark: Bedrock payload preparation for webcam JPEGs
+Compares decode -> frame_to_base64 (old path) against jpeg_to_base64 (new path)
+Usage (from backend/): python -m benchmarks.jpeg_payload [--iterations 200]
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from yolo.bedrock_detector import HaikuIncidentDetector
+
+RESOLUTIONS = {
+    '480p': (640, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+}
+
+
+def make_jpeg(width, height, quality=80):
+    """Build a CCTV-like test frame (gradient + noise) and encode it as JPEG"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = (x[None, :] * 0.6 + y * 0.4)
+    frame = np.stack([base, base[:, ::-1], 255 - base], axis=-1)
+    frame += rng.normal(0, 6, frame.shape)
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError('Failed to encode test frame')
+    return encoded.tobytes()
+
+
+def time_per_call(fn, iterations):
+    fn()  # Warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JPEG -> Bedrock payload benchmark')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    # Skip __init__: payload preparation does not need AWS credentials
+    detector = HaikuIncidentDetector.__new__(HaikuIncidentDetector)
+
+    def old_path(jpeg):
+        frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return detector.frame_to_base64(frame, quality=60)
+
+    print(f"{'frame':<8}{'jpeg KB':>10}{'old ms':>10}{'new ms':>10}{'speedup':>10}")
+    for name, (width, height) in RESOLUTIONS.items():
+        jpeg = make_jpeg(width, height)
+        old_ms = time_per_call(lambda: old_path(jpeg), args.iterations)
+        new_ms = time_per_call(lambda: detector.jpeg_to_base64(jpeg, quality=60), args.iterations)
+        print(f"{name:<8}{len(jpeg) / 1024:>10.1f}{old_ms:>10.2f}{new_ms:>10.2f}{old_ms / new_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Load test: MJPEG fan-out of one webcam to many /api/stream viewers
+Starts the real app in-process, publishes JPEG frames over /api/websocket/webcam and
+measures per-viewer frame rate and publish -> receive latency
+Usage (from backend/): python -m benchmarks.mjpeg_fanout [--viewers 200] [--fps 15] [--seconds 10]
+                       [--viewer-fps 5] [--tier 360p] [--quality preview]
+                       (downscaled frames carry no latency marker)
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import struct
+import time
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('YOLO_PREFILTER_ENABLED', 'false')
+os.environ.setdefault('MOTION_GATE_ENABLED', 'false')
+os.environ.setdefault('WEBCAM_ANALYSIS_INTERVAL', '1e9')  # Keep Bedrock out of the measurement
+
+import httpx
+import uvicorn
+import websockets
+
+from benchmarks.jpeg_payload import make_jpeg
+from src import server
+
+STREAM_ID = 'webcam-bench'
+MARKER = b'BENCH'
+
+
+def raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+async def publisher(url, frame, fps, seconds, sent_at):
+    """Send the same JPEG with the frame index appended after its EOI marker"""
+    async with websockets.connect(url, max_size=None) as websocket:
+        index = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            sent_at[index] = time.perf_counter()
+            await websocket.send(frame + MARKER + struct.pack('>Q', index))
+            index += 1
+            await asyncio.sleep(1 / fps)
+
+
+async def viewer(client, url, sent_at, latencies, counts, stop):
+    buffer = b''
+    async with client.stream('GET', url) as response:
+        async for chunk in response.aiter_bytes():
+            buffer += chunk
+            while True:
+                header_end = buffer.find(b'\r\n\r\n')
+                if header_end < 0:
+                    break
+                headers = buffer[:header_end].split(b'\r\n')
+                length = next(int(line.split(b':')[1]) for line in headers if line.startswith(b'Content-Length'))
+                part_end = header_end + 4 + length + 2
+                if len(buffer) < part_end:
+                    break
+                frame = buffer[header_end + 4:part_end - 2]
+                buffer = buffer[part_end:]
+                if frame[-13:-8] == MARKER:
+                    index = struct.unpack('>Q', frame[-8:])[0]
+                    if index in sent_at:
+                        latencies.append(time.perf_counter() - sent_at[index])
+                counts[0] += 1
+            if stop.is_set():
+                break
+
+
+async def main(args):
+    raise_fd_limit(args.viewers * 2 + 256)
+    config = uvicorn.Config(server.app, host='127.0.0.1', port=args.port, log_level='warning', ws='websockets')
+    uvicorn_server = uvicorn.Server(config)
+    serve_task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.05)
+
+    width, height = map(int, args.resolution.split('x'))
+    frame = make_jpeg(width, height)
+    print(f'Frame size: {len(frame) / 1024:.0f} KB, {args.viewers} viewers, {args.fps} fps for {args.seconds}s')
+
+    sent_at = {}
+    latencies = []
+    counts = [0]
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=args.viewers + 10, max_keepalive_connections=args.viewers + 10)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        stream_url = f'http://127.0.0.1:{args.port}/api/stream?streamId={STREAM_ID}&resolution={args.tier}'
+        if args.quality:
+            stream_url += f'&quality={args.quality}'
+        if args.viewer_fps:
+            stream_url += f'&fps={args.viewer_fps}'
+        viewers = [
+            asyncio.create_task(viewer(client, stream_url, sent_at, latencies, counts, stop))
+            for _ in range(args.viewers)
+        ]
+        await asyncio.sleep(0.5)
+        ws_url = f'ws://127.0.0.1:{args.port}/api/websocket/webcam?streamId={STREAM_ID}'
+        started = time.perf_counter()
+        await publisher(ws_url, frame, args.fps, args.seconds, sent_at)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.5)
+        stop.set()
+        for task in viewers:
+            task.cancel()
+        await asyncio.gather(*viewers, return_exceptions=True)
+
+        mjpeg = (await client.get(f'http://127.0.0.1:{args.port}/api/metrics')).json()['mjpeg']
+
+    published = len(sent_at)
+    delivered = counts[0]
+    print(f'published={published} frames ({published / elapsed:.1f} fps), delivered={delivered} '
+          f'({delivered / max(1, args.viewers) / elapsed:.1f} fps per viewer)')
+    print(f"delivered bandwidth: {mjpeg['bytesSent'] / elapsed / 1e6:.1f} MB/s")
+    print(f'latency: p50={percentile(latencies, 0.5) * 1e3:.1f}ms '
+          f'p99={percentile(latencies, 0.99) * 1e3:.1f}ms max={max(latencies, default=0) * 1e3:.1f}ms')
+    print(f"server: framesSent={mjpeg['framesSent']} framesDropped={mjpeg['framesDropped']} "
+          f"bytesSent={mjpeg['bytesSent'] / 1e6:.1f} MB renditions={mjpeg['renditions']} previews={mjpeg['previews']}")
+
+    uvicorn_server.should_exit = True
+    await serve_task
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--viewers', type=int, default=200)
+    parser.add_argument('--fps', type=float, default=15.0)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--resolution', default='1280x720')
+    parser.add_argument('--tier', default='full', help='Viewer resolution tier (full, 720p, 480p, ...)')
+    parser.add_argument('--quality', default='', help='full or preview (the shared low-resolution rendition)')
+    parser.add_argument('--viewer-fps', type=float, default=0, help='Per-viewer frame rate cap (0 = server default)')
+    parser.add_argument('--port', type=int, default=8766)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: URL lookups in the in-memory stream store
+Compares the old linear any(...) scan against the URL index and times a simulated
+videos-folder scan (get_or_create_stream per file) with many registered streams
+Usage (from backend/): python -m benchmarks.stream_store [--streams 50000] [--lookups 2000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.stream_store import MemoryStreamStore
+
+
+async def linear_exists(store, url):
+    """Reference implementation: the scan stream_exists_by_url used before the index"""
+    async with store._lock:
+        return any(stream['url'] == url for stream in store._streams.values())
+
+
+async def time_per_call(fn, urls):
+    await fn(urls[0])  # Warm-up
+    start = time.perf_counter()
+    for url in urls:
+        await fn(url)
+    return (time.perf_counter() - start) / len(urls)
+
+
+async def main(args):
+    store = MemoryStreamStore()
+    start = time.perf_counter()
+    for index in range(args.streams):
+        await store.get_or_create_stream(f'/videos/camera-{index:06d}.mp4')
+    print(f'Registered {args.streams:,} streams in {time.perf_counter() - start:.2f}s')
+
+    # Half hits spread over the registry, half misses (new files)
+    step = max(1, args.streams // args.lookups)
+    hits = [f'/videos/camera-{index:06d}.mp4' for index in range(0, args.streams, step)][: args.lookups // 2]
+    misses = [f'/videos/new-{index:06d}.mp4' for index in range(args.lookups // 2)]
+    urls = hits + misses
+
+    linear = await time_per_call(lambda url: linear_exists(store, url), urls)
+    indexed = await time_per_call(store.stream_exists_by_url, urls)
+    print(f'{"lookup":<22}{"linear (us)":>14}{"indexed (us)":>14}{"speedup":>10}')
+    print(f'{"stream_exists_by_url":<22}{linear * 1e6:>14.2f}{indexed * 1e6:>14.2f}{linear / indexed:>9.0f}x')
+
+    # Folder scan: every file already registered plus a few new ones
+    scan_urls = hits + misses[:10]
+    start = time.perf_counter()
+    created = 0
+    for url in scan_urls:
+        if not await linear_exists(store, url):
+            created += 1  # Not actually created, so both scans see the same registry
+    linear_scan = time.perf_counter() - start
+    start = time.perf_counter()
+    created = 0
+    for url in scan_urls:
+        _, was_created = await store.get_or_create_stream(url)
+        created += was_created
+    indexed_scan = time.perf_counter() - start
+    print(f'Folder scan of {len(scan_urls):,} files: linear check {linear_scan * 1e3:.1f}ms, '
+          f'get_or_create_stream {indexed_scan * 1e3:.1f}ms ({created} created)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--streams', type=int, default=50000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,120 @@
+from typing import Any, Dict, Optional
+
+URGENT_LEVELS = {"DANGEROUS", "CRITICAL"}
+
+
+class _IntervalState:
+    __slots__ = ("interval", "normal_streak", "urgent", "last_level")
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.normal_streak = 0
+        self.urgent = False
+        self.last_level = None
+
+
+class AdaptiveIntervalScheduler:
+    """Per-stream analysis interval driven by the latest verdicts.
+
+    A DANGEROUS/CRITICAL verdict (or high motion) drops a stream to ``min_interval``.
+    The first NORMAL afterwards restores ``base_interval`` and every ``normal_streak``
+    further NORMAL verdicts multiply it by ``backoff_factor`` up to ``max_interval``.
+    When the combined demand of all streams exceeds ``call_budget`` calls per second,
+    NORMAL streams are slowed down first so urgent streams keep their pace.
+    """
+
+    def __init__(
+        self,
+        base_interval: float = 3.0,
+        min_interval: float = 1.0,
+        max_interval: float = 24.0,
+        backoff_factor: float = 2.0,
+        normal_streak: int = 3,
+        call_budget: float = 0.0,
+    ):
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, base_interval)
+        self.max_interval = max(max_interval, base_interval)
+        self.backoff_factor = backoff_factor
+        self.normal_streak = max(1, normal_streak)
+        self.call_budget = call_budget
+        self._states: Dict[str, _IntervalState] = {}
+        self._urgent_scale = 1.0
+        self._normal_scale = 1.0
+        self._normal_floor = 0.0
+
+    def _state(self, stream_id: str, create: bool = True) -> Optional[_IntervalState]:
+        state = self._states.get(stream_id)
+        if state is None and create:
+            state = self._states[stream_id] = _IntervalState(self.base_interval)
+            self._rebalance()
+        return state
+
+    def forget(self, stream_id: str):
+        if self._states.pop(stream_id, None) is not None:
+            self._rebalance()
+
+    def record_verdict(self, stream_id: str, level: str):
+        # A stream gets its state from interval_for on its first frame; a verdict that
+        # lands after forget() belongs to a disconnected stream and must not revive it
+        state = self._state(stream_id, create=False)
+        if state is None:
+            return
+        level = level.upper()
+        state.last_level = level
+        if level in URGENT_LEVELS:
+            state.urgent = True
+            state.normal_streak = 0
+            state.interval = self.min_interval
+        elif state.urgent or state.interval < self.base_interval:
+            state.urgent = False
+            state.normal_streak = 0
+            state.interval = self.base_interval
+        else:
+            state.normal_streak += 1
+            if state.normal_streak >= self.normal_streak:
+                state.normal_streak = 0
+                state.interval = min(self.max_interval, state.interval * self.backoff_factor)
+        self._rebalance()
+
+    def interval_for(self, stream_id: str, motion_high: bool = False) -> float:
+        """Current analysis interval for a stream, including the budget scaling."""
+        state = self._state(stream_id)
+        if state.urgent or motion_high:
+            return self.min_interval * self._urgent_scale
+        return max(state.interval * self._normal_scale, self._normal_floor)
+
+    def _rebalance(self):
+        """Recompute how much urgent and NORMAL streams must slow down to fit the budget."""
+        self._urgent_scale = 1.0
+        self._normal_scale = 1.0
+        self._normal_floor = 0.0
+        if self.call_budget <= 0:
+            return
+        urgent_demand = sum(1.0 / max(s.interval, 1e-3) for s in self._states.values() if s.urgent)
+        normal_demand = sum(1.0 / max(s.interval, 1e-3) for s in self._states.values() if not s.urgent)
+        if urgent_demand >= self.call_budget:
+            self._urgent_scale = urgent_demand / self.call_budget
+            # Urgent streams use up the budget; NORMAL streams drop to one call per max_interval
+            self._normal_floor = self.max_interval
+        elif urgent_demand + normal_demand > self.call_budget:
+            self._normal_scale = normal_demand / (self.call_budget - urgent_demand)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "baseInterval": self.base_interval,
+            "minInterval": self.min_interval,
+            "maxInterval": self.max_interval,
+            "callBudget": self.call_budget,
+            "urgentScale": self._urgent_scale,
+            "normalScale": self._normal_scale,
+            "streams": {
+                stream_id: {
+                    "interval": self.interval_for(stream_id),
+                    "lastLevel": state.last_level,
+                    "urgent": state.urgent,
+                }
+                for stream_id, state in sorted(self._states.items())
+            },
+        }
@@ -0,0 +1,234 @@
+import json
+import time
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from starlette.websockets import WebSocketState
+
+from .alert_journal import AlertJournal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "drop_newest", "coalesce")
+
+
+def serialize_alert(alert: Dict[str, Any]) -> str:
+    """Encode an alert once for every subscriber (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(alert).decode()
+    return json.dumps(alert)
+
+
+class AlertSubscriber:
+    """One alert websocket with its own bounded outbound queue and writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int,
+        source: Optional[str] = None,
+        close_on_failure: bool = True,
+    ):
+        self.websocket = websocket
+        self.source = source  # Only receive alerts for this stream when set
+        # False for sockets owned by another endpoint (e.g. a webcam publisher's ingest)
+        self.close_on_failure = close_on_failure
+        self.max_queue = max_queue
+        # Keyed by coalesce key, in send order; every subscriber shares the same message str
+        self.queue: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def enqueue(self, message: str, key: Hashable, policy: str, now: float):
+        if policy == "coalesce" and key in self.queue:
+            # Replace in place: the client gets the newest version at the old position
+            self.queue[key] = (message, self.queue[key][1])
+            self.coalesced += 1
+            return
+        if len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            if policy == "drop_newest":
+                return
+            self.queue.popitem(last=False)
+        self.queue[key] = (message, now)
+        self.ready.set()
+
+
+class AlertHub:
+    """Fan-out of alert payloads to websocket subscribers without blocking the publisher.
+
+    ``publish`` serializes the alert once and only appends it to each subscriber's queue;
+    per-subscriber writer tasks do the actual sends, so one slow dashboard cannot stall
+    delivery to others or the analysis task that raised the alert. Subscribers are
+    indexed by source filter so a publish only visits the sockets that want it; an
+    alert without a source goes to every subscriber.
+    With a ``journal``, every publish is also recorded so new subscribers can be
+    replayed recent alerts before live ones.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 100,
+        policy: str = "coalesce",
+        send_timeout: float = 5.0,
+        journal: Optional[AlertJournal] = None,
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.max_queue = max(1, max_queue)
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.journal = journal
+        self.subscribers: Set[AlertSubscriber] = set()
+        self._by_source: Dict[Optional[str], Set[AlertSubscriber]] = {None: set()}
+        self._unique_keys = itertools.count()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.send_failures = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def subscribe(
+        self,
+        websocket: WebSocket,
+        source: Optional[str] = None,
+        since: Optional[int] = None,
+        replay_limit: int = 0,
+        replay_seconds: Optional[float] = None,
+        epoch: Optional[str] = None,
+        close_on_failure: bool = True,
+    ) -> AlertSubscriber:
+        """Register a websocket, queueing journal replay ahead of any live alert.
+
+        ``since`` (with its ``epoch``) resumes after the ``seq`` of a previously received
+        alert; without it (or when that has aged out or belongs to another server run) the
+        last ``replay_limit`` alerts within ``replay_seconds`` replay. A failed send always
+        detaches the subscriber but only closes the socket when ``close_on_failure`` is set.
+        """
+        subscriber = AlertSubscriber(
+            websocket, self.max_queue, source=source, close_on_failure=close_on_failure
+        )
+        if self.journal is not None and (since is not None or replay_limit > 0):
+            entries = self.journal.replay(
+                since=since,
+                epoch=epoch,
+                limit=min(replay_limit, self.max_queue),
+                max_age=replay_seconds,
+                source=source,
+            )
+            now = time.monotonic()
+            for _, alert_id, _, message in entries[-self.max_queue:]:
+                key = alert_id if alert_id is not None else ("unkeyed", next(self._unique_keys))
+                subscriber.enqueue(message, key, self.policy, now)
+        subscriber.task = asyncio.create_task(self._writer(subscriber))
+        self.subscribers.add(subscriber)
+        self._by_source.setdefault(source, set()).add(subscriber)
+        return subscriber
+
+    async def unsubscribe(self, subscriber: AlertSubscriber):
+        self._detach(subscriber)
+        task = subscriber.task
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def _detach(self, subscriber: AlertSubscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            by_source = self._by_source.get(subscriber.source)
+            if by_source is not None:
+                by_source.discard(subscriber)
+                if not by_source and subscriber.source is not None:
+                    del self._by_source[subscriber.source]
+            self.dropped += subscriber.dropped + len(subscriber.queue)
+            self.coalesced += subscriber.coalesced
+        subscriber.closed = True
+        subscriber.queue.clear()
+
+    def publish(self, alert: Dict[str, Any], key: Optional[str] = None, message: Optional[str] = None):
+        """Queue an alert for every interested subscriber. Never awaits a send.
+
+        ``message`` may carry the alert already serialized by the caller. Otherwise a
+        journaled alert is stamped with its journal ``seq`` and ``epoch`` for resuming.
+        """
+        if message is None:
+            if self.journal is not None:
+                alert = {**alert, "seq": self.journal.next_seq, "epoch": self.journal.epoch}
+            message = serialize_alert(alert)
+        if key is None:
+            key = alert.get("id")
+        if key is None:
+            key = ("unkeyed", next(self._unique_keys))
+        now = time.monotonic()
+        self.published += 1
+        if self.journal is not None:
+            self.journal.append(alert.get("id"), alert.get("source"), message, now)
+        source = alert.get("source")
+        if source is None:
+            # Not about any one stream (e.g. a reset): every subscriber needs it
+            for subscriber in self.subscribers:
+                subscriber.enqueue(message, key, self.policy, now)
+            return
+        for subscriber in self._by_source[None]:
+            subscriber.enqueue(message, key, self.policy, now)
+        for subscriber in self._by_source.get(source, ()):
+            subscriber.enqueue(message, key, self.policy, now)
+
+    async def _writer(self, subscriber: AlertSubscriber):
+        websocket = subscriber.websocket
+        while not subscriber.closed:
+            await subscriber.ready.wait()
+            subscriber.ready.clear()
+            while subscriber.queue:
+                _, (message, enqueued_at) = subscriber.queue.popitem(last=False)
+                try:
+                    if websocket.application_state != WebSocketState.CONNECTED:
+                        raise RuntimeError("websocket is not connected")
+                    await asyncio.wait_for(websocket.send_text(message), timeout=self.send_timeout)
+                except Exception as exc:
+                    print(f"Error sending alert to websocket {websocket.client}: {exc}")
+                    self.send_failures += 1
+                    self._detach(subscriber)
+                    if not subscriber.close_on_failure:
+                        return
+                    # Tell the client it fell behind so it reconnects and resumes from the journal
+                    try:
+                        await asyncio.wait_for(websocket.close(code=1013), timeout=self.send_timeout)
+                    except Exception:
+                        pass
+                    return
+                latency = time.monotonic() - enqueued_at
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                subscriber.sent += 1
+                self.delivered += 1
+
+    def stats(self) -> Dict[str, Any]:
+        depths = [len(subscriber.queue) for subscriber in self.subscribers]
+        return {
+            "policy": self.policy,
+            "maxQueue": self.max_queue,
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped + sum(subscriber.dropped for subscriber in self.subscribers),
+            "coalesced": self.coalesced + sum(subscriber.coalesced for subscriber in self.subscribers),
+            "sendFailures": self.send_failures,
+            "queueDepthTotal": sum(depths),
+            "queueDepthMax": max(depths, default=0),
+            "avgDeliveryLatencySeconds": self._latency_total / self.delivered if self.delivered else 0.0,
+            "maxDeliveryLatencySeconds": self._latency_max,
+            "history": self.journal.stats() if self.journal is not None else {"enabled": False},
+        }
@@ -0,0 +1,120 @@
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+JournalEntry = Tuple[float, Optional[str], Optional[str], str]  # (published_at, alert id, source, message)
+
+
+class AlertJournal:
+    """Fixed-size ring buffer of recently published alerts for replay to new subscribers.
+
+    Entries are stored in publish order under an increasing sequence number, so the
+    ring slot of any retained sequence is computed directly and the "last T seconds"
+    cut-off is a binary search over the (monotonic) publish times. Clients resume after
+    the ``seq`` of the last message they received (one per published version, so an
+    alert re-published under the same id does not move their position); ``epoch``
+    tells sequences of different server runs apart. Memory is bounded by ``capacity``.
+    """
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = max(1, capacity)
+        self.epoch = uuid.uuid4().hex[:12]
+        self._ring: List[Optional[JournalEntry]] = [None] * self.capacity
+        self._next_seq = 0  # Sequence number the next entry will get
+        self._ids: Dict[str, int] = {}  # Alert id -> sequence of its latest entry
+        self.appended = 0
+        self.replayed = 0
+        self.resumed = 0
+        self.resume_misses = 0
+
+    @property
+    def _first_seq(self) -> int:
+        return max(0, self._next_seq - self.capacity)
+
+    @property
+    def next_seq(self) -> int:
+        return self._next_seq
+
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+
+    def _entry(self, seq: int) -> JournalEntry:
+        return self._ring[seq % self.capacity]
+
+    def append(self, alert_id: Optional[str], source: Optional[str], message: str, now: Optional[float] = None):
+        seq = self._next_seq
+        slot = seq % self.capacity
+        evicted = self._ring[slot]
+        if evicted is not None and evicted[1] is not None and self._ids.get(evicted[1]) == seq - self.capacity:
+            del self._ids[evicted[1]]
+        self._ring[slot] = (time.monotonic() if now is None else now, alert_id, source, message)
+        if alert_id is not None:
+            self._ids[alert_id] = seq
+        self._next_seq += 1
+        self.appended += 1
+
+    def _first_seq_after(self, cutoff: float) -> int:
+        """Lowest retained sequence published at or after ``cutoff`` (binary search)."""
+        low, high = self._first_seq, self._next_seq
+        while low < high:
+            mid = (low + high) // 2
+            if self._entry(mid)[0] < cutoff:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def can_resume(self, since: int) -> bool:
+        """True if every entry after ``since`` is still retained."""
+        return self._first_seq - 1 <= since < self._next_seq
+
+    def replay(
+        self,
+        since: Optional[int] = None,
+        epoch: Optional[str] = None,
+        limit: Optional[int] = None,
+        max_age: Optional[float] = None,
+        source: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> List[JournalEntry]:
+        """Entries a (re)connecting subscriber should receive, oldest first.
+
+        With a retained ``since`` sequence of this journal's ``epoch`` only the entries
+        published after it are returned; otherwise the window is the last ``limit``
+        entries no older than ``max_age``. Alerts updated later (same id) are returned
+        once, at their newest entry.
+        """
+        start = self._first_seq
+        resumable = since is not None and epoch == self.epoch and self.can_resume(since)
+        resume_seq = since if resumable else None
+        if resume_seq is not None:
+            start = resume_seq + 1
+            self.resumed += 1
+        else:
+            if since is not None:
+                self.resume_misses += 1
+            if max_age is not None and max_age > 0:
+                start = self._first_seq_after((time.monotonic() if now is None else now) - max_age)
+
+        entries: List[JournalEntry] = []
+        for seq in range(start, self._next_seq):
+            entry = self._entry(seq)
+            if source is not None and entry[2] is not None and entry[2] != source:
+                continue
+            if entry[1] is not None and self._ids.get(entry[1]) != seq:
+                continue  # Superseded by a newer entry for the same alert
+            entries.append(entry)
+        if resume_seq is None and limit is not None:
+            entries = entries[-limit:] if limit > 0 else []
+        self.replayed += len(entries)
+        return entries
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "entries": len(self),
+            "appended": self.appended,
+            "replayed": self.replayed,
+            "resumed": self.resumed,
+            "resumeMisses": self.resume_misses,
+        }
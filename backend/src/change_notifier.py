@@ -0,0 +1,32 @@
+import asyncio
+from typing import Optional
+
+
+class ChangeNotifier:
+    """Wakes every waiter on the next ``notify`` (used by long-poll endpoints).
+
+    Each notify swaps in a fresh Event, so a waiter that grabbed the current event
+    right after checking its state cannot miss a change that happens in between. A
+    waiter that awaits while reading its state passes the ``version`` it read before
+    (``since``) instead, and returns at once if a change already happened.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self.version += 1
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def wait(self, timeout: float, since: Optional[int] = None) -> bool:
+        """Wait up to ``timeout`` seconds for the next change (after ``since``). Returns False on timeout."""
+        if since is not None and self.version != since:
+            return True
+        event = self._event
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
@@ -1,55 +1,109 @@
-from typing import Optional, Dict, List
-import asyncio
+import os
+from typing import Callable, Optional, Dict, List, Tuple
 
-_streams: Dict[int, Dict[str, str]] = {}
-_next_stream_id: int = 1
-_streams_lock = asyncio.Lock()
+from .change_notifier import ChangeNotifier
+from .stream_store import MEMORY_STORE_URL, create_stream_store
+
+_store = None
+# Notified after every write made through this module (long-poll waiters wake on it)
+stream_changes = ChangeNotifier()
+# Called as listener(event, stream) after writes; event is "added", "removed" or "reset"
+# ("reset" carries no stream: the whole list may have changed, e.g. a bulk registration)
+_stream_listeners: List[Callable[[str, Optional[Dict[str, str]]], None]] = []
+
+
+def add_stream_listener(listener: Callable[[str, Optional[Dict[str, str]]], None]) -> None:
+    _stream_listeners.append(listener)
+
+
+def _emit(event: str, stream: Optional[Dict[str, str]] = None) -> None:
+    stream_changes.notify()
+    for listener in _stream_listeners:
+        listener(event, stream)
+
+
+def get_stream_store():
+    """Backend chosen by STREAM_STORE_URL (memory:// by default, or a sqlite/postgres URL)."""
+    global _store
+    if _store is None:
+        _store = create_stream_store(
+            os.getenv("STREAM_STORE_URL", MEMORY_STORE_URL),
+            pool_size=int(os.getenv("STREAM_STORE_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("STREAM_STORE_MAX_OVERFLOW", "10")),
+        )
+    return _store
+
+
+async def open_stream_store() -> None:
+    """Prepare the store on startup (creates tables; the memory store starts empty)."""
+    await get_stream_store().open()
+
+
+async def close_stream_store() -> None:
+    """Release the store on shutdown (closes the pool; the memory store is cleared)."""
+    await get_stream_store().close()
 
 
 async def reset_stream_store() -> None:
-    """Clear the in-memory stream store (useful for tests/startup)."""
-    global _next_stream_id
-    async with _streams_lock:
-        _streams.clear()
-        _next_stream_id = 1
+    """Remove every stream from the store (useful for tests)."""
+    await get_stream_store().reset()
+    _emit("reset")
+
+
+async def get_streams_version():
+    """Value that changes whenever the set of streams changes (for response caching)."""
+    return await get_stream_store().streams_version()
 
 
 async def get_all_streams() -> List[Dict[str, str]]:
-    """Get all streams stored in memory."""
-    async with _streams_lock:
-        return [
-            {"id": str(stream_id), "url": data["url"]}
-            for stream_id, data in sorted(_streams.items())
-        ]
+    """Get all streams, ordered by ID."""
+    return await get_stream_store().get_all_streams()
 
 
 async def get_stream_by_id(stream_id: str) -> Optional[Dict[str, str]]:
-    """Get a stream by ID from the in-memory store."""
-    try:
-        stream_id_int = int(stream_id)
-    except (TypeError, ValueError):
-        return None
-
-    async with _streams_lock:
-        data = _streams.get(stream_id_int)
-        if data is None:
-            return None
-        return {"id": str(stream_id_int), "url": data["url"]}
+    """Get a stream by ID."""
+    return await get_stream_store().get_stream_by_id(stream_id)
 
 
 async def create_stream(url: str) -> Dict[str, str]:
-    """Create a new stream in memory."""
-    global _next_stream_id
+    """Create a new stream; a URL that is already registered returns its stream unchanged."""
+    # Stores return the existing row for a known URL, so only a real insert is an "added"
+    stream, created = await get_stream_store().get_or_create_stream(url)
+    if created:
+        _emit("added", stream)
+    return stream
 
-    async with _streams_lock:
-        stream_id = _next_stream_id
-        _next_stream_id += 1
-        _streams[stream_id] = {"url": url}
-        return {"id": str(stream_id), "url": url}
 
+async def get_or_create_stream(url: str, emit: bool = True) -> Tuple[Dict[str, str], bool]:
+    """Return the stream registered for a URL, creating it atomically if missing.
+
+    The second element is True when the stream was created by this call. With
+    ``emit=False`` the caller reports it later through ``emit_stream_batch``.
+    """
+    stream, created = await get_stream_store().get_or_create_stream(url)
+    if created and emit:
+        _emit("added", stream)
+    return stream, created
 
-async def stream_exists_by_url(url: str) -> bool:
-    """Check if a stream with the given URL already exists in memory."""
-    async with _streams_lock:
-        return any(stream["url"] == url for stream in _streams.values())
 
+def emit_stream_batch(event: str, streams: List[Dict[str, str]], max_events: int = 50) -> None:
+    """Report writes made with ``emit=False``: one ``event`` per stream, or a single "reset"
+    when there are more than ``max_events`` (feed clients resync instead of overflowing)."""
+    if len(streams) > max_events:
+        _emit("reset")
+        return
+    for stream in streams:
+        _emit(event, stream)
+
+
+async def delete_stream_by_url(url: str, emit: bool = True) -> Optional[Dict[str, str]]:
+    """Remove the stream registered for a URL. Returns it, or None if there was none."""
+    stream = await get_stream_store().delete_stream_by_url(url)
+    if stream is not None and emit:
+        _emit("removed", stream)
+    return stream
+
+
+async def stream_exists_by_url(url: str) -> bool:
+    """Check if a stream with the given URL already exists."""
+    return await get_stream_store().stream_exists_by_url(url)
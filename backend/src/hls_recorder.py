@@ -0,0 +1,372 @@
+import os
+import re
+import time
+import shutil
+import signal
+import asyncio
+from asyncio.subprocess import PIPE
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from .ll_hls import LowLatencyPlaylist
+
+_VARIANT_SPEC = re.compile(r"^(\d+)p:(\d+(?:\.\d+)?[kKmM]?)$")
+
+
+class HLSVariant:
+    """One rung of an adaptive-bitrate ladder: frames at most ``height`` tall at ``bitrate``."""
+
+    __slots__ = ("height", "bitrate")
+
+    def __init__(self, height: int, bitrate: str):
+        self.height = height
+        self.bitrate = bitrate
+
+    @property
+    def name(self) -> str:
+        return f"{self.height}p"
+
+    def to_dict(self):
+        return {"name": self.name, "height": self.height, "bitrate": self.bitrate}
+
+
+def parse_hls_ladder(spec: str) -> List[HLSVariant]:
+    """Parse ``"1080p:5000k,720p:2800k,360p:800k"``, highest rung first. Empty means no ladder."""
+    variants = []
+    for item in spec.replace(" ", "").split(","):
+        if not item:
+            continue
+        match = _VARIANT_SPEC.match(item)
+        if not match:
+            raise ValueError(f"Invalid HLS variant '{item}', expected e.g. 720p:2800k")
+        variants.append(HLSVariant(int(match.group(1)), match.group(2)))
+    heights = [variant.height for variant in variants]
+    if len(set(heights)) != len(heights):
+        raise ValueError("HLS ladder variants must have distinct heights")
+    return sorted(variants, key=lambda variant: variant.height, reverse=True)
+
+
+def hls_playlist_name(variants: Sequence[HLSVariant]) -> str:
+    """Playlist players should open, relative to the recorder's output directory."""
+    return "master.m3u8" if variants else "index.m3u8"
+
+
+def hls_preview_playlist_name(variants: Sequence[HLSVariant], preview_height: int) -> Optional[str]:
+    """Smallest rendition's playlist relative to the output directory, if there is one."""
+    if variants:
+        return f"{variants[-1].name}/index.m3u8"
+    if preview_height > 0:
+        return "preview/index.m3u8"
+    return None
+
+
+class HLSRecorder:
+    def __init__(
+        self,
+        ffmpeg_path: str,
+        output_dir: Path,
+        segment_seconds: float = 2.0,
+        max_segments: int = 0,
+        target_fps: float = 25.0,
+        preview_height: int = 0,
+        preview_fps: float = 5.0,
+        variants: Sequence[HLSVariant] = (),
+        low_latency: bool = False,
+        part_seconds: float = 0.4,
+    ):
+        self.ffmpeg_path = ffmpeg_path
+        self.output_dir = output_dir
+        self.segment_seconds = segment_seconds
+        self.max_segments = max_segments
+        self.target_fps = target_fps
+        # A second, low-resolution variant under preview/ (0 disables it)
+        self.preview_height = preview_height
+        self.preview_fps = preview_fps
+        # With a ladder every variant goes to <name>/ under a master playlist instead
+        self.variants = list(variants)
+        # LL-HLS: a single fMP4 rendition cut into parts (no ladder or preview variant)
+        self.low_latency = low_latency
+        self.ll_playlist: Optional[LowLatencyPlaylist] = None
+        if low_latency:
+            self.variants = []
+            self.preview_height = 0
+            # Whole frames per part and whole parts per keyframe interval
+            part_frames = max(1, round(part_seconds * target_fps))
+            parts_per_segment = max(1, round(segment_seconds * target_fps / part_frames))
+            self.ll_playlist = LowLatencyPlaylist(
+                output_dir,
+                part_duration=part_frames / target_fps,
+                parts_per_segment=parts_per_segment,
+                max_segments=max_segments,
+            )
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.lock = asyncio.Lock()
+
+    async def setup(self):
+        await asyncio.to_thread(self._prepare_output_dir)
+
+    def _prepare_output_dir(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.output_dir.glob("*"):
+            if path.is_file():
+                path.unlink(missing_ok=True)
+            elif path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+
+    async def stop(self):
+        async with self.lock:
+            await self._terminate_process()
+        if self.ll_playlist is not None:
+            await self.ll_playlist.stop()
+
+    async def write(self, frame_bytes: bytes):
+        if not frame_bytes:
+            return
+        await self._ensure_process()
+        proc = self.process
+        if not proc or proc.stdin is None:
+            return
+        try:
+            proc.stdin.write(frame_bytes)
+            if self.ll_playlist is not None:
+                self.ll_playlist.frame_ingested(time.time())
+            await proc.stdin.drain()
+        except Exception as exc:
+            print(f"FFmpeg write error, restarting recorder: {exc}")
+            await self._restart_process()
+
+    async def _ensure_process(self):
+        async with self.lock:
+            if self.process and self.process.returncode is None:
+                return
+            await self._launch_process()
+
+    async def _restart_process(self):
+        async with self.lock:
+            await self._terminate_process()
+            await self._launch_process()
+
+    @property
+    def preview_dir(self) -> Path:
+        return self.output_dir / "preview"
+
+    @property
+    def playlist_name(self) -> str:
+        return hls_playlist_name(self.variants)
+
+    @property
+    def preview_playlist_name(self) -> Optional[str]:
+        return hls_preview_playlist_name(self.variants, self.preview_height)
+
+    def _encoder_args(self) -> List[str]:
+        return [
+            "-c:v",
+            os.getenv("FFMPEG_HLS_CODEC", "libx264"),
+            "-preset",
+            os.getenv("FFMPEG_HLS_PRESET", "veryfast"),
+            "-tune",
+            "zerolatency",
+            "-pix_fmt",
+            "yuv420p",
+        ]
+
+    def _hls_muxer_args(self) -> List[str]:
+        return [
+            "-f",
+            "hls",
+            "-hls_time",
+            str(self.segment_seconds),
+            "-hls_list_size",
+            str(self.max_segments),
+            "-hls_flags",
+            os.getenv(
+                "FFMPEG_HLS_FLAGS",
+                "independent_segments+append_list+program_date_time",
+            ),
+        ]
+
+    def _hls_output_args(self, output_dir: Path) -> List[str]:
+        return [
+            *self._encoder_args(),
+            *self._hls_muxer_args(),
+            "-hls_segment_filename",
+            str(output_dir / "segment_%05d.ts"),
+            str(output_dir / "index.m3u8"),
+        ]
+
+    def _low_latency_args(self) -> List[str]:
+        """fMP4 fragments of one part each, with a keyframe on every segment boundary."""
+        playlist = self.ll_playlist
+        gop = str(max(1, round(playlist.segment_duration * self.target_fps)))
+        return [
+            "-vf",
+            f"fps={self.target_fps}",
+            *self._encoder_args(),
+            "-g",
+            gop,
+            "-keyint_min",
+            gop,
+            "-sc_threshold",
+            "0",
+            "-f",
+            "hls",
+            "-hls_time",
+            f"{playlist.part_duration:.6f}",
+            # Only recent fragments, all inside the window LowLatencyPlaylist keeps (and prunes)
+            "-hls_list_size",
+            str(min(max(30, 3 * playlist.parts_per_segment), playlist.window_parts)),
+            "-hls_flags",
+            "split_by_time+program_date_time",
+            "-hls_segment_type",
+            "fmp4",
+            # Per-run file names: a restarted ffmpeg numbers its fragments from zero again
+            "-hls_fmp4_init_filename",
+            playlist.init_name(),
+            "-hls_segment_filename",
+            str(self.output_dir / playlist.fragment_pattern()),
+            str(self.output_dir / playlist.parts_playlist_name()),
+        ]
+
+    def _ladder_args(self) -> List[str]:
+        """One decode, ``split`` into a scaler per variant, all muxed under master.m3u8."""
+        count = len(self.variants)
+        labels = "".join(f"[s{index}]" for index in range(count))
+        graph = [f"[0:v]fps={self.target_fps},split={count}{labels}"]
+        args: List[str] = []
+        for index, variant in enumerate(self.variants):
+            graph.append(f"[s{index}]scale=-2:'min({variant.height},ih)'[v{index}]")
+            args += ["-map", f"[v{index}]"]
+        args = ["-filter_complex", ";".join(graph)] + args + self._encoder_args()
+        for index, variant in enumerate(self.variants):
+            args += [
+                f"-b:v:{index}",
+                variant.bitrate,
+                f"-maxrate:v:{index}",
+                variant.bitrate,
+                f"-bufsize:v:{index}",
+                variant.bitrate,
+            ]
+        # Keyframes on the same frames in every variant so players can switch at any segment
+        gop = str(max(1, round(self.target_fps * self.segment_seconds)))
+        args += ["-g", gop, "-keyint_min", gop, "-sc_threshold", "0"]
+        args += self._hls_muxer_args()
+        args += [
+            "-master_pl_name",
+            "master.m3u8",
+            "-var_stream_map",
+            " ".join(f"v:{index},name:{variant.name}" for index, variant in enumerate(self.variants)),
+            "-hls_segment_filename",
+            str(self.output_dir / "%v" / "segment_%05d.ts"),
+            str(self.output_dir / "%v" / "index.m3u8"),
+        ]
+        return args
+
+    async def _launch_process(self):
+        await asyncio.to_thread(self.output_dir.mkdir, parents=True, exist_ok=True)
+
+        cmd = [
+            self.ffmpeg_path,
+            "-loglevel",
+            os.getenv("FFMPEG_LOGLEVEL", "warning"),
+            "-hide_banner",
+            "-y",
+        ]
+        if self.low_latency:
+            # Timestamp frames on arrival so part boundaries follow wall-clock time even
+            # when the publisher sends fewer frames than target_fps
+            cmd += ["-use_wallclock_as_timestamps", "1"]
+        cmd += [
+            "-f",
+            "mjpeg",
+            "-i",
+            "pipe:0",
+        ]
+        if self.low_latency:
+            # A reconnecting camera reuses its directory; the previous recorder's files are
+            # unreachable from this playlist and would only fill the disk
+            await asyncio.to_thread(self.ll_playlist.remove_stale_files)
+            self.ll_playlist.start()
+            cmd += self._low_latency_args()
+        elif self.variants:
+            for variant in self.variants:
+                await asyncio.to_thread((self.output_dir / variant.name).mkdir, parents=True, exist_ok=True)
+            cmd += self._ladder_args()
+        elif self.preview_height > 0:
+            # Decode once and encode both variants in the same process
+            await asyncio.to_thread(self.preview_dir.mkdir, parents=True, exist_ok=True)
+            cmd += [
+                "-filter_complex",
+                f"[0:v]fps={self.target_fps},split=2[main][small];"
+                f"[small]fps={self.preview_fps},scale=-2:'min({self.preview_height},ih)'[preview]",
+                "-map",
+                "[main]",
+                *self._hls_output_args(self.output_dir),
+                "-map",
+                "[preview]",
+                # Keyframe at every segment boundary, the preview runs at a few fps
+                "-g",
+                str(max(1, round(self.preview_fps * self.segment_seconds))),
+                "-crf",
+                os.getenv("FFMPEG_HLS_PREVIEW_CRF", "30"),
+                *self._hls_output_args(self.preview_dir),
+            ]
+        else:
+            cmd += [
+                "-vf",
+                f"fps={self.target_fps}",
+                *self._hls_output_args(self.output_dir),
+            ]
+
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=PIPE,
+                stdout=PIPE,
+                stderr=PIPE,
+            )
+            asyncio.create_task(self._log_errors(self.process.stderr))
+        except FileNotFoundError:
+            print("FFmpeg binary not found. Ensure ffmpeg is installed or set FFMPEG_PATH.")
+            self.process = None
+
+    async def _log_errors(self, stderr: Optional[asyncio.StreamReader]):
+        if stderr is None:
+            return
+        try:
+            while True:
+                line = await stderr.readline()
+                if not line:
+                    break
+                print(f"[ffmpeg] {line.decode(errors='ignore').strip()}")
+        except Exception:
+            pass
+
+    async def _terminate_process(self):
+        if not self.process:
+            return
+        proc = self.process
+        self.process = None
+        if proc.stdin:
+            try:
+                proc.stdin.write_eof()
+            except (AttributeError, RuntimeError, ValueError):
+                try:
+                    proc.stdin.close()
+                except Exception:
+                    pass
+            except Exception:
+                pass
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=3)
+        except asyncio.TimeoutError:
+            if proc.returncode is None:
+                if hasattr(proc, "send_signal"):
+                    proc.send_signal(signal.SIGTERM)
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout=3)
+                except asyncio.TimeoutError:
+                    if hasattr(proc, "kill"):
+                        proc.kill()
+                    await proc.wait()
+        except Exception:
+            pass
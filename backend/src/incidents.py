@@ -0,0 +1,125 @@
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+LEVEL_RANK = {"NORMAL": 0, "DANGEROUS": 1, "CRITICAL": 2}
+
+
+class Incident:
+    __slots__ = ("id", "stream_id", "level", "peak_level", "reason", "count",
+                 "first_seen", "last_seen", "last_emitted", "emitted_count", "updates")
+
+    def __init__(self, stream_id: str, level: str, reason: str, now: float):
+        self.id = str(uuid.uuid4())
+        self.stream_id = stream_id
+        self.level = level
+        self.peak_level = level
+        self.reason = reason
+        self.count = 1
+        self.first_seen = now
+        self.last_seen = now
+        self.last_emitted = now
+        self.emitted_count = 1  # ``count`` as of the last emitted version
+        self.updates = 0
+
+
+class IncidentTracker:
+    """Merges repeated non-NORMAL verdicts on a stream into one evolving incident.
+
+    An alert joins the stream's open incident when it arrives within ``window_seconds``
+    of the previous one; otherwise a new incident (with a new id) starts. Detector
+    reasons are free text and vary between calls, so they do not split incidents; the
+    latest one is carried along. Repeats only produce an update when the peak level
+    rises or ``update_interval`` seconds passed since the last emitted version, so a
+    long incident costs a handful of messages instead of one per verdict. Incidents that
+    outlived the window are closed by ``expire`` (run on a timer) or by the next alert.
+    """
+
+    def __init__(self, window_seconds: float = 120.0, update_interval: float = 10.0):
+        self.window_seconds = window_seconds
+        self.update_interval = update_interval
+        self._open: Dict[str, Incident] = {}
+        self.opened = 0
+        self.merged = 0
+        self.emitted_updates = 0
+        self.suppressed = 0
+        self.closed = 0
+
+    def forget(self, stream_id: str, now: Optional[float] = None) -> Optional[Incident]:
+        """Drop the stream's incident (its camera went away).
+
+        Returns it if a closing update is owed: it was still open, or repeats since its
+        last emitted version were suppressed.
+        """
+        incident = self._open.pop(stream_id, None)
+        if incident is None:
+            return None
+        return self._close(incident, time.time() if now is None else now)
+
+    def expire(self, now: Optional[float] = None) -> List[Incident]:
+        """Close every incident whose window ran out; returns those owed a closing update."""
+        now = time.time() if now is None else now
+        closing = []
+        for stream_id, incident in list(self._open.items()):
+            if now - incident.last_seen > self.window_seconds:
+                del self._open[stream_id]
+                if self._close(incident, now) is not None:
+                    closing.append(incident)
+        return closing
+
+    def _close(self, incident: Incident, now: float) -> Optional[Incident]:
+        if now - incident.last_seen <= self.window_seconds or incident.count > incident.emitted_count:
+            incident.last_emitted = now
+            incident.emitted_count = incident.count
+            incident.updates += 1
+            self.closed += 1
+            return incident
+        return None
+
+    def observe(
+        self, stream_id: str, level: str, reason: str, now: Optional[float] = None
+    ) -> Tuple[Incident, bool, Optional[Incident]]:
+        """Fold an alert into the stream's incident. Returns (incident, should_emit, closed).
+
+        ``closed`` is an expired incident this alert replaced whose closing update is owed;
+        emit it before the new incident.
+        """
+        now = time.time() if now is None else now
+        incident = self._open.get(stream_id)
+        if incident is None or now - incident.last_seen > self.window_seconds:
+            closed = self.forget(stream_id, now) if incident is not None else None
+            incident = self._open[stream_id] = Incident(stream_id, level, reason, now)
+            self.opened += 1
+            return incident, True, closed
+
+        self.merged += 1
+        incident.count += 1
+        incident.last_seen = now
+        incident.level = level
+        escalated = LEVEL_RANK.get(level, 0) > LEVEL_RANK.get(incident.peak_level, 0)
+        if escalated:
+            incident.peak_level = level
+        incident.reason = reason
+
+        if escalated or now - incident.last_emitted >= self.update_interval:
+            incident.last_emitted = now
+            incident.emitted_count = incident.count
+            incident.updates += 1
+            self.emitted_updates += 1
+            return incident, True, None
+        self.suppressed += 1
+        return incident, False, None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "enabled": True,
+            "windowSeconds": self.window_seconds,
+            "updateInterval": self.update_interval,
+            "openIncidents": sum(1 for incident in self._open.values() if now - incident.last_seen <= self.window_seconds),
+            "opened": self.opened,
+            "merged": self.merged,
+            "emittedUpdates": self.emitted_updates,
+            "suppressed": self.suppressed,
+            "closed": self.closed,
+        }
@@ -0,0 +1,168 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+ResultCallback = Callable[[Any], Awaitable[None]]
+
+
+class TokenBucket:
+    """Async token bucket enforcing a global requests-per-second budget."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1.0
+
+
+class _InferenceJob:
+    __slots__ = ("payload", "on_result", "submitted_at")
+
+    def __init__(self, payload: Any, on_result: ResultCallback):
+        self.payload = payload
+        self.on_result = on_result
+        self.submitted_at = time.monotonic()
+
+
+class InferenceScheduler:
+    """Shared scheduler that runs blocking analysis calls for many streams.
+
+    Each stream holds at most one pending frame (newer submissions replace older ones)
+    and at most one call in flight. Ready streams are served round-robin by a fixed
+    pool of workers, and every call draws from a global token bucket.
+    """
+
+    def __init__(
+        self,
+        analyze: Callable[[Any], Any],
+        max_concurrency: int = 4,
+        requests_per_second: float = 0.0,
+    ):
+        self._analyze = analyze
+        self.max_concurrency = max(1, max_concurrency)
+        self._bucket = TokenBucket(requests_per_second)
+        self._pending: Dict[str, _InferenceJob] = {}
+        self._in_flight: Set[str] = set()
+        self._ready: "asyncio.Queue[str]" = asyncio.Queue()
+        self._queued: Set[str] = set()  # Ids in _ready, so a stream is never queued twice
+        self._workers: List[asyncio.Task] = []
+        self._stream_stats: Dict[str, Dict[str, int]] = {}
+        self.submitted = 0
+        self.superseded = 0
+        self.completed = 0
+        self.failed = 0
+        self._queue_wait_total = 0.0
+        self._call_time_total = 0.0
+
+    def start(self):
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)
+        ]
+
+    async def stop(self):
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # Forget every stream so a restarted scheduler does not serve stale ids
+        self._pending.clear()
+        self._queued.clear()
+        self._in_flight.clear()
+        self._ready = asyncio.Queue()
+        self._stream_stats.clear()
+
+    def _enqueue(self, stream_id: str):
+        if stream_id not in self._queued and stream_id not in self._in_flight:
+            self._queued.add(stream_id)
+            self._ready.put_nowait(stream_id)
+
+    def submit(self, stream_id: str, payload: Any, on_result: ResultCallback):
+        """Queue a frame for analysis, replacing any frame the stream still has waiting."""
+        self.submitted += 1
+        stats = self._stream_stats.setdefault(
+            stream_id, {"submitted": 0, "superseded": 0, "completed": 0}
+        )
+        stats["submitted"] += 1
+
+        if stream_id in self._pending:
+            self.superseded += 1
+            stats["superseded"] += 1
+            self._pending[stream_id] = _InferenceJob(payload, on_result)
+            return
+
+        self._pending[stream_id] = _InferenceJob(payload, on_result)
+        self._enqueue(stream_id)
+
+    def discard(self, stream_id: str):
+        """Drop any waiting frame and the stats of a stream (e.g. when its publisher disconnects)."""
+        self._pending.pop(stream_id, None)
+        self._stream_stats.pop(stream_id, None)
+
+    async def _worker(self):
+        while True:
+            stream_id = await self._ready.get()
+            self._queued.discard(stream_id)
+            job = self._pending.pop(stream_id, None)
+            if job is None:
+                continue
+
+            self._in_flight.add(stream_id)
+            try:
+                await self._bucket.acquire()
+                started = time.monotonic()
+                self._queue_wait_total += started - job.submitted_at
+                try:
+                    result = await asyncio.to_thread(self._analyze, job.payload)
+                except Exception as exc:
+                    self.failed += 1
+                    print(f"Inference error for {stream_id}: {exc}")
+                    continue
+                self._call_time_total += time.monotonic() - started
+                self.completed += 1
+                stats = self._stream_stats.get(stream_id)
+                if stats is not None:  # Gone if the stream was discarded mid-call
+                    stats["completed"] += 1
+
+                try:
+                    await job.on_result(result)
+                except Exception as exc:
+                    print(f"Error handling inference result for {stream_id}: {exc}")
+            finally:
+                self._in_flight.discard(stream_id)
+                if stream_id in self._pending:
+                    # A newer frame arrived while this one was in flight; go to the back of the line
+                    self._enqueue(stream_id)
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "maxConcurrency": self.max_concurrency,
+            "requestsPerSecond": self._bucket.rate,
+            "submitted": self.submitted,
+            "superseded": self.superseded,
+            "completed": self.completed,
+            "failed": self.failed,
+            "pending": len(self._pending),
+            "inFlight": len(self._in_flight),
+            "avgQueueWaitSeconds": self._queue_wait_total / finished if finished else 0.0,
+            "avgCallSeconds": self._call_time_total / self.completed if self.completed else 0.0,
+            "streams": {stream_id: dict(stats) for stream_id, stats in sorted(self._stream_stats.items())},
+        }
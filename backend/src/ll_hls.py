@@ -0,0 +1,450 @@
+import re
+import math
+import time
+import uuid
+import struct
+import asyncio
+import itertools
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .change_notifier import ChangeNotifier
+
+# History kept when no segment count is configured: part files are deleted as they leave it
+DEFAULT_WINDOW_SECONDS = 180.0
+# Enough of a fragment to hold its moof box (the media data follows it)
+FRAGMENT_HEADER_BYTES = 64 * 1024
+SAMPLE_IS_NON_SYNC = 0x10000
+# Fragment, init and playlist files of any playlist instance (see LowLatencyPlaylist.run_name)
+LL_FILE_PATTERN = re.compile(r"(?:parts_(\w+)\.m3u8|init_(\w+)\.mp4|part_(\w+)_\d+\.m4s)")
+
+
+class HLSPart:
+    __slots__ = ("msn", "number", "uri", "duration", "end", "program_date_time", "emitted_at",
+                 "independent", "generation", "discontinuity")
+
+    def __init__(self, msn: int, number: int, uri: str, duration: float, end: float,
+                 program_date_time: Optional[str], emitted_at: float, independent: bool,
+                 generation: int, discontinuity: bool):
+        self.msn = msn
+        self.number = number  # Position inside its segment
+        self.uri = uri
+        self.duration = duration
+        self.end = end  # Media time at the end of the part, from the first frame of its ffmpeg run
+        self.program_date_time = program_date_time
+        self.emitted_at = emitted_at
+        self.independent = independent  # Starts with a keyframe
+        self.generation = generation  # ffmpeg run that wrote it (and its init segment)
+        self.discontinuity = discontinuity  # First part after an ffmpeg restart
+
+
+def parse_parts_playlist(text: str) -> Tuple[int, Optional[str], List[Tuple[str, float, Optional[str]]]]:
+    """Media sequence, init segment and (uri, duration, date) entries of an ffmpeg playlist."""
+    media_sequence = 0
+    init_uri = None
+    entries = []
+    duration = None
+    date = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+            media_sequence = int(line.split(":", 1)[1])
+        elif line.startswith("#EXT-X-MAP:"):
+            init_uri = line.split('URI="', 1)[1].split('"', 1)[0]
+        elif line.startswith("#EXT-X-PROGRAM-DATE-TIME:"):
+            date = line.split(":", 1)[1]
+        elif line.startswith("#EXTINF:"):
+            duration = float(line.split(":", 1)[1].split(",", 1)[0])
+        elif line and not line.startswith("#") and duration is not None:
+            entries.append((line, duration, date))
+            duration = None
+            date = None
+    return media_sequence, init_uri, entries
+
+
+def _mp4_boxes(data: bytes, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """(type, payload start, box end) of the ISO BMFF boxes in ``data[start:end]``."""
+    while start + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", data, start)
+        header = 8
+        if size == 1:
+            if start + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, start + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header:
+            return
+        yield kind, start + header, min(start + size, end)
+        start += size
+
+
+def fragment_starts_with_keyframe(data: bytes) -> Optional[bool]:
+    """Whether the first sample of an fMP4 fragment is a sync sample; None if unknown."""
+    for kind, start, end in _mp4_boxes(data, 0, len(data)):
+        if kind != b"moof":
+            continue
+        for kind, start, end in _mp4_boxes(data, start, end):
+            if kind != b"traf":
+                continue
+            default_flags = None
+            for kind, start, end in _mp4_boxes(data, start, end):
+                if end - start < 8:
+                    return None
+                flags = int.from_bytes(data[start + 1:start + 4], "big")
+                offset = start + 8  # Version/flags and track id or sample count
+                if kind == b"tfhd":
+                    # base_data_offset, sample_description_index, default duration and size
+                    for bit, size in ((0x1, 8), (0x2, 4), (0x8, 4), (0x10, 4)):
+                        if flags & bit:
+                            offset += size
+                    if flags & 0x20 and offset + 4 <= end:
+                        default_flags = struct.unpack_from(">I", data, offset)[0]
+                elif kind == b"trun":
+                    if flags & 0x1:
+                        offset += 4  # data_offset
+                    if flags & 0x4:
+                        sample_flags = struct.unpack_from(">I", data, offset)[0] if offset + 4 <= end else None
+                    elif flags & 0x400:
+                        # Per-sample flags follow the first sample's duration and size
+                        offset += (4 if flags & 0x100 else 0) + (4 if flags & 0x200 else 0)
+                        sample_flags = struct.unpack_from(">I", data, offset)[0] if offset + 4 <= end else None
+                    else:
+                        sample_flags = default_flags
+                    if sample_flags is None:
+                        return None
+                    return not sample_flags & SAMPLE_IS_NON_SYNC
+    return None
+
+
+class LowLatencyPlaylist:
+    """LL-HLS media playlist built from the short fMP4 fragments ffmpeg writes.
+
+    ffmpeg's HLS muxer cannot emit EXT-X-PART, so it is run with ``hls_time`` set to the
+    part duration and a keyframe every ``parts_per_segment`` parts; each fragment becomes
+    a part, and a new segment starts at every part that begins with a keyframe (read from
+    the fragment's ``moof``). A poller notices new fragments, records when each one
+    appeared and wakes blocking playlist reloads (``_HLS_msn`` / ``_HLS_part``). ffmpeg
+    does not delete fragments itself, so parts that leave the window (``max_segments``
+    segments, a few minutes by default) are deleted here.
+
+    Every ffmpeg run (``start``) writes its own fragment, init and playlist files; its
+    parts continue the media sequence after an EXT-X-DISCONTINUITY. File names carry an
+    id unique to this instance, so a reconnecting camera's new recorder never reads (or
+    overwrites) what the previous one left in the same directory.
+    """
+
+    def __init__(self, directory: Path, part_duration: float, parts_per_segment: int,
+                 max_segments: int = 0, poll_interval: Optional[float] = None):
+        self.directory = Path(directory)
+        self.part_duration = part_duration
+        self.parts_per_segment = max(1, parts_per_segment)  # Expected; actual segments follow keyframes
+        if max_segments <= 0:
+            max_segments = max(1, math.ceil(DEFAULT_WINDOW_SECONDS / self.segment_duration))
+        self.max_segments = max_segments
+        self.poll_interval = poll_interval or max(0.02, part_duration / 4)
+        self.changes = ChangeNotifier()
+        self.parts: Deque[HLSPart] = deque()
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.generation = 0
+        self._started = False
+        self.first_frame_at: Optional[float] = None
+        # Longest part and complete segment seen; the advertised targets never shrink
+        self.max_part_duration = 0.0
+        self.max_segment_duration = 0.0
+        self.discontinuity_sequence = 0
+        self._next_fragment = 0  # ffmpeg's index of the next fragment of this run
+        self._run_time = 0.0
+        self._segment_time = 0.0  # Duration of the newest segment so far
+        self._mtime = None
+        self._task: Optional[asyncio.Task] = None
+        self._version = 0
+        self._rendered: Tuple[int, str] = (-1, "")
+        self.emission_delays: Deque[float] = deque(maxlen=200)
+        self.deleted_parts = 0
+
+    @property
+    def segment_duration(self) -> float:
+        return self.part_duration * self.parts_per_segment
+
+    @property
+    def window_parts(self) -> int:
+        """Parts kept: ``max_segments`` full segments plus the one being filled."""
+        return (self.max_segments + 1) * self.parts_per_segment
+
+    @property
+    def part_target(self) -> float:
+        return max(self.part_duration, self.max_part_duration)
+
+    @property
+    def target_duration(self) -> int:
+        # EXTINF rounded to the nearest second must not exceed it
+        return max(math.ceil(self.segment_duration), math.floor(self.max_segment_duration + 0.5))
+
+    def run_name(self, generation: Optional[int] = None) -> str:
+        return f"{self.instance_id}_{self.generation if generation is None else generation}"
+
+    def parts_playlist_name(self, generation: Optional[int] = None) -> str:
+        return f"parts_{self.run_name(generation)}.m3u8"
+
+    def init_name(self, generation: Optional[int] = None) -> str:
+        return f"init_{self.run_name(generation)}.mp4"
+
+    def fragment_pattern(self) -> str:
+        return f"part_{self.run_name()}_%06d.m4s"
+
+    def remove_stale_files(self) -> int:
+        """Delete LL-HLS files other instances left in the directory (blocking)."""
+        prefix = f"{self.instance_id}_"
+        removed = 0
+        try:
+            entries = list(self.directory.iterdir())
+        except FileNotFoundError:
+            return 0
+        for path in entries:
+            match = LL_FILE_PATTERN.fullmatch(path.name)
+            if match is None or next(name for name in match.groups() if name).startswith(prefix):
+                continue
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def position(self) -> Tuple[int, int]:
+        """(msn, part) of the newest part, (-1, -1) before the first one."""
+        if not self.parts:
+            return -1, -1
+        return self.parts[-1].msn, self.parts[-1].number
+
+    def start(self):
+        self.new_run()
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def new_run(self):
+        """Follow a new ffmpeg process; the parts listed so far stay in the window."""
+        if self._started:
+            self.generation += 1
+        self._started = True
+        self.first_frame_at = None
+        self._next_fragment = 0
+        self._run_time = 0.0
+        self._mtime = None
+        self._version += 1
+
+    def frame_ingested(self, now: float):
+        if self.first_frame_at is None:
+            self.first_frame_at = now
+
+    async def _poll(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as exc:
+                print(f"LL-HLS playlist refresh failed: {exc}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _read_if_changed(self) -> Optional[str]:
+        path = self.directory / self.parts_playlist_name()
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime == self._mtime:
+            return None
+        self._mtime = mtime
+        return path.read_text()
+
+    def _keyframes(self, uris: List[str]) -> List[Optional[bool]]:
+        keyframes = []
+        for uri in uris:
+            try:
+                with open(self.directory / uri, "rb") as handle:
+                    keyframes.append(fragment_starts_with_keyframe(handle.read(FRAGMENT_HEADER_BYTES)))
+            except OSError:
+                keyframes.append(None)
+        return keyframes
+
+    async def refresh(self):
+        text = await asyncio.to_thread(self._read_if_changed)
+        if text is None:
+            return
+        now = time.time()
+        media_sequence, _, entries = parse_parts_playlist(text)
+        fresh = [
+            (media_sequence + offset, uri, duration, date)
+            for offset, (uri, duration, date) in enumerate(entries)
+            if media_sequence + offset >= self._next_fragment
+        ]
+        if not fresh:
+            return
+        keyframes = await asyncio.to_thread(self._keyframes, [uri for _, uri, _, _ in fresh])
+        added = False
+        for (index, uri, duration, date), keyframe in zip(fresh, keyframes):
+            self._next_fragment = index + 1
+            self._run_time += duration
+            if self._add_part(uri, duration, date, keyframe, now):
+                added = True
+        if not added:
+            return
+        self._version += 1
+        expired = self._expire()
+        self.changes.notify()
+        if expired:
+            await asyncio.to_thread(self._delete_files, expired)
+
+    def _add_part(self, uri: str, duration: float, date: Optional[str],
+                  keyframe: Optional[bool], now: float) -> bool:
+        last = self.parts[-1] if self.parts else None
+        continuing = last is not None and last.generation == self.generation
+        if not continuing:
+            if keyframe is False:
+                return False  # A run's first segment starts on a keyframe
+            new_segment = True
+        elif keyframe is None:
+            # Unreadable fragment: fall back to the configured segment length
+            new_segment = self._segment_time >= self.segment_duration - self.part_duration / 2
+        else:
+            new_segment = keyframe
+        if new_segment:
+            if last is not None:
+                self.max_segment_duration = max(self.max_segment_duration, self._segment_time)
+            msn, number = (last.msn + 1 if last is not None else 0), 0
+            self._segment_time = 0.0
+        else:
+            msn, number = last.msn, last.number + 1
+        self._segment_time += duration
+        self.max_part_duration = max(self.max_part_duration, duration)
+        self.parts.append(HLSPart(
+            msn, number, uri, duration, self._run_time, date, now,
+            independent=keyframe if keyframe is not None else number == 0,
+            generation=self.generation,
+            discontinuity=new_segment and not continuing and last is not None,
+        ))
+        if self.first_frame_at is not None:
+            # How long after its last frame arrived the part became available
+            self.emission_delays.append(now - (self.first_frame_at + self._run_time))
+        return True
+
+    def _expire(self) -> List[str]:
+        """Drop segments that left the window; returns the files to delete."""
+        first_kept = self.parts[-1].msn - self.max_segments
+        expired = []
+        generations = set()
+        while self.parts and self.parts[0].msn < first_kept:
+            part = self.parts.popleft()
+            if part.discontinuity:
+                self.discontinuity_sequence += 1
+            expired.append(part.uri)
+            generations.add(part.generation)
+        # Init segments and playlists of runs with no part left in the window
+        for generation in sorted(generations):
+            if generation < self.parts[0].generation:
+                expired += [self.init_name(generation), self.parts_playlist_name(generation)]
+        return expired
+
+    def _delete_files(self, names: List[str]):
+        for name in names:
+            path = self.directory / name
+            if path.parent == self.directory:  # Only files ffmpeg wrote next to the playlist
+                path.unlink(missing_ok=True)
+                if name.endswith(".m4s"):
+                    self.deleted_parts += 1
+
+    def has(self, msn: int, part: Optional[int]) -> bool:
+        """True once the playlist contains part ``part`` of segment ``msn`` (or all of it).
+
+        A segment is complete once the next one started; a ``part`` past the end of its
+        segment is therefore satisfied by the first part of the next segment.
+        """
+        last_msn, last_part = self.position()
+        if part is None:
+            return last_msn > msn
+        return (last_msn, last_part) >= (msn, part)
+
+    async def wait_for(self, msn: int, part: Optional[int], timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.has(msn, part):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not await self.changes.wait(remaining):
+                return self.has(msn, part)
+        return True
+
+    def segment_parts(self, msn: int) -> Optional[List[HLSPart]]:
+        """Parts of a complete segment still in the playlist, in order."""
+        if not self.has(msn, None):
+            return None
+        parts = [part for part in self.parts if part.msn == msn]
+        if not parts or parts[0].number != 0:
+            return None
+        return parts
+
+    def render(self) -> str:
+        """Playlist text; cached until a new part shows up."""
+        if self._rendered[0] == self._version:
+            return self._rendered[1]
+        # Targets follow the longest part and segment seen so far (split_by_time parts can
+        # run over hls_time) and never shrink, so players keep a stable buffer size
+        part_target = self.part_target
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:9",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            f"#EXT-X-PART-INF:PART-TARGET={part_target:.5f}",
+            f"#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,PART-HOLD-BACK={3 * part_target:.3f}",
+        ]
+        parts = list(self.parts)
+        lines.append(f"#EXT-X-MEDIA-SEQUENCE:{parts[0].msn if parts else 0}")
+        if self.discontinuity_sequence:
+            lines.append(f"#EXT-X-DISCONTINUITY-SEQUENCE:{self.discontinuity_sequence}")
+        if not parts:
+            lines.append(f'#EXT-X-MAP:URI="{self.init_name()}"')
+
+        last_msn, _ = self.position()
+        mapped = None
+        for msn, grouped in itertools.groupby(parts, key=lambda part: part.msn):
+            segment = list(grouped)
+            if segment[0].discontinuity:
+                lines.append("#EXT-X-DISCONTINUITY")
+            if segment[0].generation != mapped:
+                mapped = segment[0].generation
+                lines.append(f'#EXT-X-MAP:URI="{self.init_name(mapped)}"')
+            if segment[0].program_date_time:
+                lines.append(f"#EXT-X-PROGRAM-DATE-TIME:{segment[0].program_date_time}")
+            # Parts are only listed for the last few segments, as the spec recommends
+            if msn >= last_msn - 2:
+                for part in segment:
+                    independent = ",INDEPENDENT=YES" if part.independent else ""
+                    lines.append(f'#EXT-X-PART:DURATION={part.duration:.5f},URI="{part.uri}"{independent}')
+            if msn < last_msn:
+                lines.append(f"#EXTINF:{sum(part.duration for part in segment):.5f},")
+                lines.append(f"ll/{msn}.m4s")
+        text = "\n".join(lines) + "\n"
+        self._rendered = (self._version, text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        delays = sorted(self.emission_delays)
+        msn, part = self.position()
+        return {
+            "partDuration": self.part_duration,
+            "partsPerSegment": self.parts_per_segment,
+            "partTarget": self.part_target,
+            "targetDuration": self.target_duration,
+            "msn": msn,
+            "part": part,
+            "parts": len(self.parts),
+            "generation": self.generation,
+            "discontinuitySequence": self.discontinuity_sequence,
+            "windowSegments": self.max_segments,
+            "deletedParts": self.deleted_parts,
+            "emissionDelayP50": delays[len(delays) // 2] if delays else None,
+            "emissionDelayMax": delays[-1] if delays else None,
+        }
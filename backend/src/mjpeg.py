@@ -0,0 +1,267 @@
+import time
+import asyncio
+import itertools
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+
+from yolo.jpeg_codec import decode_jpeg_reduced, jpeg_header
+
+from .webcam_ingest import build_mjpeg_chunk
+
+# Maximum frame height per viewer tier (None = the publisher's own frames)
+RESOLUTION_TIERS: Dict[str, Optional[int]] = {
+    "full": None,
+    "1080p": 1080,
+    "720p": 720,
+    "480p": 480,
+    "360p": 360,
+    "240p": 240,
+}
+
+
+def downscale_jpeg(frame_bytes: bytes, max_height: int, quality: int = 70) -> Optional[bytes]:
+    """Re-encode a JPEG no taller than ``max_height``; returns the input if it already fits."""
+    try:
+        _, width, height = jpeg_header(frame_bytes)
+    except Exception:
+        return None
+    if height <= max_height:
+        return frame_bytes
+
+    frame = decode_jpeg_reduced(frame_bytes, height, max_height)
+    if frame is None:
+        return None
+
+    new_width = max(1, int(width * max_height / height))
+    if frame.shape[0] != max_height:
+        frame = cv2.resize(frame, (new_width, max_height), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes() if ok else None
+
+
+class MjpegRenditions:
+    """Downscaled MJPEG chunks computed once per (stream, tier, frame) and shared by viewers.
+
+    Only the latest frame of each tier is kept; the first viewer that needs it starts the
+    transcode as a detached task and everyone (itself included) awaits it shielded, so a
+    viewer that disconnects mid-transcode never strands the others.
+    """
+
+    def __init__(self, quality: int = 70):
+        self.quality = quality
+        self._latest: Dict[Tuple[str, int], Tuple[int, asyncio.Task]] = {}
+        self.transcodes = 0
+        self.shared = 0
+        self.failures = 0
+
+    def forget(self, stream_id: str):
+        for key in [key for key in self._latest if key[0] == stream_id]:
+            del self._latest[key]
+
+    async def chunk_for(self, stream_id: str, max_height: int, seq: int, frame_bytes: bytes) -> Optional[bytes]:
+        key = (stream_id, max_height)
+        cached = self._latest.get(key)
+        if cached is not None and cached[0] == seq:
+            self.shared += 1
+            return await asyncio.shield(cached[1])
+        if cached is not None and cached[0] > seq:
+            return None  # A newer frame is already being served for this tier
+
+        task = asyncio.create_task(self._transcode(stream_id, max_height, frame_bytes))
+        self._latest[key] = (seq, task)
+        self.transcodes += 1
+        return await asyncio.shield(task)
+
+    async def _transcode(self, stream_id: str, max_height: int, frame_bytes: bytes) -> Optional[bytes]:
+        try:
+            scaled = await asyncio.to_thread(downscale_jpeg, frame_bytes, max_height, self.quality)
+            chunk = build_mjpeg_chunk(scaled) if scaled is not None else None
+        except Exception as exc:
+            print(f"Error downscaling MJPEG frame for {stream_id}: {exc}")
+            chunk = None
+        if chunk is None:
+            self.failures += 1
+        return chunk
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "quality": self.quality,
+            "transcodes": self.transcodes,
+            "shared": self.shared,
+            "failures": self.failures,
+        }
+
+
+class MjpegPreview:
+    """Low-resolution, low-FPS rendition of one camera, fed from the ingest path.
+
+    At most one frame every ``1 / fps`` seconds is downscaled (in a worker thread, one
+    at a time) and only while someone is watching; every preview viewer shares it.
+    """
+
+    def __init__(self, max_height: int, fps: float, quality: int):
+        self.max_height = max_height
+        self.frame_interval = 1.0 / fps if fps > 0 else 0.0
+        self.quality = quality
+        self.ready = asyncio.Condition()
+        self.seq = 0
+        self.chunk: Optional[bytes] = None
+        self.viewers = 0
+        self._next_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.rendered = 0
+        self.skipped = 0
+
+    def offer(self, frame_bytes: bytes, now: float):
+        if self.viewers == 0 or now < self._next_at:
+            return
+        if self._task is not None and not self._task.done():
+            self.skipped += 1
+            return
+        self._next_at = now + self.frame_interval
+        self._task = asyncio.create_task(self._render(frame_bytes))
+
+    async def _render(self, frame_bytes: bytes):
+        try:
+            scaled = await asyncio.to_thread(downscale_jpeg, frame_bytes, self.max_height, self.quality)
+        except Exception as exc:
+            print(f"Error rendering MJPEG preview: {exc}")
+            return
+        if scaled is None:
+            return
+        chunk = build_mjpeg_chunk(scaled)
+        async with self.ready:
+            self.seq += 1
+            self.chunk = chunk
+            self.rendered += 1
+            self.ready.notify_all()
+
+    async def wait_for_frame(self, after_seq: int, timeout: float) -> Optional[Tuple[int, bytes]]:
+        """Wait for a preview newer than ``after_seq``; returns (seq, MJPEG chunk) or None on timeout."""
+        async with self.ready:
+            try:
+                await asyncio.wait_for(
+                    self.ready.wait_for(lambda: self.seq > after_seq and self.chunk is not None),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                return None
+            return self.seq, self.chunk
+
+    def reset(self):
+        """Forget the last preview (the publisher went away)."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.chunk = None
+        self._next_at = 0.0
+
+
+class MjpegPreviews:
+    """One MjpegPreview per camera that currently has preview viewers."""
+
+    def __init__(self, max_height: int = 320, fps: float = 5.0, quality: int = 60):
+        self.max_height = max_height
+        self.fps = fps
+        self.quality = quality
+        self._previews: Dict[str, MjpegPreview] = {}
+
+    def add_viewer(self, stream_id: str) -> MjpegPreview:
+        preview = self._previews.get(stream_id)
+        if preview is None:
+            preview = MjpegPreview(self.max_height, self.fps, self.quality)
+            self._previews[stream_id] = preview
+        preview.viewers += 1
+        return preview
+
+    def remove_viewer(self, stream_id: str):
+        preview = self._previews.get(stream_id)
+        if preview is None:
+            return
+        preview.viewers -= 1
+        if preview.viewers <= 0:
+            preview.reset()
+            del self._previews[stream_id]
+
+    def offer(self, stream_id: str, frame_bytes: bytes, now: float):
+        preview = self._previews.get(stream_id)
+        if preview is not None:
+            preview.offer(frame_bytes, now)
+
+    def forget(self, stream_id: str):
+        preview = self._previews.get(stream_id)
+        if preview is not None:
+            preview.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        previews = list(self._previews.values())
+        return {
+            "maxHeight": self.max_height,
+            "fps": self.fps,
+            "streams": len(previews),
+            "viewers": sum(preview.viewers for preview in previews),
+            "rendered": sum(preview.rendered for preview in previews),
+            "skipped": sum(preview.skipped for preview in previews),
+        }
+
+
+class MjpegViewer:
+    __slots__ = ("id", "stream_id", "tier", "max_fps", "connected_at", "frames_sent", "frames_dropped", "bytes_sent")
+
+    def __init__(self, viewer_id: int, stream_id: str, tier: str, max_fps: float):
+        self.id = viewer_id
+        self.stream_id = stream_id
+        self.tier = tier
+        self.max_fps = max_fps
+        self.connected_at = time.time()
+        self.frames_sent = 0
+        self.frames_dropped = 0  # Frames skipped because the viewer was slow or rate capped
+        self.bytes_sent = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "streamId": self.stream_id,
+            "tier": self.tier,
+            "maxFps": self.max_fps,
+            "connectedSeconds": time.time() - self.connected_at,
+            "framesSent": self.frames_sent,
+            "framesDropped": self.frames_dropped,
+            "bytesSent": self.bytes_sent,
+        }
+
+
+class MjpegViewerRegistry:
+    """Per-connection counters for MJPEG viewers, plus totals for closed connections."""
+
+    def __init__(self):
+        self._viewers: Dict[int, MjpegViewer] = {}
+        self._ids = itertools.count(1)
+        self.closed = 0
+        self.closed_frames_sent = 0
+        self.closed_frames_dropped = 0
+        self.closed_bytes_sent = 0
+
+    def open(self, stream_id: str, tier: str, max_fps: float) -> MjpegViewer:
+        viewer = MjpegViewer(next(self._ids), stream_id, tier, max_fps)
+        self._viewers[viewer.id] = viewer
+        return viewer
+
+    def close(self, viewer: MjpegViewer):
+        if self._viewers.pop(viewer.id, None) is not None:
+            self.closed += 1
+            self.closed_frames_sent += viewer.frames_sent
+            self.closed_frames_dropped += viewer.frames_dropped
+            self.closed_bytes_sent += viewer.bytes_sent
+
+    def stats(self) -> Dict[str, Any]:
+        viewers = list(self._viewers.values())
+        return {
+            "viewers": len(viewers),
+            "closedViewers": self.closed,
+            "framesSent": self.closed_frames_sent + sum(viewer.frames_sent for viewer in viewers),
+            "framesDropped": self.closed_frames_dropped + sum(viewer.frames_dropped for viewer in viewers),
+            "bytesSent": self.closed_bytes_sent + sum(viewer.bytes_sent for viewer in viewers),
+            "connections": [viewer.stats() for viewer in viewers],
+        }
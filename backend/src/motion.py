@@ -0,0 +1,151 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+THUMBNAIL_SIZE = (64, 48)
+
+
+def make_thumbnail(frame_bytes: bytes) -> Optional[np.ndarray]:
+    """Decode a JPEG at 1/8 scale in grayscale and shrink it to a tiny comparison thumbnail."""
+    gray = cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+    return cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def thumbnail_difference(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute pixel difference (0-255) between two thumbnails."""
+    return float(cv2.absdiff(a, b).mean())
+
+
+class _MotionState:
+    __slots__ = ("reference", "previous", "last_sample", "last_trigger", "motion_onset", "motion")
+
+    def __init__(self):
+        self.reference: Optional[np.ndarray] = None  # Thumbnail of the last analyzed frame
+        self.previous: Optional[np.ndarray] = None  # Thumbnail of the last sampled frame
+        self.last_sample = float("-inf")
+        self.last_trigger = float("-inf")
+        self.motion_onset: Optional[float] = None
+        self.motion = 0.0
+
+
+class SceneChangeGate:
+    """Cheap frame-difference stage in front of YOLO/Bedrock.
+
+    Frames are sampled every ``sample_interval`` seconds per stream. When the analysis
+    interval comes due, the frame is skipped if the scene barely changed since the last
+    analyzed frame. A motion spike between samples fires an analysis early.
+    """
+
+    def __init__(
+        self,
+        sample_interval: float = 0.25,
+        static_threshold: float = 2.0,
+        motion_threshold: float = 10.0,
+        min_trigger_interval: float = 1.0,
+    ):
+        self.sample_interval = sample_interval
+        self.static_threshold = static_threshold
+        self.motion_threshold = motion_threshold
+        self.min_trigger_interval = min_trigger_interval
+        self._states: Dict[str, _MotionState] = {}
+        self.samples = 0
+        self.due_checks = 0
+        self.skipped_static = 0
+        self.analyzed_on_interval = 0
+        self.triggered_by_motion = 0
+        self.decode_failures = 0
+        self._trigger_latencies: List[float] = []
+        self._trigger_latency_total = 0.0
+        self._trigger_latency_count = 0
+
+    def forget(self, stream_id: str):
+        self._states.pop(stream_id, None)
+
+    def motion_level(self, stream_id: str) -> float:
+        """Most recent frame-to-frame difference seen on a stream."""
+        state = self._states.get(stream_id)
+        return state.motion if state else 0.0
+
+    async def should_analyze(self, stream_id: str, frame_bytes: bytes, now: float, due: bool) -> bool:
+        """Decide whether this frame goes on to analysis.
+
+        ``due`` says whether the regular analysis interval has elapsed for the stream.
+        """
+        state = self._states.get(stream_id)
+        if state is None:
+            state = self._states[stream_id] = _MotionState()
+
+        if due:
+            self.due_checks += 1
+        elif now - state.last_sample < self.sample_interval:
+            return False
+
+        thumbnail = await asyncio.to_thread(make_thumbnail, frame_bytes)
+        if thumbnail is None:
+            self.decode_failures += 1
+            return due
+        self.samples += 1
+        state.last_sample = now
+
+        if state.previous is not None:
+            state.motion = thumbnail_difference(thumbnail, state.previous)
+        state.previous = thumbnail
+        if state.motion >= self.motion_threshold and state.motion_onset is None:
+            state.motion_onset = now
+
+        if state.reference is None:
+            analyze = True
+        elif due:
+            analyze = thumbnail_difference(thumbnail, state.reference) >= self.static_threshold
+            if analyze:
+                self.analyzed_on_interval += 1
+            else:
+                self.skipped_static += 1
+        elif (
+            state.motion >= self.motion_threshold
+            and now - state.last_trigger >= self.min_trigger_interval
+        ):
+            analyze = True
+            self.triggered_by_motion += 1
+        else:
+            analyze = False
+
+        if analyze:
+            state.reference = thumbnail
+            state.last_trigger = now
+            if state.motion_onset is not None:
+                self._record_trigger_latency(now - state.motion_onset)
+                state.motion_onset = None
+        return analyze
+
+    def _record_trigger_latency(self, latency: float):
+        self._trigger_latency_total += latency
+        self._trigger_latency_count += 1
+        self._trigger_latencies.append(latency)
+        if len(self._trigger_latencies) > 256:
+            del self._trigger_latencies[:128]
+
+    def stats(self) -> Dict[str, Any]:
+        recent = sorted(self._trigger_latencies)
+        return {
+            "enabled": True,
+            "sampleInterval": self.sample_interval,
+            "staticThreshold": self.static_threshold,
+            "motionThreshold": self.motion_threshold,
+            "samples": self.samples,
+            "dueChecks": self.due_checks,
+            "skippedStatic": self.skipped_static,
+            "analyzedOnInterval": self.analyzed_on_interval,
+            "triggeredByMotion": self.triggered_by_motion,
+            "decodeFailures": self.decode_failures,
+            "skipRate": self.skipped_static / self.due_checks if self.due_checks else 0.0,
+            "avgTriggerLatencySeconds": (
+                self._trigger_latency_total / self._trigger_latency_count
+                if self._trigger_latency_count else 0.0
+            ),
+            "p95TriggerLatencySeconds": recent[int(len(recent) * 0.95)] if recent else 0.0,
+        }
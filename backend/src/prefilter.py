@@ -0,0 +1,115 @@
+import time
+from typing import Any, Dict, Optional
+
+from .yolo_batch import YoloBatchWorker
+
+
+class PrefilterGate:
+    """Local YOLO stage that decides whether a webcam frame is worth a Bedrock call.
+
+    A frame is escalated when its danger score or person count crosses the configured
+    thresholds. Quiet streams are still escalated once every ``max_skip_seconds`` so
+    Bedrock can catch events YOLO has no class for.
+    """
+
+    def __init__(
+        self,
+        worker: YoloBatchWorker,
+        escalate_score: float = 5.0,
+        min_persons: int = 2,
+        max_skip_seconds: float = 60.0,
+    ):
+        self.worker = worker
+        self.escalate_score = escalate_score
+        self.min_persons = min_persons
+        self.max_skip_seconds = max_skip_seconds
+        # Stream id -> token of its in-flight call; forget() drops it so a late score is ignored
+        self._busy: Dict[str, object] = {}
+        self._last_escalation: Dict[str, float] = {}
+        self._stream_stats: Dict[str, Dict[str, int]] = {}
+        self.scored = 0
+        self.escalated = 0
+        self.forced = 0
+        self.suppressed = 0
+        self.skipped_busy = 0
+        self.errors = 0
+        self._score_time_total = 0.0
+
+    def forget(self, stream_id: str):
+        """Drop a stream's temporal history, quiet-period timer and stats."""
+        self.worker.forget(stream_id)
+        self._busy.pop(stream_id, None)
+        self._last_escalation.pop(stream_id, None)
+        self._stream_stats.pop(stream_id, None)
+
+    async def should_escalate(self, stream_id: str, frame_bytes: bytes) -> Optional[bool]:
+        """Score a frame locally and return True if it should go to Bedrock.
+
+        Returns None when the frame was not scored (the stream was still busy, a newer
+        frame superseded it or the stream was forgotten meanwhile), so callers can tell a
+        skip from a quiet score.
+        """
+        if stream_id in self._busy:
+            self.skipped_busy += 1
+            return None
+
+        token = self._busy[stream_id] = object()
+        try:
+            started = time.monotonic()
+            try:
+                result = await self.worker.score(stream_id, frame_bytes)
+            except Exception as exc:
+                # Fail open: without a local score let Bedrock decide
+                self.errors += 1
+                print(f"YOLO pre-filter error for {stream_id}: {exc}")
+                return True
+            if result is None or self._busy.get(stream_id) is not token:
+                return None
+
+            now = time.monotonic()
+            self._score_time_total += now - started
+            self.scored += 1
+            stats = self._stream_stats.setdefault(
+                stream_id, {"scored": 0, "escalated": 0, "forced": 0}
+            )
+            stats["scored"] += 1
+
+            score, person_count, _objects = result
+            last_escalation = self._last_escalation.setdefault(stream_id, now)
+            if score >= self.escalate_score or person_count >= self.min_persons:
+                escalate = True
+            elif self.max_skip_seconds > 0 and now - last_escalation >= self.max_skip_seconds:
+                escalate = True
+                self.forced += 1
+                stats["forced"] += 1
+            else:
+                escalate = False
+
+            if escalate:
+                self.escalated += 1
+                stats["escalated"] += 1
+                self._last_escalation[stream_id] = now
+            else:
+                self.suppressed += 1
+            return escalate
+        finally:
+            if self._busy.get(stream_id) is token:
+                del self._busy[stream_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "escalateScore": self.escalate_score,
+            "minPersons": self.min_persons,
+            "maxSkipSeconds": self.max_skip_seconds,
+            "scored": self.scored,
+            "escalated": self.escalated,
+            "forced": self.forced,
+            "suppressed": self.suppressed,
+            "skippedBusy": self.skipped_busy,
+            "errors": self.errors,
+            "escalationRatio": self.escalated / self.scored if self.scored else 0.0,
+            "avgScoreSeconds": self._score_time_total / self.scored if self.scored else 0.0,
+            "batching": self.worker.stats(),
+            "streams": {stream_id: dict(stats) for stream_id, stats in sorted(self._stream_stats.items())},
+        }
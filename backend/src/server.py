@@ -1,213 +1,295 @@
 import os
 import json
+import time
 import uuid
+import hashlib
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional, Set
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import httpx
 from dotenv import load_dotenv
 import asyncio
-from collections import deque
-import shutil
-from asyncio.subprocess import PIPE
-import signal
 import cv2
 import numpy as np
-from starlette.websockets import WebSocketState
 from .db_queries import (
     get_stream_by_id,
     create_stream,
+    add_stream_listener,
+    delete_stream_by_url,
+    emit_stream_batch,
     get_all_streams,
-    stream_exists_by_url,
-    reset_stream_store,
+    get_streams_version,
+    get_or_create_stream,
+    open_stream_store,
+    stream_changes,
+    close_stream_store,
+)
+from .adaptive_interval import AdaptiveIntervalScheduler
+from .alert_hub import AlertHub
+from .alert_journal import AlertJournal
+from .stream_events import StreamChangeFeed
+from .videos_watcher import VideosFolderWatcher
+from .incidents import Incident, IncidentTracker
+from .mjpeg import RESOLUTION_TIERS, MjpegPreviews, MjpegRenditions, MjpegViewerRegistry
+from .hls_recorder import (
+    HLSRecorder,
+    HLSVariant,
+    hls_playlist_name,
+    hls_preview_playlist_name,
+    parse_hls_ladder,
+)
+from .inference_scheduler import InferenceScheduler
+from .motion import SceneChangeGate
+from .prefilter import PrefilterGate
+from .verdict_cache import VerdictCache, perceptual_hash
+from .yolo_batch import YoloBatchWorker
+from .webcam_ingest import (
+    DEFAULT_WEBCAM_STREAM_ID,
+    WebcamIngestRegistry,
+    WebcamStream,
+    is_webcam_stream_id,
 )
 from yolo.bedrock_detector import HaikuIncidentDetector
 
 load_dotenv()
 
-# In-memory storage for webcam stream
-webcam_stream_buffer: deque = deque(maxlen=10)  # Store last 10 frames
-webcam_stream_active = False
-webcam_stream_lock = asyncio.Lock()
-alert_subscribers: Set[WebSocket] = set()
-bedrock_call_lock = asyncio.Lock()
-WEBCAM_ANALYSIS_INTERVAL = 3.0
+
+def env_flag(name: str, default: bool) -> bool:
+    """Boolean environment setting: "1", "true" or "yes" (any case) turn it on."""
+    return os.getenv(name, "true" if default else "false").lower() in ("1", "true", "yes")
+
+
+# Media and stream responses are fetched cross-origin by the dashboard
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+NO_CACHE_CORS_HEADERS = {
+    **CORS_HEADERS,
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "100"))
+ALERT_SLOW_CONSUMER_POLICY = os.getenv("ALERT_SLOW_CONSUMER_POLICY", "coalesce")
+ALERT_SEND_TIMEOUT = float(os.getenv("ALERT_SEND_TIMEOUT", "5.0"))
+ALERT_HISTORY_SIZE = int(os.getenv("ALERT_HISTORY_SIZE", "500"))
+ALERT_REPLAY_LIMIT = int(os.getenv("ALERT_REPLAY_LIMIT", "50"))
+ALERT_REPLAY_SECONDS = float(os.getenv("ALERT_REPLAY_SECONDS", "600"))
+alert_hub = AlertHub(
+    max_queue=ALERT_QUEUE_SIZE,
+    policy=ALERT_SLOW_CONSUMER_POLICY,
+    send_timeout=ALERT_SEND_TIMEOUT,
+    journal=AlertJournal(ALERT_HISTORY_SIZE) if ALERT_HISTORY_SIZE > 0 else None,
+)
+INCIDENT_COALESCING_ENABLED = env_flag("INCIDENT_COALESCING_ENABLED", True)
+INCIDENT_WINDOW_SECONDS = float(os.getenv("INCIDENT_WINDOW_SECONDS", "120"))
+INCIDENT_UPDATE_INTERVAL = float(os.getenv("INCIDENT_UPDATE_INTERVAL", "10"))
+INCIDENT_EXPIRY_CHECK_SECONDS = float(os.getenv("INCIDENT_EXPIRY_CHECK_SECONDS", "10"))
+incident_tracker = (
+    IncidentTracker(window_seconds=INCIDENT_WINDOW_SECONDS, update_interval=INCIDENT_UPDATE_INTERVAL)
+    if INCIDENT_COALESCING_ENABLED else None
+)
+WEBCAM_ANALYSIS_INTERVAL = float(os.getenv("WEBCAM_ANALYSIS_INTERVAL", "3.0"))
+BEDROCK_MAX_CONCURRENCY = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "4"))
+BEDROCK_MAX_RPS = float(os.getenv("BEDROCK_MAX_RPS", "2.0"))
+ANALYSIS_MIN_INTERVAL = float(os.getenv("ANALYSIS_MIN_INTERVAL", "1.0"))
+ANALYSIS_MAX_INTERVAL = float(os.getenv("ANALYSIS_MAX_INTERVAL", "24.0"))
+ANALYSIS_BACKOFF_FACTOR = float(os.getenv("ANALYSIS_BACKOFF_FACTOR", "2.0"))
+ANALYSIS_NORMAL_STREAK = int(os.getenv("ANALYSIS_NORMAL_STREAK", "3"))
+ANALYSIS_CALL_BUDGET = float(os.getenv("ANALYSIS_CALL_BUDGET", str(BEDROCK_MAX_RPS)))
+YOLO_PREFILTER_ENABLED = env_flag("YOLO_PREFILTER_ENABLED", True)
+YOLO_MODEL_PATH = os.getenv("YOLO_MODEL_PATH", str(Path(__file__).parent.parent / "yolo" / "yolov8n.pt"))
+YOLO_ESCALATE_SCORE = float(os.getenv("YOLO_ESCALATE_SCORE", "5.0"))
+YOLO_ESCALATE_MIN_PERSONS = int(os.getenv("YOLO_ESCALATE_MIN_PERSONS", "2"))
+YOLO_MAX_SKIP_SECONDS = float(os.getenv("YOLO_MAX_SKIP_SECONDS", "60"))
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "16"))
+YOLO_BATCH_WAIT_MS = float(os.getenv("YOLO_BATCH_WAIT_MS", "20"))
+MOTION_GATE_ENABLED = env_flag("MOTION_GATE_ENABLED", True)
+MOTION_SAMPLE_INTERVAL = float(os.getenv("MOTION_SAMPLE_INTERVAL", "0.25"))
+MOTION_STATIC_THRESHOLD = float(os.getenv("MOTION_STATIC_THRESHOLD", "2.0"))
+MOTION_TRIGGER_THRESHOLD = float(os.getenv("MOTION_TRIGGER_THRESHOLD", "10.0"))
+MOTION_MIN_TRIGGER_INTERVAL = float(os.getenv("MOTION_MIN_TRIGGER_INTERVAL", "1.0"))
+VERDICT_CACHE_ENABLED = env_flag("VERDICT_CACHE_ENABLED", True)
+VERDICT_CACHE_TTL_SECONDS = float(os.getenv("VERDICT_CACHE_TTL_SECONDS", "30"))
+VERDICT_CACHE_MAX_DISTANCE = int(os.getenv("VERDICT_CACHE_MAX_DISTANCE", "4"))
+VERDICT_CACHE_ENTRIES_PER_STREAM = int(os.getenv("VERDICT_CACHE_ENTRIES_PER_STREAM", "32"))
 detector = HaikuIncidentDetector()
 
+
+def load_prefilter_gate() -> Optional[PrefilterGate]:
+    """Load the local YOLO pre-filter, or return None to send every frame to Bedrock."""
+    if not YOLO_PREFILTER_ENABLED:
+        return None
+    try:
+        from yolo.incident_detector import IncidentDetector
+    except ImportError as exc:
+        print(f"YOLO pre-filter disabled, ultralytics unavailable: {exc}")
+        return None
+    worker = YoloBatchWorker(
+        IncidentDetector(model_path=YOLO_MODEL_PATH),
+        max_batch_size=YOLO_BATCH_SIZE,
+        max_wait_seconds=YOLO_BATCH_WAIT_MS / 1000,
+    )
+    return PrefilterGate(
+        worker,
+        escalate_score=YOLO_ESCALATE_SCORE,
+        min_persons=YOLO_ESCALATE_MIN_PERSONS,
+        max_skip_seconds=YOLO_MAX_SKIP_SECONDS,
+    )
+
+
+prefilter_gate = load_prefilter_gate()
+scene_change_gate = (
+    SceneChangeGate(
+        sample_interval=MOTION_SAMPLE_INTERVAL,
+        static_threshold=MOTION_STATIC_THRESHOLD,
+        motion_threshold=MOTION_TRIGGER_THRESHOLD,
+        min_trigger_interval=MOTION_MIN_TRIGGER_INTERVAL,
+    )
+    if MOTION_GATE_ENABLED
+    else None
+)
+analysis_intervals = AdaptiveIntervalScheduler(
+    base_interval=WEBCAM_ANALYSIS_INTERVAL,
+    min_interval=ANALYSIS_MIN_INTERVAL,
+    max_interval=ANALYSIS_MAX_INTERVAL,
+    backoff_factor=ANALYSIS_BACKOFF_FACTOR,
+    normal_streak=ANALYSIS_NORMAL_STREAK,
+    call_budget=ANALYSIS_CALL_BUDGET,
+)
+verdict_cache = (
+    VerdictCache(
+        ttl_seconds=VERDICT_CACHE_TTL_SECONDS,
+        max_distance=VERDICT_CACHE_MAX_DISTANCE,
+        max_entries_per_stream=VERDICT_CACHE_ENTRIES_PER_STREAM,
+    )
+    if VERDICT_CACHE_ENABLED
+    else None
+)
+
 FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
 WEBCAM_HLS_SEGMENT_SECONDS = float(os.getenv("WEBCAM_HLS_SEGMENT_SECONDS", "2.0"))
 WEBCAM_HLS_MAX_SEGMENTS = int(os.getenv("WEBCAM_HLS_MAX_SEGMENTS", "0"))
 WEBCAM_HLS_TARGET_FPS = float(os.getenv("WEBCAM_HLS_TARGET_FPS", "25"))
+# Low-resolution variant for dashboard grids, e.g. 320 (0 disables it). Opt-in because it
+# adds a second scale + x264 encode to every webcam's ffmpeg process.
+WEBCAM_HLS_PREVIEW_HEIGHT = int(os.getenv("WEBCAM_HLS_PREVIEW_HEIGHT", "0"))
+WEBCAM_HLS_PREVIEW_FPS = float(os.getenv("WEBCAM_HLS_PREVIEW_FPS", "5"))
+# Adaptive-bitrate ladder, e.g. "1080p:5000k,720p:2800k,360p:800k" (replaces the preview
+# variant; the smallest rung serves grids). Changed at runtime through /api/hls/ladder.
+WEBCAM_HLS_LADDER = os.getenv("WEBCAM_HLS_LADDER", "")
+hls_ladder = parse_hls_ladder(WEBCAM_HLS_LADDER)
+# LL-HLS: fMP4 parts of WEBCAM_HLS_PART_SECONDS with blocking playlist reload on
+# index.m3u8 (single rendition, so it takes precedence over the ladder and preview)
+WEBCAM_HLS_LOW_LATENCY = env_flag("WEBCAM_HLS_LOW_LATENCY", False)
+WEBCAM_HLS_PART_SECONDS = float(os.getenv("WEBCAM_HLS_PART_SECONDS", "0.4"))
 VIDEOS_DIR = Path(__file__).parent.parent / "videos"
-WEBCAM_HLS_DIR = VIDEOS_DIR / "webcam-hls"
-WEBCAM_PLAYLIST_PATH = "/videos/webcam-hls/index.m3u8"
-
-
-class HLSRecorder:
-    def __init__(
-        self,
-        ffmpeg_path: str,
-        output_dir: Path,
-        segment_seconds: float = 2.0,
-        max_segments: int = 0,
-        target_fps: float = 25.0,
-    ):
-        self.ffmpeg_path = ffmpeg_path
-        self.output_dir = output_dir
-        self.segment_seconds = segment_seconds
-        self.max_segments = max_segments
-        self.target_fps = target_fps
-        self.process: Optional[asyncio.subprocess.Process] = None
-        self.lock = asyncio.Lock()
-
-    async def setup(self):
-        await asyncio.to_thread(self._prepare_output_dir)
-
-    def _prepare_output_dir(self):
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        for path in self.output_dir.glob("*"):
-            if path.is_file():
-                path.unlink(missing_ok=True)
-            elif path.is_dir():
-                shutil.rmtree(path, ignore_errors=True)
-
-    async def stop(self):
-        async with self.lock:
-            await self._terminate_process()
-
-    async def write(self, frame_bytes: bytes):
-        if not frame_bytes:
-            return
-        await self._ensure_process()
-        proc = self.process
-        if not proc or proc.stdin is None:
-            return
-        try:
-            proc.stdin.write(frame_bytes)
-            await proc.stdin.drain()
-        except Exception as exc:
-            print(f"FFmpeg write error, restarting recorder: {exc}")
-            await self._restart_process()
 
-    async def _ensure_process(self):
-        async with self.lock:
-            if self.process and self.process.returncode is None:
-                return
-            await self._launch_process()
-
-    async def _restart_process(self):
-        async with self.lock:
-            await self._terminate_process()
-            await self._launch_process()
-
-    async def _launch_process(self):
-        await asyncio.to_thread(self.output_dir.mkdir, parents=True, exist_ok=True)
-        segment_filename = str(self.output_dir / "segment_%05d.ts")
-        playlist_path = str(self.output_dir / "index.m3u8")
-
-        cmd = [
-            self.ffmpeg_path,
-            "-loglevel",
-            os.getenv("FFMPEG_LOGLEVEL", "warning"),
-            "-hide_banner",
-            "-y",
-            "-f",
-            "mjpeg",
-            "-i",
-            "pipe:0",
-            "-vf",
-            f"fps={self.target_fps}",
-            "-c:v",
-            os.getenv("FFMPEG_HLS_CODEC", "libx264"),
-            "-preset",
-            os.getenv("FFMPEG_HLS_PRESET", "veryfast"),
-            "-tune",
-            "zerolatency",
-            "-pix_fmt",
-            "yuv420p",
-            "-f",
-            "hls",
-            "-hls_time",
-            str(self.segment_seconds),
-            "-hls_list_size",
-            str(self.max_segments),
-            "-hls_flags",
-            os.getenv(
-                "FFMPEG_HLS_FLAGS",
-                "independent_segments+append_list+program_date_time",
-            ),
-            "-hls_segment_filename",
-            segment_filename,
-            playlist_path,
-        ]
+# MJPEG viewers: frames a viewer cannot keep up with are skipped (latest frame wins),
+# `fps` and `resolution` query params cap a viewer below the publisher
+MJPEG_MAX_FPS = float(os.getenv("MJPEG_MAX_FPS", "30"))
+MJPEG_DEFAULT_RESOLUTION = os.getenv("MJPEG_DEFAULT_RESOLUTION", "full")
+MJPEG_TRANSCODE_QUALITY = int(os.getenv("MJPEG_TRANSCODE_QUALITY", "70"))
+# `quality=preview` viewers share one small rendition per camera made on the ingest path
+MJPEG_PREVIEW_HEIGHT = int(os.getenv("MJPEG_PREVIEW_HEIGHT", "320"))
+MJPEG_PREVIEW_FPS = float(os.getenv("MJPEG_PREVIEW_FPS", "5"))
+MJPEG_PREVIEW_QUALITY = int(os.getenv("MJPEG_PREVIEW_QUALITY", "60"))
+
+
+def webcam_hls_layout(stream_id: str) -> Tuple[List[HLSVariant], int]:
+    """(variants, preview height) a webcam's playlists follow.
+
+    A live webcam keeps the layout it was started with even if the ladder changes since;
+    otherwise it is what create_webcam_recorder would configure.
+    """
+    webcam = webcam_registry.get(stream_id)
+    if webcam is not None:
+        return webcam.recorder.variants, webcam.recorder.preview_height
+    if WEBCAM_HLS_LOW_LATENCY:
+        return [], 0
+    return hls_ladder, WEBCAM_HLS_PREVIEW_HEIGHT
+
+
+def webcam_playlist_path(stream_id: str) -> str:
+    variants, _ = webcam_hls_layout(stream_id)
+    return f"/videos/{stream_id}-hls/{hls_playlist_name(variants)}"
+
+
+def webcam_preview_playlist_path(stream_id: str) -> Optional[str]:
+    name = hls_preview_playlist_name(*webcam_hls_layout(stream_id))
+    return f"/videos/{stream_id}-hls/{name}" if name else None
+
+
+def webcam_variant_payloads(stream_id: str) -> List[Dict[str, Any]]:
+    variants, _ = webcam_hls_layout(stream_id)
+    return [
+        {**variant.to_dict(), "playlist": f"/videos/{stream_id}-hls/{variant.name}/index.m3u8"}
+        for variant in variants
+    ]
+
+
+def create_webcam_recorder(stream_id: str) -> HLSRecorder:
+    return HLSRecorder(
+        ffmpeg_path=FFMPEG_PATH,
+        output_dir=VIDEOS_DIR / f"{stream_id}-hls",
+        segment_seconds=WEBCAM_HLS_SEGMENT_SECONDS,
+        max_segments=WEBCAM_HLS_MAX_SEGMENTS,
+        target_fps=WEBCAM_HLS_TARGET_FPS,
+        preview_height=WEBCAM_HLS_PREVIEW_HEIGHT,
+        preview_fps=WEBCAM_HLS_PREVIEW_FPS,
+        variants=hls_ladder,
+        low_latency=WEBCAM_HLS_LOW_LATENCY,
+        part_seconds=WEBCAM_HLS_PART_SECONDS,
+    )
 
-        try:
-            self.process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdin=PIPE,
-                stdout=PIPE,
-                stderr=PIPE,
-            )
-            asyncio.create_task(self._log_errors(self.process.stderr))
-        except FileNotFoundError:
-            print("FFmpeg binary not found. Ensure ffmpeg is installed or set FFMPEG_PATH.")
-            self.process = None
 
-    async def _log_errors(self, stderr: Optional[asyncio.StreamReader]):
-        if stderr is None:
-            return
-        try:
-            while True:
-                line = await stderr.readline()
-                if not line:
-                    break
-                print(f"[ffmpeg] {line.decode(errors='ignore').strip()}")
-        except Exception:
-            pass
-
-    async def _terminate_process(self):
-        if not self.process:
-            return
-        proc = self.process
-        self.process = None
-        if proc.stdin:
-            try:
-                proc.stdin.write_eof()
-            except (AttributeError, RuntimeError, ValueError):
-                try:
-                    proc.stdin.close()
-                except Exception:
-                    pass
-            except Exception:
-                pass
-        try:
-            await asyncio.wait_for(proc.wait(), timeout=3)
-        except asyncio.TimeoutError:
-            if proc.returncode is None:
-                if hasattr(proc, "send_signal"):
-                    proc.send_signal(signal.SIGTERM)
-                try:
-                    await asyncio.wait_for(proc.wait(), timeout=3)
-                except asyncio.TimeoutError:
-                    if hasattr(proc, "kill"):
-                        proc.kill()
-                    await proc.wait()
-        except Exception:
-            pass
-
-
-hls_recorder = HLSRecorder(
-    ffmpeg_path=FFMPEG_PATH,
-    output_dir=WEBCAM_HLS_DIR,
-    segment_seconds=WEBCAM_HLS_SEGMENT_SECONDS,
-    max_segments=WEBCAM_HLS_MAX_SEGMENTS,
-    target_fps=WEBCAM_HLS_TARGET_FPS,
+STREAM_FEED_HISTORY = int(os.getenv("STREAM_FEED_HISTORY", "1000"))
+STREAM_FEED_QUEUE_SIZE = int(os.getenv("STREAM_FEED_QUEUE_SIZE", "256"))
+# Events must not be merged, so a client that falls behind loses the oldest ones and
+# resumes from the feed history after noticing the gap in `seq`
+stream_feed = StreamChangeFeed(
+    AlertHub(max_queue=STREAM_FEED_QUEUE_SIZE, policy="drop_oldest", send_timeout=ALERT_SEND_TIMEOUT),
+    history=STREAM_FEED_HISTORY,
+)
+
+
+def on_store_change(event: str, stream: Optional[Dict[str, str]]):
+    if stream is None:
+        stream_feed.publish(event, None)
+        return
+    stream_feed.publish(
+        event,
+        stream["id"],
+        build_stream_payload(stream_id=stream["id"], url=stream["url"], playlist=stream.get("playlist")),
+    )
+
+
+def on_webcam_change(event: str, stream: WebcamStream):
+    stream_changes.notify()
+    payload = build_stream_payload(stream_id=stream.stream_id, url="webcam") if event == "webcam_active" else None
+    stream_feed.publish(event, stream.stream_id, payload)
+
+
+add_stream_listener(on_store_change)
+webcam_registry = WebcamIngestRegistry(
+    recorder_factory=create_webcam_recorder,
+    on_change=on_webcam_change,
+)
+mjpeg_renditions = MjpegRenditions(quality=MJPEG_TRANSCODE_QUALITY)
+mjpeg_viewers = MjpegViewerRegistry()
+mjpeg_previews = MjpegPreviews(
+    max_height=MJPEG_PREVIEW_HEIGHT,
+    fps=MJPEG_PREVIEW_FPS,
+    quality=MJPEG_PREVIEW_QUALITY,
 )
 
 
@@ -220,6 +302,20 @@ def decode_frame_from_bytes(frame_bytes: bytes):
     return frame
 
 
+def analyze_frame_bytes(frame_bytes: bytes):
+    """Run a webcam JPEG through the Bedrock detector (blocking)."""
+    if not frame_bytes:
+        return None
+    return detector.analyze_jpeg(frame_bytes)
+
+
+inference_scheduler = InferenceScheduler(
+    analyze=analyze_frame_bytes,
+    max_concurrency=BEDROCK_MAX_CONCURRENCY,
+    requests_per_second=BEDROCK_MAX_RPS,
+)
+
+
 def map_alert_level(danger_level: str) -> Optional[str]:
     """Map detector danger levels to frontend priority alert levels."""
     level_map = {
@@ -230,66 +326,125 @@ def map_alert_level(danger_level: str) -> Optional[str]:
     return level_map.get(danger_level.upper(), None)
 
 
-async def broadcast_alert(alert: dict, include_websocket: Optional[WebSocket] = None):
-    """Send alert payload to all subscribed websocket clients."""
-    message = json.dumps(alert)
-    targets = set(alert_subscribers)
-    if include_websocket is not None:
-        targets.add(include_websocket)
+VIDEOS_WATCH_DEBOUNCE_MS = int(os.getenv("VIDEOS_WATCH_DEBOUNCE_MS", "500"))
+VIDEOS_WATCH_POLL_INTERVAL = float(os.getenv("VIDEOS_WATCH_POLL_INTERVAL", "2.0"))
+VIDEOS_WATCH_FORCE_POLLING = env_flag("VIDEOS_WATCH_FORCE_POLLING", False)
+# New files register once their size and mtime held still this long (uploads in progress wait)
+VIDEOS_WATCH_SETTLE_SECONDS = float(os.getenv("VIDEOS_WATCH_SETTLE_SECONDS", "2.0"))
+# Files (un)registered between event loop yields, and the most "added"/"removed" feed
+# events one batch of files may emit before it is reported as a single "reset"
+VIDEOS_REGISTER_BATCH = int(os.getenv("VIDEOS_REGISTER_BATCH", "200"))
+VIDEOS_REGISTER_MAX_EVENTS = int(os.getenv("VIDEOS_REGISTER_MAX_EVENTS", "50"))
 
-    disconnected = []
-    for ws in targets:
-        try:
-            if ws.application_state == WebSocketState.CONNECTED:
-                await ws.send_text(message)
-        except Exception as exc:
-            print(f"Error sending alert to websocket {ws.client}: {exc}")
-            disconnected.append(ws)
 
-    for ws in disconnected:
-        alert_subscribers.discard(ws)
+def video_file_url(name: str) -> str:
+    return f"/videos/{name}"
+
+
+async def register_video_files(names):
+    """Create streams for video files that appeared in the videos folder"""
+    created_streams = []
+    for index, name in enumerate(names):
+        if index and index % VIDEOS_REGISTER_BATCH == 0:
+            await asyncio.sleep(0)  # The memory store never yields; let the loop breathe
+        try:
+            stream, created = await get_or_create_stream(video_file_url(name), emit=False)
+            if created:
+                created_streams.append(stream)
+        except Exception as e:
+            print(f"Error processing {name}: {e}")
+            import traceback
+            traceback.print_exc()
+
+    if created_streams:
+        # A folder of thousands of new files becomes one feed "reset", not thousands of events
+        emit_stream_batch("added", created_streams, max_events=VIDEOS_REGISTER_MAX_EVENTS)
+        print(f"Created {len(created_streams)} new stream(s) from videos folder")
+
+
+async def unregister_video_files(names):
+    """Remove the streams of video files deleted from the videos folder"""
+    removed_streams = []
+    for index, name in enumerate(names):
+        if index and index % VIDEOS_REGISTER_BATCH == 0:
+            await asyncio.sleep(0)
+        try:
+            stream = await delete_stream_by_url(video_file_url(name), emit=False)
+            if stream is not None:
+                removed_streams.append(stream)
+        except Exception as e:
+            print(f"Error removing stream for {name}: {e}")
+
+    if removed_streams:
+        emit_stream_batch("removed", removed_streams, max_events=VIDEOS_REGISTER_MAX_EVENTS)
+        print(f"Removed {len(removed_streams)} stream(s) for deleted videos")
+
+
+videos_watcher = VideosFolderWatcher(
+    VIDEOS_DIR,
+    on_added=register_video_files,
+    on_removed=unregister_video_files,
+    debounce_ms=VIDEOS_WATCH_DEBOUNCE_MS,
+    poll_interval=VIDEOS_WATCH_POLL_INTERVAL,
+    force_polling=VIDEOS_WATCH_FORCE_POLLING,
+    settle_seconds=VIDEOS_WATCH_SETTLE_SECONDS,
+)
 
 
 async def scan_videos_folder():
-    """Scan the videos folder and automatically create streams for video files"""
-    if not VIDEOS_DIR.exists():
-        VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
-        return
-    
-    # Supported video extensions
-    video_extensions = {'.mp4', '.webm', '.ogg', '.mov', '.avi', '.mkv'}
-    
-    created_count = 0
-    for file_path in VIDEOS_DIR.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in video_extensions:
-            # Create URL path for the video file
-            video_url = f"/videos/{file_path.name}"
-            
-            # Check if stream already exists
-            try:
-                exists = await stream_exists_by_url(video_url)
-                if not exists:
-                    await create_stream(video_url)
-                    created_count += 1
-            except Exception as e:
-                print(f"Error processing {file_path.name}: {e}")
-                import traceback
-                traceback.print_exc()
-    
-    if created_count > 0:
-        print(f"Created {created_count} new stream(s) from videos folder")
+    """Scan the videos folder and sync streams with the video files it holds"""
+    await videos_watcher.rescan()
+
+
+async def start_videos_watcher():
+    """Register the folder's current files and follow later changes incrementally"""
+    registered = [
+        stream["url"][len("/videos/"):]
+        for stream in await get_all_streams()
+        if stream["url"].startswith("/videos/") and "/" not in stream["url"][len("/videos/"):]
+    ]
+    await videos_watcher.start(known=registered)
+
+
+def publish_expired_incidents(now: Optional[float] = None):
+    """Emit the closing update of every incident whose window ran out."""
+    for incident in incident_tracker.expire(now):
+        stream = webcam_registry.get(incident.stream_id)
+        if stream is not None:
+            alert_hub.publish(build_incident_alert(stream, incident, closed=True))
+
+
+async def expire_incidents_periodically():
+    while True:
+        await asyncio.sleep(max(1.0, INCIDENT_EXPIRY_CHECK_SECONDS))
+        try:
+            publish_expired_incidents()
+        except Exception as exc:
+            print(f"Error expiring incidents: {exc}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    await hls_recorder.setup()
-    await reset_stream_store()
-    await scan_videos_folder()
+    await open_stream_store()
+    await start_videos_watcher()
+    inference_scheduler.start()
+    if prefilter_gate is not None:
+        prefilter_gate.worker.start()
+    incident_expiry = (
+        asyncio.create_task(expire_incidents_periodically()) if incident_tracker is not None else None
+    )
     yield
     # Shutdown
-    await hls_recorder.stop()
-    await reset_stream_store()
+    if incident_expiry is not None:
+        incident_expiry.cancel()
+        await asyncio.gather(incident_expiry, return_exceptions=True)
+    await videos_watcher.stop()
+    if prefilter_gate is not None:
+        await prefilter_gate.worker.stop()
+    await inference_scheduler.stop()
+    await webcam_registry.stop_all()
+    await close_stream_store()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -303,6 +458,7 @@ if os.getenv("NODE_ENV") != "production":
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag"],
     )
 
 
@@ -310,14 +466,20 @@ class StreamCreateRequest(BaseModel):
     url: str
 
 
+class HlsLadderRequest(BaseModel):
+    ladder: str
+
+
 def build_stream_payload(stream_id: str, url: str, playlist: Optional[str] = None) -> Dict[str, Any]:
-    if stream_id == "webcam":
+    if is_webcam_stream_id(stream_id):
         return {
-            "id": "webcam",
+            "id": stream_id,
             "url": "webcam",
             "format": "hls",
             "live": True,
-            "playlist": WEBCAM_PLAYLIST_PATH,
+            "playlist": webcam_playlist_path(stream_id),
+            "previewPlaylist": webcam_preview_playlist_path(stream_id),
+            "variants": webcam_variant_payloads(stream_id),
         }
 
     return {
@@ -329,43 +491,102 @@ def build_stream_payload(stream_id: str, url: str, playlist: Optional[str] = Non
     }
 
 
-@app.get("/api/streams")
-async def list_streams_endpoint():
-    """Get all streams"""
-    try:
-        streams = await get_all_streams()
+STREAMS_LONG_POLL_MAX_SECONDS = float(os.getenv("STREAMS_LONG_POLL_MAX_SECONDS", "60"))
+
+# Serialized /api/streams body and its ETag, reused until the store or the live webcams change
+_streams_body_cache: Dict[str, Any] = {"key": None, "body": b"", "etag": ""}
+
+JsonBody = Tuple[bytes, str]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
 
-        include_webcam = False
-        async with webcam_stream_lock:
-            include_webcam = webcam_stream_active or len(webcam_stream_buffer) > 0
-
-        normalized_streams = []
-        webcam_present = False
-        for stream in streams:
-            stream_id = stream.get("id")
-            stream_url = stream.get("url")
-            if stream_id is None or stream_url is None:
-                continue
-            payload = build_stream_payload(
-                stream_id=stream_id,
-                url=stream_url,
-                playlist=stream.get("playlist"),
-            )
-            if stream_id == "webcam":
-                webcam_present = True
-            normalized_streams.append(payload)
-
-        if include_webcam and not webcam_present:
-            normalized_streams.insert(
-                0,
-                build_stream_payload(
-                    stream_id="webcam",
-                    url="webcam",
-                    playlist=WEBCAM_PLAYLIST_PATH,
-                ),
-            )
 
-        return {"streams": normalized_streams}
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 7232 weak comparison of an If-None-Match header against our ETag."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+async def conditional_json_response(
+    request: Request,
+    build_body: Callable[[], Awaitable[JsonBody]],
+    wait: float,
+) -> Response:
+    """Serve a JSON body with an ETag, answering 304 when the client's copy is current.
+
+    With ``wait`` > 0 and a matching If-None-Match, hold the request until the streams
+    change (long-poll) or the wait runs out. Changes made by other processes sharing a
+    SQL store are only noticed when the wait expires.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    # Read before each build: a change while the body is built must not be waited for
+    version = stream_changes.version
+    body, etag = await build_body()
+    deadline = time.monotonic() + min(max(wait, 0.0), STREAMS_LONG_POLL_MAX_SECONDS)
+    while etag_matches(if_none_match, etag):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not await stream_changes.wait(remaining, since=version):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        version = stream_changes.version
+        body, etag = await build_body()
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
+async def current_stream_payloads():
+    """Stream payloads as listed by /api/streams: visible webcams first, then the store."""
+    streams = await get_all_streams()
+
+    live_webcams = await webcam_registry.visible_streams()
+
+    normalized_streams = []
+    webcam_present = set()
+    for stream in streams:
+        stream_id = stream.get("id")
+        stream_url = stream.get("url")
+        if stream_id is None or stream_url is None:
+            continue
+        payload = build_stream_payload(
+            stream_id=stream_id,
+            url=stream_url,
+            playlist=stream.get("playlist"),
+        )
+        if is_webcam_stream_id(stream_id):
+            webcam_present.add(stream_id)
+        normalized_streams.append(payload)
+
+    webcam_payloads = [
+        build_stream_payload(stream_id=webcam.stream_id, url="webcam")
+        for webcam in live_webcams
+        if webcam.stream_id not in webcam_present
+    ]
+    normalized_streams[0:0] = webcam_payloads
+    return normalized_streams
+
+
+async def current_streams_body() -> JsonBody:
+    cache_key = (await get_streams_version(), webcam_registry.version)
+    if _streams_body_cache["key"] == cache_key:
+        return _streams_body_cache["body"], _streams_body_cache["etag"]
+
+    body = json.dumps({"streams": await current_stream_payloads()}).encode()
+    etag = make_etag(body)
+    _streams_body_cache.update(key=cache_key, body=body, etag=etag)
+    return body, etag
+
+
+@app.get("/api/streams")
+async def list_streams_endpoint(request: Request, wait: float = Query(0.0)):
+    """Get all streams (supports If-None-Match and ?wait=<seconds> long-polling)"""
+    try:
+        return await conditional_json_response(request, current_streams_body, wait)
     except Exception:
         raise HTTPException(status_code=500, detail="Error retrieving streams")
 
@@ -406,23 +627,49 @@ async def create_stream_endpoint(request: StreamCreateRequest):
         raise HTTPException(status_code=500, detail="Error creating stream")
 
 
-@app.get("/api/streams/{stream_id}")
-async def get_stream_endpoint(stream_id: str):
-    """Get a stream by ID"""
+@app.get("/api/hls/ladder")
+async def get_hls_ladder_endpoint():
+    """ABR variants that newly connected webcams are recorded with"""
+    return {"variants": [variant.to_dict() for variant in hls_ladder]}
+
+
+@app.put("/api/hls/ladder")
+async def set_hls_ladder_endpoint(request: HlsLadderRequest):
+    """Replace the ABR ladder ("1080p:5000k,720p:2800k,360p:800k"; empty for a single rendition).
+
+    Applies to webcams that connect afterwards; live recorders keep their variants.
+    """
     try:
-        if stream_id == "webcam":
-            return build_stream_payload(stream_id="webcam", url="webcam", playlist=WEBCAM_PLAYLIST_PATH)
+        variants = parse_hls_ladder(request.ladder)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    hls_ladder[:] = variants
+    return {"variants": [variant.to_dict() for variant in hls_ladder]}
 
-        stream = await get_stream_by_id(stream_id)
-        
-        if not stream:
-            raise HTTPException(status_code=404, detail="Stream ID Not found")
-        
-        return build_stream_payload(
-            stream_id=stream["id"],
-            url=stream["url"],
-            playlist=stream.get("playlist"),
-        )
+
+@app.get("/api/streams/{stream_id}")
+async def get_stream_endpoint(request: Request, stream_id: str, wait: float = Query(0.0)):
+    """Get a stream by ID (supports If-None-Match and ?wait=<seconds> long-polling)"""
+
+    async def current_stream_body() -> JsonBody:
+        if is_webcam_stream_id(stream_id):
+            payload = build_stream_payload(stream_id=stream_id, url="webcam")
+        else:
+            stream = await get_stream_by_id(stream_id)
+
+            if not stream:
+                raise HTTPException(status_code=404, detail="Stream ID Not found")
+
+            payload = build_stream_payload(
+                stream_id=stream["id"],
+                url=stream["url"],
+                playlist=stream.get("playlist"),
+            )
+        body = json.dumps(payload).encode()
+        return body, make_etag(body)
+
+    try:
+        return await conditional_json_response(request, current_stream_body, wait)
     except HTTPException:
         raise
     except Exception as error:
@@ -430,101 +677,251 @@ async def get_stream_endpoint(stream_id: str):
         raise HTTPException(status_code=500, detail="Error retrieving stream")
 
 
+def is_live_webcam(stream: WebcamStream) -> bool:
+    """False once the camera disconnected and its per-stream state was torn down."""
+    return stream.active and webcam_registry.get(stream.stream_id) is stream
+
+
+async def publish_analysis_result(stream: WebcamStream, result):
+    """Broadcast an alert for a finished webcam analysis if it is not NORMAL."""
+    if result is None:
+        return
+    if not is_live_webcam(stream):
+        # The camera disconnected while its analysis was in flight; recording the
+        # verdict would bring its per-stream state back
+        return
+    danger_level, reason = result
+
+    normalized_level = danger_level.upper()
+    analysis_intervals.record_verdict(stream.stream_id, normalized_level)
+    if normalized_level == "NORMAL":
+        return
+
+    if map_alert_level(normalized_level) is None:
+        return
+    reason = reason or "Unknown event"
+
+    if incident_tracker is not None:
+        # Repeats of an ongoing incident update the same alert id instead of adding alerts
+        incident, should_emit, closed = incident_tracker.observe(stream.stream_id, normalized_level, reason)
+        if closed is not None:
+            # The previous incident expired with repeats its clients never saw
+            alert_hub.publish(build_incident_alert(stream, closed, closed=True))
+        if should_emit:
+            alert_hub.publish(build_incident_alert(stream, incident))
+        return
+
+    # The hub also delivers to the stream's own publisher, which subscribes by source
+    alert_hub.publish({
+        "type": "priority_alert",
+        "id": str(uuid.uuid4()),
+        "alertName": reason,
+        "level": map_alert_level(normalized_level),
+        "rawLevel": normalized_level,
+        "location": stream.label,
+        "url": "",
+        "time": datetime.utcnow().isoformat() + "Z",
+        "source": stream.stream_id,
+    })
+
+
+def build_incident_alert(stream: WebcamStream, incident: Incident, closed: bool = False) -> Dict[str, Any]:
+    """Alert payload for the current version of an incident."""
+    alert_time = datetime.utcfromtimestamp(incident.last_seen).isoformat() + "Z"
+    return {
+        "type": "priority_alert",
+        "id": incident.id,
+        "alertName": incident.reason,
+        "level": map_alert_level(incident.peak_level),
+        "rawLevel": incident.peak_level,
+        "location": stream.label,
+        "url": "",
+        "time": alert_time,
+        "source": stream.stream_id,
+        "count": incident.count,
+        "firstSeen": datetime.utcfromtimestamp(incident.first_seen).isoformat() + "Z",
+        "lastSeen": alert_time,
+        "peakLevel": incident.peak_level,
+        "currentLevel": incident.level,
+        "update": incident.count > 1 or closed,
+        "closed": closed,
+    }
+
+
+def is_cacheable_verdict(result) -> bool:
+    """Detector failures come back as NORMAL with an error reason; never cache those."""
+    return result is not None and result[1] not in ("API error", "Parse error")
+
+
+async def analyze_webcam_frame(stream: WebcamStream, frame_bytes: bytes):
+    """Run the local stages for a due webcam frame and hand it to the Bedrock scheduler."""
+    try:
+        frame_hash = None
+        if verdict_cache is not None:
+            frame_hash = await asyncio.to_thread(perceptual_hash, frame_bytes)
+            if frame_hash is not None:
+                cached = verdict_cache.get(stream.stream_id, frame_hash)
+                if cached is not None:
+                    await publish_analysis_result(stream, cached)
+                    return
+
+        # Escalate to Bedrock only if the local YOLO stage flags the frame
+        if prefilter_gate is not None:
+            escalate = await prefilter_gate.should_escalate(stream.stream_id, frame_bytes)
+            if escalate is None:
+                # Not scored; leave the stream's interval state as it was
+                return
+            if not escalate:
+                # A quiet local score counts as a NORMAL verdict for interval backoff
+                analysis_intervals.record_verdict(stream.stream_id, "NORMAL")
+                return
+
+        async def on_result(result):
+            # A late result for a disconnected camera must not re-create its cache entries
+            if frame_hash is not None and is_cacheable_verdict(result) and is_live_webcam(stream):
+                verdict_cache.put(stream.stream_id, frame_hash, result)
+            await publish_analysis_result(stream, result)
+
+        inference_scheduler.submit(stream.stream_id, frame_bytes, on_result)
+    except Exception as exc:
+        print(f"Error preparing analysis for {stream.stream_id}: {exc}")
+
+
+def schedule_webcam_analysis(stream: WebcamStream, frame_bytes: bytes):
+    asyncio.create_task(analyze_webcam_frame(stream, frame_bytes))
+
+
 @app.websocket("/api/websocket/webcam")
-async def websocket_webcam(websocket: WebSocket):
+async def websocket_webcam(
+    websocket: WebSocket,
+    streamId: str = Query(DEFAULT_WEBCAM_STREAM_ID),
+):
+    if not is_webcam_stream_id(streamId):
+        await websocket.close(code=1008, reason="Invalid webcam stream ID")
+        return
+
     try:
         await websocket.accept()
-        print(f"Webcam WebSocket connected from {websocket.client}")
+        print(f"Webcam WebSocket connected from {websocket.client} for {streamId}")
     except Exception as e:
         print(f"Error accepting WebSocket: {e}")
         return
-    
-    global webcam_stream_active, webcam_stream_buffer
-    
-    try:
-        async with webcam_stream_lock:
-            webcam_stream_active = True
-            webcam_stream_buffer.clear()
-        
-        print("Webcam stream active")
-        
-        analysis_in_progress = False
-        last_analysis_time = 0.0
-        loop = asyncio.get_running_loop()
 
-        async def analyze_and_send(frame_bytes: bytes):
-            nonlocal analysis_in_progress
-            try:
-                frame = await asyncio.to_thread(decode_frame_from_bytes, frame_bytes)
-                if frame is None:
-                    return
-
-                async with bedrock_call_lock:
-                    danger_level, reason = await asyncio.to_thread(detector.analyze_frame, frame)
-
-                normalized_level = danger_level.upper()
-                if normalized_level == "NORMAL":
-                    return
+    try:
+        stream = await webcam_registry.acquire(streamId, websocket)
+    except Exception as e:
+        print(f"Error preparing webcam stream {streamId}: {e}")
+        await websocket.close(code=1011, reason="Could not prepare the stream")
+        return
+    if stream is None:
+        print(f"Rejecting second publisher for {streamId}")
+        await websocket.close(code=1008, reason="Stream already has an active publisher")
+        return
 
-                mapped_level = map_alert_level(normalized_level)
-                if mapped_level is None:
-                    return
+    # The socket belongs to the ingest loop: a stalled alert send only drops this subscription
+    publisher_alerts = alert_hub.subscribe(websocket, source=streamId, close_on_failure=False)
+    try:
+        print(f"Webcam stream {streamId} active")
 
-                alert_payload = {
-                    "type": "priority_alert",
-                    "id": str(uuid.uuid4()),
-                    "alertName": reason or "Unknown event",
-                    "level": mapped_level,
-                    "rawLevel": normalized_level,
-                    "location": "Webcam",
-                    "url": "",
-                    "time": datetime.utcnow().isoformat() + "Z",
-                    "source": "webcam",
-                }
-
-                await broadcast_alert(alert_payload, include_websocket=websocket)
-            except WebSocketDisconnect:
-                raise
-            except Exception as exc:
-                print(f"Error during frame analysis: {exc}")
-            finally:
-                analysis_in_progress = False
+        loop = asyncio.get_running_loop()
 
         while True:
             data = await websocket.receive_bytes()
-            
-            async with webcam_stream_lock:
-                webcam_stream_buffer.append(data)
 
-            await hls_recorder.write(data)
+            await stream.push_frame(data)
+            await stream.recorder.write(data)
 
             now = loop.time()
-            if (
-                not analysis_in_progress
-                and now - last_analysis_time >= WEBCAM_ANALYSIS_INTERVAL
-            ):
-                last_analysis_time = now
-                analysis_in_progress = True
-                asyncio.create_task(analyze_and_send(data))
-                
+            mjpeg_previews.offer(streamId, data, now)
+            motion_high = (
+                scene_change_gate is not None
+                and scene_change_gate.motion_level(streamId) >= MOTION_TRIGGER_THRESHOLD
+            )
+            interval = analysis_intervals.interval_for(streamId, motion_high)
+            due = stream.analysis_due(now, interval)
+            if scene_change_gate is None:
+                if due:
+                    schedule_webcam_analysis(stream, data)
+            elif await scene_change_gate.should_analyze(streamId, data, now, due):
+                if not due:
+                    stream.restart_analysis_interval(now)
+                schedule_webcam_analysis(stream, data)
+
     except WebSocketDisconnect:
-        print("Webcam stream disconnected")
+        print(f"Webcam stream {streamId} disconnected")
     except Exception as e:
         print(f"WebSocket error: {e}")
         import traceback
         traceback.print_exc()
     finally:
-        async with webcam_stream_lock:
-            webcam_stream_active = False
-            webcam_stream_buffer.clear()
-        await hls_recorder.stop()
+        await alert_hub.unsubscribe(publisher_alerts)
+        inference_scheduler.discard(streamId)
+        if prefilter_gate is not None:
+            prefilter_gate.forget(streamId)
+        if scene_change_gate is not None:
+            scene_change_gate.forget(streamId)
+        if verdict_cache is not None:
+            verdict_cache.forget(streamId)
+        analysis_intervals.forget(streamId)
+        if incident_tracker is not None:
+            # Flush the final count and last-seen time of the camera's open incident
+            incident = incident_tracker.forget(streamId)
+            if incident is not None:
+                alert_hub.publish(build_incident_alert(stream, incident, closed=True))
+        mjpeg_renditions.forget(streamId)
+        mjpeg_previews.forget(streamId)
+        await webcam_registry.release(stream)
+
+
+@app.get("/api/metrics")
+async def metrics_endpoint():
+    """Runtime counters for the analysis pipeline"""
+    return {
+        "alerts": alert_hub.stats(),
+        "inference": inference_scheduler.stats(),
+        "intervals": analysis_intervals.stats(),
+        "motion": scene_change_gate.stats() if scene_change_gate else {"enabled": False},
+        "prefilter": prefilter_gate.stats() if prefilter_gate else {"enabled": False},
+        "verdictCache": verdict_cache.stats() if verdict_cache else {"enabled": False},
+        "incidents": incident_tracker.stats() if incident_tracker else {"enabled": False},
+        "streamFeed": stream_feed.stats(),
+        "videosWatcher": videos_watcher.stats(),
+        "mjpeg": {
+            **mjpeg_viewers.stats(),
+            "renditions": mjpeg_renditions.stats(),
+            "previews": mjpeg_previews.stats(),
+        },
+        "llHls": {
+            webcam.stream_id: webcam.recorder.ll_playlist.stats()
+            for webcam in webcam_registry.streams()
+            if webcam.recorder.ll_playlist is not None
+        },
+    }
 
 
 @app.websocket("/api/websocket/alerts")
-async def websocket_alerts(websocket: WebSocket):
+async def websocket_alerts(
+    websocket: WebSocket,
+    since: Optional[int] = Query(None),
+    epoch: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None),
+    seconds: Optional[float] = Query(None),
+):
     try:
         await websocket.accept()
-        alert_subscribers.add(websocket)
+    except Exception as exc:
+        print(f"Error accepting alert WebSocket: {exc}")
+        return
+
+    # Replay recent alerts (or everything after the `seq` given as `since`) before live ones
+    subscriber = alert_hub.subscribe(
+        websocket,
+        since=since,
+        epoch=epoch,
+        replay_limit=ALERT_REPLAY_LIMIT if limit is None else max(0, limit),
+        replay_seconds=ALERT_REPLAY_SECONDS if seconds is None else seconds,
+    )
+    try:
         print(f"Alert WebSocket connected from {websocket.client}")
         # Keep the connection alive by waiting for incoming messages (if any)
         while True:
@@ -534,54 +931,154 @@ async def websocket_alerts(websocket: WebSocket):
     except Exception as exc:
         print(f"Alert WebSocket error: {exc}")
     finally:
-        alert_subscribers.discard(websocket)
+        await alert_hub.unsubscribe(subscriber)
+
+
+@app.websocket("/api/websocket/streams")
+async def websocket_stream_changes(
+    websocket: WebSocket,
+    since: Optional[int] = Query(None),
+    epoch: Optional[str] = Query(None),
+    streamId: Optional[str] = Query(None),
+):
+    """Push stream add/remove and webcam active/inactive events.
+
+    Clients resume with ``epoch`` and the last ``seq`` they applied. Otherwise they first
+    get a ``stream_snapshot``; events that follow may repeat changes already in it, so
+    clients apply them idempotently (upsert on added/webcam_active, delete on
+    removed/webcam_inactive, refetch on reset).
+    """
+    try:
+        await websocket.accept()
+    except Exception as exc:
+        print(f"Error accepting stream feed WebSocket: {exc}")
+        return
+
+    subscriber = None
+    try:
+        if stream_feed.can_resume(epoch, since):
+            subscriber = stream_feed.subscribe(websocket, since, stream_id=streamId)
+        while subscriber is None:
+            snapshot_seq = stream_feed.seq
+            streams = await current_stream_payloads()
+            if streamId:
+                streams = [stream for stream in streams if stream["id"] == streamId]
+            await websocket.send_text(stream_feed.snapshot_message(streams, snapshot_seq))
+            subscriber = stream_feed.subscribe(websocket, snapshot_seq, stream_id=streamId)
+
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        print("Stream feed WebSocket disconnected")
+    except Exception as exc:
+        print(f"Stream feed WebSocket error: {exc}")
+    finally:
+        if subscriber is not None:
+            await stream_feed.hub.unsubscribe(subscriber)
 
 
 @app.get("/api/stream")
-async def stream_proxy_endpoint(streamId: Optional[str] = Query(None)):
+async def stream_proxy_endpoint(
+    streamId: Optional[str] = Query(None),
+    fps: Optional[float] = Query(None),
+    resolution: Optional[str] = Query(None),
+    quality: Optional[str] = Query(None),
+):
     if not streamId:
         raise HTTPException(status_code=400, detail="Stream ID is required")
     
     stream_id = streamId 
     
 
-    if stream_id == "webcam":
+    if quality not in (None, "full", "preview"):
+        raise HTTPException(status_code=400, detail="Unknown quality, expected full or preview")
+
+    if is_webcam_stream_id(stream_id) and quality == "preview":
+        async def generate_webcam_preview():
+            viewer = mjpeg_viewers.open(stream_id, "preview", MJPEG_PREVIEW_FPS)
+            preview = mjpeg_previews.add_viewer(stream_id)
+            last_seq = 0
+
+            try:
+                while True:
+                    frame = await preview.wait_for_frame(last_seq, timeout=1.0)
+                    if frame is None:
+                        continue
+                    seq, chunk = frame
+                    if last_seq and seq > last_seq + 1:
+                        viewer.frames_dropped += seq - last_seq - 1
+                    last_seq = seq
+                    yield chunk
+                    viewer.frames_sent += 1
+                    viewer.bytes_sent += len(chunk)
+            finally:
+                mjpeg_previews.remove_viewer(stream_id)
+                mjpeg_viewers.close(viewer)
+
+        return StreamingResponse(
+            generate_webcam_preview(),
+            media_type="multipart/x-mixed-replace; boundary=frame",
+            headers=NO_CACHE_CORS_HEADERS
+        )
+
+    if is_webcam_stream_id(stream_id):
+        tier = resolution or MJPEG_DEFAULT_RESOLUTION
+        if tier not in RESOLUTION_TIERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown resolution, expected one of: {', '.join(RESOLUTION_TIERS)}",
+            )
+        max_height = RESOLUTION_TIERS[tier]
+        max_fps = min(fps, MJPEG_MAX_FPS) if fps and fps > 0 else MJPEG_MAX_FPS
+        frame_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+
         async def generate_webcam():
-            global webcam_stream_active, webcam_stream_buffer
-            last_frame = None
-            
-            while True:
-                current_frame = None
-                async with webcam_stream_lock:
-                    if len(webcam_stream_buffer) > 0:
-                        # Get the latest frame
-                        current_frame = webcam_stream_buffer[-1]
-                
-                # Only send if we have a new frame
-                if current_frame and current_frame != last_frame:
-                    yield b'--frame\r\n'
-                    yield b'Content-Type: image/jpeg\r\n\r\n'
-                    yield current_frame
-                    yield b'\r\n'
-                    last_frame = current_frame
-                elif not webcam_stream_active:
-                    # No active stream, wait a bit
-                    await asyncio.sleep(0.1)
-                    continue
-                
-                await asyncio.sleep(0.033)  # ~30 FPS
-        
+            viewer = mjpeg_viewers.open(stream_id, tier, max_fps)
+            last_seq = 0
+            next_send_at = 0.0
+
+            try:
+                while True:
+                    # The publisher may connect after the viewer, so resolve the stream each time
+                    webcam = webcam_registry.get(stream_id)
+                    if webcam is None or not webcam.active:
+                        # No active stream, wait a bit
+                        last_seq = 0
+                        await asyncio.sleep(0.1)
+                        continue
+
+                    # Rate cap: don't even look at frames until this viewer is due another one
+                    delay = next_send_at - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                    # Wakes only when the publisher pushes a new frame (or disconnects).
+                    # The yield below blocks while the client drains, so a slow viewer
+                    # holds one frame at most and skips straight to the newest one.
+                    frame = await webcam.wait_for_frame(last_seq, timeout=1.0)
+                    if frame is None:
+                        continue
+                    seq, frame_bytes, chunk = frame
+                    if last_seq and seq > last_seq + 1:
+                        viewer.frames_dropped += seq - last_seq - 1
+                    last_seq = seq
+                    if max_height is not None:
+                        chunk = await mjpeg_renditions.chunk_for(stream_id, max_height, seq, frame_bytes)
+                        if chunk is None:
+                            viewer.frames_dropped += 1
+                            continue
+
+                    next_send_at = time.monotonic() + frame_interval
+                    yield chunk
+                    viewer.frames_sent += 1
+                    viewer.bytes_sent += len(chunk)
+            finally:
+                mjpeg_viewers.close(viewer)
+
         return StreamingResponse(
             generate_webcam(),
             media_type="multipart/x-mixed-replace; boundary=frame",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0",
-            }
+            headers=NO_CACHE_CORS_HEADERS
         )
     
     stream = await get_stream_by_id(stream_id)
@@ -598,14 +1095,7 @@ async def stream_proxy_endpoint(streamId: Optional[str] = Query(None)):
             return FileResponse(
                 str(video_path),
                 media_type="video/mp4",
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type",
-                    "Cache-Control": "no-cache, no-store, must-revalidate",
-                    "Pragma": "no-cache",
-                    "Expires": "0",
-                }
+                headers=NO_CACHE_CORS_HEADERS
             )
         else:
             raise HTTPException(status_code=404, detail="Video file not found")
@@ -646,31 +1136,69 @@ async def stream_proxy_endpoint(streamId: Optional[str] = Query(None)):
     return StreamingResponse(
         generate(),
         media_type=content_type,
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type",
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0",
-        }
+        headers=NO_CACHE_CORS_HEADERS
     )
 
 
 @app.options("/api/stream")
 async def stream_options():
     """Handle CORS preflight for stream endpoint"""
-    from fastapi.responses import Response
     return Response(
         status_code=200,
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type",
-        }
+        headers=CORS_HEADERS
     )
 
 
+if WEBCAM_HLS_LOW_LATENCY:
+    # Registered ahead of the /videos mount so LL-HLS playlists are served live
+
+    def webcam_ll_playlist(stream_id: str):
+        webcam = webcam_registry.get(stream_id) if is_webcam_stream_id(stream_id) else None
+        if webcam is None or webcam.recorder.ll_playlist is None:
+            raise HTTPException(status_code=404, detail="Playlist not found")
+        return webcam.recorder.ll_playlist
+
+    @app.get("/videos/{stream_id}-hls/index.m3u8")
+    async def ll_hls_playlist_endpoint(
+        stream_id: str,
+        msn: Optional[int] = Query(None, alias="_HLS_msn"),
+        part: Optional[int] = Query(None, alias="_HLS_part"),
+    ):
+        """LL-HLS media playlist with blocking reload (_HLS_msn / _HLS_part)"""
+        playlist = webcam_ll_playlist(stream_id)
+        if msn is not None:
+            if part is not None:
+                if part < 0:
+                    raise HTTPException(status_code=400, detail="Invalid _HLS_part")
+            last_msn, _ = playlist.position()
+            if msn > last_msn + 2:
+                raise HTTPException(status_code=400, detail="_HLS_msn is too far ahead of the live edge")
+            if not await playlist.wait_for(msn, part, timeout=3 * playlist.segment_duration):
+                raise HTTPException(status_code=503, detail="Requested part is not available yet")
+        elif part is not None:
+            raise HTTPException(status_code=400, detail="_HLS_part requires _HLS_msn")
+
+        return Response(
+            content=playlist.render(),
+            media_type="application/vnd.apple.mpegurl",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    @app.get("/videos/{stream_id}-hls/ll/{msn:int}.m4s")
+    async def ll_hls_segment_endpoint(stream_id: str, msn: int):
+        """Full LL-HLS segment: its parts concatenated"""
+        playlist = webcam_ll_playlist(stream_id)
+        parts = playlist.segment_parts(msn)
+        if not parts:
+            raise HTTPException(status_code=404, detail="Segment not found")
+        paths = [playlist.directory / part.uri for part in parts]
+        try:
+            content = await asyncio.to_thread(lambda: b"".join(path.read_bytes() for path in paths))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Segment not found")
+        return Response(content=content, media_type="video/mp4")
+
+
 # Mount videos folder to serve video files
 VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
 if VIDEOS_DIR.exists():
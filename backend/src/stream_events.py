@@ -0,0 +1,89 @@
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from .alert_hub import AlertHub, AlertSubscriber, serialize_alert
+
+
+class StreamChangeFeed:
+    """Sequenced feed of stream registry changes fanned out over an AlertHub.
+
+    Every event gets the next sequence number of this process (``epoch`` identifies the
+    process, so clients can tell a restart from a gap). The last ``history`` events are
+    kept so a reconnecting client can resume after the last ``seq`` it applied; when
+    that is no longer possible it must start again from a snapshot.
+    """
+
+    def __init__(self, hub: AlertHub, history: int = 1000):
+        self.hub = hub
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._history: Deque[Tuple[int, Optional[str], str]] = deque(maxlen=max(1, history))
+        self.published = 0
+        self.replayed = 0
+
+    def publish(self, event: str, stream_id: Optional[str], stream: Optional[Dict[str, Any]] = None):
+        self.seq += 1
+        message = {
+            "type": "stream_event",
+            "id": str(self.seq),
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "event": event,
+            "streamId": stream_id,
+            "source": stream_id,
+            "stream": stream,
+            "time": datetime.utcnow().isoformat() + "Z",
+        }
+        serialized = serialize_alert(message)
+        self._history.append((self.seq, stream_id, serialized))
+        self.published += 1
+        self.hub.publish(message, message=serialized)
+
+    def can_resume(self, epoch: Optional[str], since: Optional[int]) -> bool:
+        """True if every event after ``since`` is still in the history of this epoch."""
+        if epoch != self.epoch or since is None or since < 0 or since > self.seq:
+            return False
+        oldest = self._history[0][0] if self._history else self.seq + 1
+        return since >= oldest - 1
+
+    def snapshot_message(self, streams: List[Dict[str, Any]], seq: int) -> str:
+        """Full stream list that a client should treat as the state as of ``seq``."""
+        return serialize_alert({
+            "type": "stream_snapshot",
+            "epoch": self.epoch,
+            "seq": seq,
+            "streams": streams,
+        })
+
+    def subscribe(self, websocket: WebSocket, since: int, stream_id: Optional[str] = None) -> Optional[AlertSubscriber]:
+        """Subscribe and queue every retained event after ``since`` ahead of live ones.
+
+        Returns None if those events are no longer retained (the client must resync).
+        """
+        if not self.can_resume(self.epoch, since):
+            return None
+        subscriber = self.hub.subscribe(websocket, source=stream_id)
+        now = time.monotonic()
+        first_index = len(self._history) - (self.seq - since)
+        for index in range(first_index, len(self._history)):
+            seq, source, message = self._history[index]
+            # Source-less events (a reset) apply to every stream filter
+            if stream_id is None or source is None or source == stream_id:
+                subscriber.enqueue(message, str(seq), self.hub.policy, now)
+                self.replayed += 1
+        return subscriber
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "history": len(self._history),
+            "published": self.published,
+            "replayed": self.replayed,
+            "delivery": self.hub.stats(),
+        }
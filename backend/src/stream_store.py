@@ -0,0 +1,237 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from sqlalchemy.exc import IntegrityError
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import Field, SQLModel, delete, select, update
+    from sqlmodel.ext.asyncio.session import AsyncSession
+except ImportError:
+    SQLModel = None
+
+MEMORY_STORE_URL = "memory://"
+
+
+def parse_stream_id(stream_id: str) -> Optional[int]:
+    try:
+        return int(stream_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class MemoryStreamStore:
+    """Process-local stream registry; wiped on open/close like the original dict store.
+
+    Readers never take the lock: every write bumps ``version`` and drops the published
+    snapshot, and the next reader rebuilds it once as an immutable, id-ordered tuple
+    that all later readers share until the following write. Returned stream dicts are
+    shared between callers and must not be mutated.
+    """
+
+    def __init__(self):
+        self._streams: Dict[int, Dict[str, str]] = {}  # Insertion order is id order
+        self._url_index: Dict[str, int] = {}  # URL -> id of its stream (URLs are unique)
+        self._next_stream_id = 1
+        self._lock = asyncio.Lock()
+        self._snapshot: Optional[Tuple[Dict[str, str], ...]] = ()
+        self.version = 0
+
+    async def open(self):
+        await self.reset()
+
+    async def close(self):
+        await self.reset()
+
+    async def reset(self):
+        async with self._lock:
+            self._streams.clear()
+            self._url_index.clear()
+            self._next_stream_id = 1
+            self._publish()
+
+    def _publish(self):
+        self.version += 1
+        self._snapshot = None
+
+    def snapshot(self) -> Tuple[Dict[str, str], ...]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = tuple(self._streams.values())
+        return snapshot
+
+    async def streams_version(self) -> int:
+        return self.version
+
+    async def get_all_streams(self) -> List[Dict[str, str]]:
+        return list(self.snapshot())
+
+    async def get_stream_by_id(self, stream_id: str) -> Optional[Dict[str, str]]:
+        stream_id_int = parse_stream_id(stream_id)
+        if stream_id_int is None:
+            return None
+        return self._streams.get(stream_id_int)
+
+    def _insert(self, url: str) -> Dict[str, str]:
+        stream_id = self._next_stream_id
+        self._next_stream_id += 1
+        stream = self._streams[stream_id] = {"id": str(stream_id), "url": url}
+        self._url_index[url] = stream_id
+        self._publish()
+        return stream
+
+    async def get_or_create_stream(self, url: str) -> Tuple[Dict[str, str], bool]:
+        async with self._lock:
+            stream_id = self._url_index.get(url)
+            if stream_id is not None:
+                return self._streams[stream_id], False
+            return self._insert(url), True
+
+    async def delete_stream_by_url(self, url: str) -> Optional[Dict[str, str]]:
+        async with self._lock:
+            stream_id = self._url_index.pop(url, None)
+            if stream_id is None:
+                return None
+            stream = self._streams.pop(stream_id)
+            self._publish()
+            return stream
+
+    async def stream_exists_by_url(self, url: str) -> bool:
+        return url in self._url_index
+
+
+if SQLModel is not None:
+    class StreamRecord(SQLModel, table=True):
+        __tablename__ = "streams"
+
+        id: Optional[int] = Field(default=None, primary_key=True)
+        url: str = Field(index=True, unique=True)
+
+    class StreamStoreVersion(SQLModel, table=True):
+        """Single row counting committed stream writes; ids can be reused, this cannot."""
+        __tablename__ = "streams_version"
+
+        id: Optional[int] = Field(default=None, primary_key=True)
+        version: int = 0
+
+
+def normalize_database_url(url: str) -> str:
+    """Pick the async driver for plain sqlite:// and postgres(ql):// URLs."""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+class SqlStreamStore:
+    """Stream registry in SQLite (aiosqlite) or Postgres (asyncpg) through a pooled async engine.
+
+    URLs are unique (indexed); creating a stream for a URL that is already registered
+    returns the existing row. Rows survive restarts, so open/close do not wipe them.
+    """
+
+    def __init__(self, database_url: str, pool_size: int = 5, max_overflow: int = 10):
+        if SQLModel is None:
+            raise RuntimeError("sqlmodel is required for STREAM_STORE_URL; install requirements.txt")
+        self.database_url = normalize_database_url(database_url)
+        engine_options = {"pool_pre_ping": True}
+        if not self.database_url.startswith("sqlite"):
+            engine_options.update(pool_size=pool_size, max_overflow=max_overflow)
+        self.engine = create_async_engine(self.database_url, **engine_options)
+
+    def _session(self):
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    async def open(self):
+        async with self.engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+        async with self._session() as session:
+            if await session.get(StreamStoreVersion, 1) is None:
+                session.add(StreamStoreVersion(id=1))
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    await session.rollback()  # Another process created it first
+
+    async def close(self):
+        await self.engine.dispose()
+
+    async def _bump_version(self, session):
+        # Committed with the write itself, so a rolled-back insert leaves it alone
+        await session.exec(
+            update(StreamStoreVersion)
+            .where(StreamStoreVersion.id == 1)
+            .values(version=StreamStoreVersion.version + 1)
+        )
+
+    async def reset(self):
+        async with self._session() as session:
+            await session.exec(delete(StreamRecord))
+            await self._bump_version(session)
+            await session.commit()
+
+    async def streams_version(self) -> int:
+        """Change counter for caching listings, shared by every process using the database."""
+        async with self._session() as session:
+            record = await session.get(StreamStoreVersion, 1, populate_existing=True)
+            return record.version if record is not None else 0
+
+    async def get_all_streams(self) -> List[Dict[str, str]]:
+        async with self._session() as session:
+            records = await session.exec(select(StreamRecord).order_by(StreamRecord.id))
+            return [{"id": str(record.id), "url": record.url} for record in records]
+
+    async def get_stream_by_id(self, stream_id: str) -> Optional[Dict[str, str]]:
+        stream_id_int = parse_stream_id(stream_id)
+        if stream_id_int is None:
+            return None
+        async with self._session() as session:
+            record = await session.get(StreamRecord, stream_id_int)
+            if record is None:
+                return None
+            return {"id": str(record.id), "url": record.url}
+
+    async def _get_by_url(self, session, url: str):
+        result = await session.exec(select(StreamRecord).where(StreamRecord.url == url))
+        return result.first()
+
+    async def get_or_create_stream(self, url: str) -> Tuple[Dict[str, str], bool]:
+        async with self._session() as session:
+            record = await self._get_by_url(session, url)
+            if record is not None:
+                return {"id": str(record.id), "url": record.url}, False
+            await self._bump_version(session)
+            record = StreamRecord(url=url)
+            session.add(record)
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another writer registered the URL between the lookup and the insert
+                await session.rollback()
+                record = await self._get_by_url(session, url)
+                if record is None:
+                    raise
+                return {"id": str(record.id), "url": record.url}, False
+            return {"id": str(record.id), "url": record.url}, True
+
+    async def delete_stream_by_url(self, url: str) -> Optional[Dict[str, str]]:
+        async with self._session() as session:
+            record = await self._get_by_url(session, url)
+            if record is None:
+                return None
+            stream = {"id": str(record.id), "url": record.url}
+            await session.delete(record)
+            await self._bump_version(session)
+            await session.commit()
+            return stream
+
+    async def stream_exists_by_url(self, url: str) -> bool:
+        async with self._session() as session:
+            return await self._get_by_url(session, url) is not None
+
+
+def create_stream_store(store_url: str, pool_size: int = 5, max_overflow: int = 10):
+    if not store_url or store_url == MEMORY_STORE_URL:
+        return MemoryStreamStore()
+    return SqlStreamStore(store_url, pool_size=pool_size, max_overflow=max_overflow)
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .motion import make_thumbnail
+
+Verdict = Tuple[str, str]
+
+
+def perceptual_hash(frame_bytes: bytes) -> Optional[int]:
+    """64-bit difference hash (dHash) of a JPEG frame, or None if it cannot be decoded."""
+    thumbnail = make_thumbnail(frame_bytes)
+    if thumbnail is None:
+        return None
+    small = cv2.resize(thumbnail, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class VerdictCache:
+    """Per-stream LRU/TTL cache of detector verdicts keyed by perceptual frame hash.
+
+    A lookup hits when a stored hash is within ``max_distance`` bits (Hamming distance)
+    of the new frame's hash and younger than ``ttl_seconds``. Each stream holds at most
+    ``max_entries_per_stream`` entries.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_distance: int = 4, max_entries_per_stream: int = 32):
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.max_entries_per_stream = max(1, max_entries_per_stream)
+        self._entries: Dict[str, "OrderedDict[int, Tuple[Verdict, float]]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def forget(self, stream_id: str):
+        self._entries.pop(stream_id, None)
+
+    def get(self, stream_id: str, frame_hash: int) -> Optional[Verdict]:
+        entries = self._entries.get(stream_id)
+        if entries:
+            now = time.monotonic()
+            for stored_hash in list(entries):
+                verdict, stored_at = entries[stored_hash]
+                if now - stored_at > self.ttl_seconds:
+                    del entries[stored_hash]
+                    self.expired += 1
+                    continue
+                if (stored_hash ^ frame_hash).bit_count() <= self.max_distance:
+                    entries.move_to_end(stored_hash)
+                    self.hits += 1
+                    return verdict
+        self.misses += 1
+        return None
+
+    def put(self, stream_id: str, frame_hash: int, verdict: Verdict):
+        entries = self._entries.setdefault(stream_id, OrderedDict())
+        entries[frame_hash] = (verdict, time.monotonic())
+        entries.move_to_end(frame_hash)
+        while len(entries) > self.max_entries_per_stream:
+            entries.popitem(last=False)
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "ttlSeconds": self.ttl_seconds,
+            "maxDistance": self.max_distance,
+            "maxEntriesPerStream": self.max_entries_per_stream,
+            "entries": sum(len(entries) for entries in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,239 @@
+import os
+import time
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from watchfiles import Change, awatch
+except ImportError:
+    awatch = None
+
+VIDEO_EXTENSIONS = {".mp4", ".webm", ".ogg", ".mov", ".avi", ".mkv"}
+
+FilesCallback = Callable[[List[str]], Awaitable[None]]
+FileSignature = Tuple[int, int]  # (size, mtime_ns)
+
+
+def is_video_file_name(name: str) -> bool:
+    return not name.startswith(".") and os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+
+
+def list_video_files(directory: Path) -> Set[str]:
+    """Names of the video files directly inside ``directory`` (blocking; run in a thread)."""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries if entry.is_file() and is_video_file_name(entry.name)}
+    except FileNotFoundError:
+        return set()
+
+
+def stat_video_files(directory: Path, names: Iterable[str]) -> Dict[str, Optional[FileSignature]]:
+    """(size, mtime_ns) of each named file, None for the ones that are gone (blocking)."""
+    signatures = {}
+    for name in names:
+        try:
+            stat = os.stat(directory / name)
+        except FileNotFoundError:
+            signatures[name] = None
+        else:
+            signatures[name] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+class VideosFolderWatcher:
+    """Reports video files added to or removed from a folder without rescanning it.
+
+    Uses OS file notifications (inotify/FSEvents/ReadDirectoryChangesW through
+    ``watchfiles``) with events debounced into batches, and falls back to diffing a
+    directory listing every ``poll_interval`` seconds when ``watchfiles`` is missing or
+    ``force_polling`` is set. A notification batch only touches the names it reports,
+    so its cost does not grow with the folder. Listings and stats run in a worker
+    thread, never on the event loop.
+    Only top-level files are watched, so HLS output directories are ignored.
+
+    New files are held back until their size and mtime stayed unchanged for
+    ``settle_seconds``, so uploads and copies still being written are not registered
+    half-way; files last modified longer ago than that are reported right away.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        on_added: FilesCallback,
+        on_removed: FilesCallback,
+        debounce_ms: int = 500,
+        poll_interval: float = 2.0,
+        force_polling: bool = False,
+        settle_seconds: float = 2.0,
+    ):
+        self.directory = Path(directory)
+        self.on_added = on_added
+        self.on_removed = on_removed
+        self.debounce_ms = debounce_ms
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+        self.settle_seconds = settle_seconds
+        self.mode = "polling" if force_polling or awatch is None else "notify"
+        self._known: Set[str] = set()
+        # New files still being written: name -> (last signature, when it was first seen)
+        self._pending: Dict[str, Tuple[Optional[FileSignature], float]] = {}
+        self._lock = asyncio.Lock()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._settle_task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.added = 0
+        self.removed = 0
+
+    async def start(self, known: Iterable[str] = ()):
+        """Report the folder's settled files, then follow changes in the background.
+
+        ``known`` names files the caller already registered; those still present are not
+        reported again and those that disappeared are reported as removed.
+        """
+        if self._task is not None:
+            return
+        self._stop.clear()
+        self._known = set(known)
+        self._pending.clear()
+        await asyncio.to_thread(self.directory.mkdir, parents=True, exist_ok=True)
+        await self._apply(await asyncio.to_thread(list_video_files, self.directory))
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        settle_task, self._settle_task = self._settle_task, None
+        if settle_task is not None:
+            settle_task.cancel()
+            await asyncio.gather(settle_task, return_exceptions=True)
+        task, self._task = self._task, None
+        if task is not None:
+            # Let the notification thread see the stop event and exit on its own
+            self._stop.set()
+            await asyncio.wait({task}, timeout=2.0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def rescan(self):
+        """Full listing diff (e.g. for a manual scan request)."""
+        await self._apply(await asyncio.to_thread(list_video_files, self.directory))
+
+    async def _apply(self, present: Set[str]):
+        """Diff a full listing against the known and pending files (start, rescan, polling)."""
+        async with self._lock:
+            removed = self._known - present
+            for name in list(self._pending):
+                if name not in present:
+                    del self._pending[name]
+            for name in present - self._known:
+                self._pending.setdefault(name, (None, 0.0))
+            await self._flush(removed)
+
+    async def _apply_changes(self, changes: Dict[str, bool]):
+        """Apply only the reported names (name -> still exists), never the whole folder."""
+        async with self._lock:
+            removed = set()
+            for name, exists in changes.items():
+                if exists:
+                    if name not in self._known:
+                        self._pending.setdefault(name, (None, 0.0))
+                else:
+                    self._pending.pop(name, None)
+                    if name in self._known:
+                        removed.add(name)
+            await self._flush(removed)
+
+    async def _flush(self, removed: Set[str]):
+        """Report ``removed`` and the pending files that settled. Call with ``_lock`` held."""
+        added = await self._settle()
+        if self._pending and (self._settle_task is None or self._settle_task.done()):
+            self._settle_task = asyncio.create_task(self._settle_pending())
+        if not added and not removed:
+            return
+        self._known.difference_update(removed)
+        self._known.update(added)
+        await self._report(added, sorted(removed))
+
+    async def _settle(self) -> List[str]:
+        """Take the pending files that stopped changing out of ``_pending``."""
+        if not self._pending:
+            return []
+        signatures = await asyncio.to_thread(stat_video_files, self.directory, list(self._pending))
+        now = time.time()
+        ready = []
+        for name, signature in signatures.items():
+            if signature is None:
+                del self._pending[name]
+                continue
+            previous, since = self._pending[name]
+            if signature != previous:
+                self._pending[name] = (signature, now)
+                since = now
+            if now - since >= self.settle_seconds or now - signature[1] / 1e9 >= self.settle_seconds:
+                del self._pending[name]
+                ready.append(name)
+        return sorted(ready)
+
+    async def _settle_pending(self):
+        # Notifications stop once a file is fully written, so re-check pending files on a timer
+        while self._pending and not self._stop.is_set():
+            await asyncio.sleep(max(0.1, self.settle_seconds / 2))
+            async with self._lock:
+                await self._flush(set())
+
+    async def _report(self, added: List[str], removed: List[str]):
+        self.batches += 1
+        self.added += len(added)
+        self.removed += len(removed)
+        if removed:
+            await self.on_removed(removed)
+        if added:
+            await self.on_added(added)
+
+    async def _run(self):
+        try:
+            if self.mode == "notify":
+                await self._watch_notifications()
+            else:
+                await self._watch_polling()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            print(f"Videos folder watcher failed ({exc}); falling back to polling")
+            self.mode = "polling"
+            await self._watch_polling()
+
+    def _watch_filter(self, change, path: str) -> bool:
+        return is_video_file_name(os.path.basename(path))
+
+    async def _watch_notifications(self):
+        async for changes in awatch(
+            self.directory,
+            watch_filter=self._watch_filter,
+            debounce=self.debounce_ms,
+            stop_event=self._stop,
+            recursive=False,
+        ):
+            # Last change per name wins: a file can be created and deleted within one window
+            latest = {}
+            for change, path in changes:
+                latest[os.path.basename(path)] = change != Change.deleted
+            await self._apply_changes(latest)
+
+    async def _watch_polling(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.rescan()
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "files": len(self._known),
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "added": self.added,
+            "removed": self.removed,
+        }
@@ -0,0 +1,216 @@
+import re
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from .hls_recorder import HLSRecorder
+
+DEFAULT_WEBCAM_STREAM_ID = "webcam"
+_WEBCAM_STREAM_ID_PATTERN = re.compile(r"^webcam(-[A-Za-z0-9][A-Za-z0-9_-]{0,47})?$")
+
+
+def is_webcam_stream_id(stream_id: Optional[str]) -> bool:
+    """Return True if the ID names a live webcam stream (``webcam`` or ``webcam-<name>``)."""
+    if not stream_id:
+        return False
+    return _WEBCAM_STREAM_ID_PATTERN.match(stream_id) is not None
+
+
+def build_mjpeg_chunk(frame_bytes: bytes) -> bytes:
+    """One multipart/x-mixed-replace part (boundary ``frame``) for a JPEG frame."""
+    return (
+        b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+        + str(len(frame_bytes)).encode()
+        + b"\r\n\r\n"
+        + frame_bytes
+        + b"\r\n"
+    )
+
+
+class WebcamStream:
+    """Ingest state for a single webcam publisher: frame buffer, recorder and analysis timing.
+
+    Each pushed frame bumps ``frame_seq`` and wakes MJPEG viewers waiting on
+    ``frame_ready``; the multipart chunk is built once here and shared by every viewer.
+    """
+
+    def __init__(self, stream_id: str, recorder: HLSRecorder, buffer_size: int = 10):
+        self.stream_id = stream_id
+        self.recorder = recorder
+        self.buffer: Deque[bytes] = deque(maxlen=buffer_size)  # Store last N frames
+        self.lock = asyncio.Lock()
+        self.frame_ready = asyncio.Condition(self.lock)
+        self.frame_seq = 0
+        self.frame_chunk: Optional[bytes] = None  # MJPEG part for the latest frame
+        self.active = False
+        self.publisher: Optional[WebSocket] = None
+        self.connected_at: Optional[float] = None
+        self.frames_received = 0
+        self.last_analysis_time = 0.0
+
+    @property
+    def label(self) -> str:
+        """Human readable location used in alerts."""
+        if self.stream_id == DEFAULT_WEBCAM_STREAM_ID:
+            return "Webcam"
+        return f"Webcam {self.stream_id[len(DEFAULT_WEBCAM_STREAM_ID) + 1:]}"
+
+    async def push_frame(self, frame_bytes: bytes):
+        chunk = build_mjpeg_chunk(frame_bytes)
+        async with self.frame_ready:
+            self.buffer.append(frame_bytes)
+            self.frame_seq += 1
+            self.frame_chunk = chunk
+            self.frame_ready.notify_all()
+        self.frames_received += 1
+
+    async def wait_for_frame(self, after_seq: int, timeout: float) -> Optional[Tuple[int, bytes, bytes]]:
+        """Wait for a frame newer than ``after_seq``; returns (seq, JPEG, MJPEG chunk) or None on timeout.
+
+        Always the latest frame: anything pushed between ``after_seq`` and it is skipped.
+        """
+        async with self.frame_ready:
+            try:
+                await asyncio.wait_for(
+                    self.frame_ready.wait_for(
+                        lambda: not self.active or (self.frame_seq > after_seq and self.frame_chunk is not None)
+                    ),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                return None
+            if self.frame_seq <= after_seq or self.frame_chunk is None:
+                return None
+            return self.frame_seq, self.buffer[-1], self.frame_chunk
+
+    async def latest_frame(self) -> Optional[bytes]:
+        async with self.lock:
+            if len(self.buffer) > 0:
+                return self.buffer[-1]
+        return None
+
+    async def is_visible(self) -> bool:
+        """A stream is listed while it has a publisher or still holds frames."""
+        async with self.lock:
+            return self.active or len(self.buffer) > 0
+
+    def analysis_due(self, now: float, interval: float) -> bool:
+        """Return True (and restart the interval) once the analysis interval has elapsed."""
+        if now - self.last_analysis_time < interval:
+            return False
+        self.last_analysis_time = now
+        return True
+
+    def restart_analysis_interval(self, now: float):
+        """Push the next interval-based analysis back after an early (motion) trigger."""
+        self.last_analysis_time = now
+
+
+class WebcamIngestRegistry:
+    """Stream-keyed registry of webcam publishers so many cameras can ingest concurrently."""
+
+    def __init__(
+        self,
+        recorder_factory: Callable[[str], HLSRecorder],
+        buffer_size: int = 10,
+        on_change: Optional[Callable[[str, WebcamStream], None]] = None,
+        max_prepared: int = 256,
+    ):
+        self._recorder_factory = recorder_factory
+        self._on_change = on_change
+        self._buffer_size = buffer_size
+        self._streams: Dict[str, WebcamStream] = {}
+        # Ids whose output directory was already cleaned this run (least recently used first)
+        self._prepared: "OrderedDict[str, None]" = OrderedDict()
+        self._max_prepared = max(1, max_prepared)
+        self._lock = asyncio.Lock()
+        self.version = 0  # Bumped whenever a stream's publisher attaches or detaches
+
+    def _changed(self, event: str, stream: WebcamStream):
+        self.version += 1
+        if self._on_change is not None:
+            self._on_change(event, stream)
+
+    def get(self, stream_id: str) -> Optional[WebcamStream]:
+        return self._streams.get(stream_id)
+
+    def streams(self) -> List[WebcamStream]:
+        return [self._streams[stream_id] for stream_id in sorted(self._streams)]
+
+    async def visible_streams(self) -> List[WebcamStream]:
+        return [stream for stream in self.streams() if await stream.is_visible()]
+
+    async def acquire(self, stream_id: str, publisher: WebSocket) -> Optional[WebcamStream]:
+        """Attach a publisher to a stream. Returns None if the stream already has one.
+
+        The stream is claimed under the lock but only announced once its recorder output
+        is ready; if that fails the claim is rolled back so the id can be used again.
+        Output is only wiped the first time an id is seen (of the last ``max_prepared``).
+        """
+        async with self._lock:
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                stream = WebcamStream(
+                    stream_id,
+                    self._recorder_factory(stream_id),
+                    buffer_size=self._buffer_size,
+                )
+                self._streams[stream_id] = stream
+            if stream.active:
+                return None
+            stream.active = True
+            stream.publisher = publisher
+            stream.connected_at = time.time()
+
+        try:
+            async with stream.lock:
+                stream.buffer.clear()
+                stream.frame_chunk = None
+            if stream_id in self._prepared:
+                # A reconnecting camera keeps appending to the recording it already has
+                self._prepared.move_to_end(stream_id)
+            else:
+                await stream.recorder.setup()
+                self._remember_prepared(stream_id)
+        except BaseException:
+            async with self._lock:
+                stream.active = False
+                stream.publisher = None
+                stream.connected_at = None
+                if self._streams.get(stream_id) is stream:
+                    del self._streams[stream_id]
+            raise
+
+        self._changed("webcam_active", stream)
+        return stream
+
+    def _remember_prepared(self, stream_id: str):
+        self._prepared[stream_id] = None
+        while len(self._prepared) > self._max_prepared:
+            self._prepared.popitem(last=False)
+
+    async def release(self, stream: WebcamStream):
+        """Detach the publisher, drop buffered frames and stop the stream's recorder.
+
+        The stream is then evicted, so ids minted by clients do not accumulate.
+        """
+        async with stream.frame_ready:
+            stream.active = False
+            stream.buffer.clear()
+            stream.frame_chunk = None
+            stream.frame_ready.notify_all()
+        self._changed("webcam_inactive", stream)
+        stream.publisher = None
+        stream.connected_at = None
+        await stream.recorder.stop()
+        async with self._lock:
+            # A new publisher may have re-acquired it while the recorder was stopping
+            if not stream.active and self._streams.get(stream.stream_id) is stream:
+                del self._streams[stream.stream_id]
+
+    async def stop_all(self):
+        for stream in self.streams():
+            await stream.recorder.stop()
@@ -0,0 +1,159 @@
+import time
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+ScoreResult = Tuple[float, int, list]
+
+
+class YoloBatchWorker:
+    """Collects frames from many streams and scores them with one YOLO forward pass.
+
+    Callers await ``score``; the worker waits up to ``max_wait_seconds`` for more streams
+    to submit, runs ``detector.detect_batch`` on up to ``max_batch_size`` frames in a
+    thread, and scatters the per-frame scores back to each caller. Each stream keeps its
+    own ScorerState so one loaded model serves every camera with isolated history.
+    """
+
+    def __init__(self, detector, max_batch_size: int = 16, max_wait_seconds: float = 0.02):
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: Dict[str, Tuple[bytes, asyncio.Future, object]] = {}
+        self._states: Dict[str, Any] = {}
+        # Token per tracked stream, replaced on forget(): frames queued under an older token
+        # get no score, so a forgotten stream's state is never re-created by the worker thread
+        self._tokens: Dict[str, object] = {}
+        self._states_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.frames = 0
+        self.superseded = 0
+        self.decode_failures = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self._inference_time_total = 0.0
+        self._started_at: Optional[float] = None
+
+    def start(self):
+        if self._task is None:
+            self._started_at = time.monotonic()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        for _, future, _ in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+        self._pending.clear()
+
+    def forget(self, stream_id: str):
+        """Drop a stream's temporal history (e.g. when its publisher disconnects)."""
+        with self._states_lock:
+            self._states.pop(stream_id, None)
+            self._tokens.pop(stream_id, None)
+        pending = self._pending.pop(stream_id, None)
+        if pending is not None and not pending[1].done():
+            pending[1].set_result(None)
+
+    async def score(self, stream_id: str, frame_bytes: bytes) -> Optional[ScoreResult]:
+        """Queue the stream's latest frame and wait for its (score, person_count, objects)."""
+        future = asyncio.get_running_loop().create_future()
+        with self._states_lock:
+            token = self._tokens.setdefault(stream_id, object())
+        previous = self._pending.get(stream_id)
+        if previous is not None and not previous[1].done():
+            # Latest frame wins; the older caller gets no score
+            self.superseded += 1
+            previous[1].set_result(None)
+        self._pending[stream_id] = (frame_bytes, future, token)
+        self._wakeup.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            if len(self._pending) < self.max_batch_size and self.max_wait_seconds > 0:
+                await asyncio.sleep(self.max_wait_seconds)
+            self._wakeup.clear()
+
+            batch: List[Tuple[str, bytes, asyncio.Future, object]] = []
+            for stream_id in list(self._pending)[: self.max_batch_size]:
+                frame_bytes, future, token = self._pending.pop(stream_id)
+                batch.append((stream_id, frame_bytes, future, token))
+            if self._pending:
+                self._wakeup.set()
+            if not batch:
+                continue
+
+            try:
+                results = await asyncio.to_thread(
+                    self._process_batch,
+                    [(stream_id, frame_bytes, token) for stream_id, frame_bytes, _, token in batch],
+                )
+            except Exception as exc:
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, _, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _process_batch(self, items: List[Tuple[str, bytes, object]]) -> List[Optional[ScoreResult]]:
+        frames = [
+            cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+            for _, frame_bytes, _ in items
+        ]
+        valid = [frame for frame in frames if frame is not None]
+        self.decode_failures += len(frames) - len(valid)
+
+        results: List[Optional[ScoreResult]] = [None] * len(frames)
+        if not valid:
+            return results
+
+        started = time.monotonic()
+        detections_list = self.detector.detect_batch(valid)
+        self._inference_time_total += time.monotonic() - started
+        self.batches += 1
+        self.frames += len(valid)
+        self.batch_size_histogram[len(valid)] = self.batch_size_histogram.get(len(valid), 0) + 1
+
+        detections_iter = iter(detections_list)
+        for index, frame in enumerate(frames):
+            if frame is None:
+                continue
+            stream_id, _, token = items[index]
+            detections = next(detections_iter)
+            with self._states_lock:
+                if self._tokens.get(stream_id) is not token:
+                    continue  # Forgotten while queued or in this batch
+                state = self._states.get(stream_id)
+                if state is None:
+                    state = self._states[stream_id] = self.detector.new_scorer_state()
+            results[index] = self.detector.calculate_danger_score(detections, frame.shape, state)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "maxBatchSize": self.max_batch_size,
+            "maxWaitSeconds": self.max_wait_seconds,
+            "batches": self.batches,
+            "frames": self.frames,
+            "superseded": self.superseded,
+            "decodeFailures": self.decode_failures,
+            "trackedStreams": len(self._states),
+            "avgBatchSize": self.frames / self.batches if self.batches else 0.0,
+            "avgBatchSeconds": self._inference_time_total / self.batches if self.batches else 0.0,
+            "inferenceFps": self.frames / self._inference_time_total if self._inference_time_total else 0.0,
+            "throughputFps": self.frames / uptime if uptime else 0.0,
+            "batchSizeHistogram": {str(size): count for size, count in sorted(self.batch_size_histogram.items())},
+        }
@@ -0,0 +1,23 @@
+from src.adaptive_interval import AdaptiveIntervalScheduler
+
+
+def test_late_verdict_after_forget_does_not_revive_the_stream():
+    scheduler = AdaptiveIntervalScheduler(base_interval=3.0, max_interval=24.0, call_budget=0.5)
+    scheduler.interval_for("gone")
+    scheduler.forget("gone")
+
+    # A Bedrock result for the disconnected camera arrives after its teardown
+    scheduler.record_verdict("gone", "CRITICAL")
+
+    assert scheduler.stats()["streams"] == {}
+    assert scheduler.interval_for("fresh") == 3.0
+
+
+def test_verdict_for_a_live_stream_is_recorded():
+    scheduler = AdaptiveIntervalScheduler(base_interval=3.0, min_interval=1.0)
+    scheduler.interval_for("cam")
+
+    scheduler.record_verdict("cam", "DANGEROUS")
+
+    assert scheduler.interval_for("cam") == 1.0
+    assert scheduler.stats()["streams"]["cam"]["urgent"] is True
@@ -0,0 +1,70 @@
+import asyncio
+
+from starlette.websockets import WebSocketState
+
+from src.alert_hub import AlertHub
+
+
+class StalledWebSocket:
+    client = "stalled"
+    application_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.close_codes = []
+
+    async def send_text(self, message):
+        await asyncio.sleep(3600)
+
+    async def close(self, code=1000):
+        self.close_codes.append(code)
+
+
+def test_timed_out_subscriber_socket_is_closed():
+    async def scenario():
+        hub = AlertHub(send_timeout=0.05)
+        websocket = StalledWebSocket()
+        subscriber = hub.subscribe(websocket)
+
+        hub.publish({"id": "a", "source": "cam"})
+        await asyncio.wait_for(subscriber.task, timeout=1.0)
+
+        assert websocket.close_codes == [1013]
+        assert subscriber.closed and hub.stats()["subscribers"] == 0
+        assert hub.send_failures == 1
+
+    asyncio.run(scenario())
+
+
+def test_stalled_publisher_subscription_leaves_its_socket_open():
+    async def scenario():
+        hub = AlertHub(send_timeout=0.05)
+        websocket = StalledWebSocket()
+        subscriber = hub.subscribe(websocket, source="cam", close_on_failure=False)
+
+        hub.publish({"id": "a", "source": "cam"})
+        await asyncio.wait_for(subscriber.task, timeout=1.0)
+
+        # Only the subscription ends; the publisher's ingest socket stays open
+        assert websocket.close_codes == []
+        assert subscriber.closed and hub.stats()["subscribers"] == 0
+        hub.publish({"id": "b", "source": "cam"})
+        assert hub.send_failures == 1
+
+    asyncio.run(scenario())
+
+
+def test_source_less_event_is_queued_once_for_wildcard_subscribers():
+    async def scenario():
+        hub = AlertHub(max_queue=2, policy="drop_oldest")
+        websocket = StalledWebSocket()
+        subscriber = hub.subscribe(websocket)
+        subscriber.task.cancel()  # Keep everything in the queue
+
+        hub.publish({"type": "reset"}, key="a")
+        hub.publish({"type": "reset"}, key="b")
+
+        assert list(subscriber.queue) == ["a", "b"]
+        assert subscriber.dropped == 0
+        await hub.unsubscribe(subscriber)
+
+    asyncio.run(scenario())
@@ -0,0 +1,35 @@
+from src.alert_journal import AlertJournal
+
+
+def test_resume_after_republished_alert_keeps_later_entries():
+    journal = AlertJournal(capacity=10)
+    journal.append("X", "cam", "x-1", now=1.0)  # seq 0, the copy the client saw
+    journal.append("Y", "cam", "y-1", now=2.0)  # seq 1
+    journal.append("X", "cam", "x-2", now=3.0)  # seq 2, incident update under the same id
+
+    entries = journal.replay(since=0, epoch=journal.epoch, now=4.0)
+
+    assert [entry[3] for entry in entries] == ["y-1", "x-2"]
+    assert journal.resumed == 1
+
+
+def test_resume_from_another_epoch_falls_back_to_window():
+    journal = AlertJournal(capacity=10)
+    journal.append("X", "cam", "x-1", now=1.0)
+    journal.append("Y", "cam", "y-1", now=2.0)
+
+    entries = journal.replay(since=0, epoch="other-run", limit=1, now=3.0)
+
+    assert [entry[3] for entry in entries] == ["y-1"]
+    assert journal.resume_misses == 1
+
+
+def test_resume_after_aged_out_sequence_is_a_miss():
+    journal = AlertJournal(capacity=2)
+    for seq in range(4):
+        journal.append(f"A{seq}", "cam", f"a-{seq}", now=float(seq))
+
+    entries = journal.replay(since=0, epoch=journal.epoch, limit=5, now=5.0)
+
+    assert [entry[3] for entry in entries] == ["a-2", "a-3"]
+    assert journal.resume_misses == 1
@@ -0,0 +1,19 @@
+import asyncio
+
+from src import db_queries
+
+
+def test_create_stream_for_a_known_url_emits_nothing(monkeypatch):
+    async def scenario():
+        events = []
+        monkeypatch.setattr(db_queries, "_stream_listeners", [lambda event, stream: events.append(event)])
+        try:
+            first = await db_queries.create_stream("rtsp://cam")
+            again = await db_queries.create_stream("rtsp://cam")
+
+            assert again == first
+            assert events == ["added"]
+        finally:
+            await db_queries.reset_stream_store()
+
+    asyncio.run(scenario())
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from src import hls_recorder
+from src.hls_recorder import HLSRecorder, parse_hls_ladder
+
+FFMPEG = shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+
+
+class CapturedProcess:
+    returncode = None
+    stdin = None
+    stderr = None
+
+
+def capture_command(monkeypatch):
+    commands = []
+
+    async def fake_exec(*cmd, **kwargs):
+        commands.append(list(cmd))
+        return CapturedProcess()
+
+    monkeypatch.setattr(hls_recorder.asyncio, "create_subprocess_exec", fake_exec)
+    return commands
+
+
+def option(cmd, name):
+    return [cmd[index + 1] for index, arg in enumerate(cmd[:-1]) if arg == name]
+
+
+def test_parse_hls_ladder_orders_rungs_and_rejects_bad_specs():
+    ladder = parse_hls_ladder("360p:800k, 1080p:5000k,720p:2.8M")
+
+    assert [variant.name for variant in ladder] == ["1080p", "720p", "360p"]
+    assert [variant.bitrate for variant in ladder] == ["5000k", "2.8M", "800k"]
+    assert parse_hls_ladder("") == []
+    with pytest.raises(ValueError):
+        parse_hls_ladder("720:2800k")
+    with pytest.raises(ValueError):
+        parse_hls_ladder("720p:2800k,720p:1000k")
+
+
+def test_ladder_command_splits_one_decode_into_every_variant(monkeypatch, tmp_path):
+    commands = capture_command(monkeypatch)
+    recorder = HLSRecorder(
+        "ffmpeg",
+        tmp_path,
+        segment_seconds=2.0,
+        target_fps=25,
+        variants=parse_hls_ladder("720p:2800k,360p:800k"),
+    )
+
+    asyncio.run(recorder._ensure_process())
+
+    [cmd] = commands
+    assert option(cmd, "-filter_complex") == [
+        "[0:v]fps=25,split=2[s0][s1];"
+        "[s0]scale=-2:'min(720,ih)'[v0];"
+        "[s1]scale=-2:'min(360,ih)'[v1]"
+    ]
+    assert option(cmd, "-map") == ["[v0]", "[v1]"]
+    assert option(cmd, "-b:v:0") == ["2800k"] and option(cmd, "-b:v:1") == ["800k"]
+    assert option(cmd, "-g") == ["50"] and option(cmd, "-sc_threshold") == ["0"]
+    assert option(cmd, "-master_pl_name") == ["master.m3u8"]
+    assert option(cmd, "-var_stream_map") == ["v:0,name:720p v:1,name:360p"]
+    assert cmd[-1] == str(tmp_path / "%v" / "index.m3u8")
+    assert (tmp_path / "720p").is_dir() and (tmp_path / "360p").is_dir()
+    assert recorder.playlist_name == "master.m3u8"
+    assert recorder.preview_playlist_name == "360p/index.m3u8"
+
+
+def test_preview_command_encodes_a_second_low_fps_rendition(monkeypatch, tmp_path):
+    commands = capture_command(monkeypatch)
+    recorder = HLSRecorder("ffmpeg", tmp_path, segment_seconds=2.0, preview_height=320, preview_fps=5)
+
+    asyncio.run(recorder._ensure_process())
+
+    [cmd] = commands
+    assert option(cmd, "-filter_complex") == [
+        "[0:v]fps=25.0,split=2[main][small];[small]fps=5,scale=-2:'min(320,ih)'[preview]"
+    ]
+    assert option(cmd, "-map") == ["[main]", "[preview]"]
+    assert option(cmd, "-g") == ["10"]
+    assert str(tmp_path / "index.m3u8") in cmd
+    assert cmd[-1] == str(tmp_path / "preview" / "index.m3u8")
+    assert recorder.playlist_name == "index.m3u8"
+    assert recorder.preview_playlist_name == "preview/index.m3u8"
+
+
+async def record_frames(recorder, count):
+    for index in range(count):
+        frame = np.full((240, 320, 3), index * 4 % 256, dtype=np.uint8)
+        ok, jpeg = cv2.imencode(".jpg", frame)
+        await recorder.write(jpeg.tobytes())
+    await recorder.stop()
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg is not installed")
+def test_ffmpeg_writes_master_and_variant_playlists(tmp_path):
+    recorder = HLSRecorder(
+        FFMPEG,
+        tmp_path,
+        segment_seconds=1.0,
+        variants=parse_hls_ladder("240p:400k,120p:150k"),
+    )
+
+    asyncio.run(record_frames(recorder, 75))
+
+    master = (tmp_path / "master.m3u8").read_text()
+    assert master.count("#EXT-X-STREAM-INF") == 2
+    assert "240p/index.m3u8" in master and "120p/index.m3u8" in master
+    for name in ("240p", "120p"):
+        playlist = (tmp_path / name / "index.m3u8").read_text()
+        assert "#EXTINF" in playlist
+        assert list((tmp_path / name).glob("segment_*.ts"))
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg is not installed")
+def test_ffmpeg_writes_the_preview_rendition(tmp_path):
+    recorder = HLSRecorder(FFMPEG, tmp_path, segment_seconds=1.0, preview_height=120)
+
+    asyncio.run(record_frames(recorder, 75))
+
+    assert "#EXTINF" in (tmp_path / "index.m3u8").read_text()
+    assert "#EXTINF" in (tmp_path / "preview" / "index.m3u8").read_text()
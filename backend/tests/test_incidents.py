@@ -0,0 +1,50 @@
+from src.incidents import IncidentTracker
+
+
+def test_forget_flushes_suppressed_repeats():
+    tracker = IncidentTracker(window_seconds=120.0, update_interval=10.0)
+    incident, emitted, _ = tracker.observe("cam", "DANGEROUS", "fight", now=0.0)
+    assert emitted
+    for now in (1.0, 2.0, 3.0):
+        _, emitted, _ = tracker.observe("cam", "DANGEROUS", "fight", now=now)
+        assert not emitted
+
+    closed = tracker.forget("cam", now=4.0)
+
+    assert closed is incident
+    assert (closed.count, closed.last_seen) == (4, 3.0)
+    assert tracker.forget("cam", now=5.0) is None
+
+
+def test_forget_skips_incidents_that_already_ended():
+    tracker = IncidentTracker(window_seconds=120.0, update_interval=10.0)
+    tracker.observe("cam", "CRITICAL", "fire", now=0.0)
+
+    assert tracker.forget("cam", now=500.0) is None
+
+
+def test_alert_after_the_window_closes_the_expired_incident_first():
+    tracker = IncidentTracker(window_seconds=120.0, update_interval=10.0)
+    old, _, _ = tracker.observe("cam", "DANGEROUS", "fight", now=0.0)
+    tracker.observe("cam", "DANGEROUS", "fight", now=1.0)  # Suppressed repeat
+
+    incident, emitted, closed = tracker.observe("cam", "CRITICAL", "fire", now=200.0)
+
+    assert closed is old and (closed.count, closed.emitted_count) == (2, 2)
+    assert emitted and incident is not old and incident.count == 1
+    _, _, closed = tracker.observe("cam", "CRITICAL", "fire", now=201.0)
+    assert closed is None
+
+
+def test_expire_closes_incidents_whose_window_ran_out():
+    tracker = IncidentTracker(window_seconds=120.0, update_interval=10.0)
+    quiet, _, _ = tracker.observe("quiet", "DANGEROUS", "fight", now=0.0)
+    tracker.observe("quiet", "DANGEROUS", "fight", now=1.0)  # Suppressed repeat
+    tracker.observe("emitted", "CRITICAL", "fire", now=0.0)
+    tracker.observe("ongoing", "CRITICAL", "fire", now=100.0)
+
+    assert tracker.expire(now=150.0) == [quiet]
+    assert quiet.emitted_count == 2
+    assert tracker.forget("emitted", now=150.0) is None  # Already expired without a pending update
+    assert tracker.forget("ongoing", now=150.0) is not None
+    assert tracker.stats()["closed"] == 2
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+from src.inference_scheduler import InferenceScheduler
+
+
+def test_discard_then_submit_keeps_one_call_in_flight_per_stream():
+    async def scenario():
+        lock = threading.Lock()
+        running = {"cam": 0, "max": 0}
+
+        def analyze(payload):
+            stream_id, seconds = payload
+            with lock:
+                running[stream_id] = running.get(stream_id, 0) + 1
+                running["max"] = max(running["max"], running["cam"])
+            time.sleep(seconds)
+            with lock:
+                running[stream_id] -= 1
+            return payload
+
+        results = []
+
+        async def on_result(result):
+            results.append(result)
+
+        scheduler = InferenceScheduler(analyze, max_concurrency=2)
+        scheduler.submit("other", ("other", 0.02), on_result)
+        scheduler.submit("cam", ("cam", 0.1), on_result)
+        scheduler.discard("cam")
+        scheduler.submit("cam", ("cam", 0.1), on_result)  # Must not queue "cam" a second time
+        scheduler.start()
+        await asyncio.sleep(0.01)
+        scheduler.submit("cam", ("cam", 0.1), on_result)  # Arrives while "cam" is in flight
+        await asyncio.sleep(0.4)
+        await scheduler.stop()
+
+        assert running["max"] == 1
+        assert len(results) == 3
+
+    asyncio.run(scenario())
+
+
+def test_discard_drops_stream_stats():
+    async def scenario():
+        async def on_result(result):
+            pass
+
+        scheduler = InferenceScheduler(lambda payload: payload)
+        scheduler.submit("webcam-1", 1, on_result)
+        scheduler.discard("webcam-1")
+
+        assert scheduler.stats()["streams"] == {}
+
+    asyncio.run(scenario())
+
+
+def test_stop_clears_per_stream_state_and_restart_serves_new_frames():
+    async def scenario():
+        results = []
+
+        async def on_result(result):
+            results.append(result)
+
+        scheduler = InferenceScheduler(lambda payload: payload, max_concurrency=1)
+        scheduler.submit("cam", "stale", on_result)
+        await scheduler.stop()
+
+        assert scheduler.stats()["pending"] == 0 and scheduler.stats()["streams"] == {}
+        assert scheduler._ready.empty() and not scheduler._queued and not scheduler._in_flight
+
+        scheduler.start()
+        scheduler.submit("cam", "fresh", on_result)
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+
+        assert results == ["fresh"]
+
+    asyncio.run(scenario())
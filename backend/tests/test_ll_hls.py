@@ -0,0 +1,174 @@
+import asyncio
+import os
+import shutil
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from src.ll_hls import LowLatencyPlaylist, fragment_starts_with_keyframe
+
+
+def box(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def fragment(keyframe):
+    """A moof whose trun carries the first sample's flags, as ffmpeg's fMP4 muxer writes it."""
+    first_sample_flags = 0x02000000 if keyframe else 0x01010000
+    tfhd = box(b"tfhd", struct.pack(">I", 0x020000) + struct.pack(">I", 1))
+    trun = box(b"trun", struct.pack(">II", 0x000305, 1) + struct.pack(">iIII", 0, first_sample_flags, 40, 100))
+    return box(b"moof", box(b"mfhd", struct.pack(">II", 0, 1)) + box(b"traf", tfhd + trun)) + box(b"mdat", b"x")
+
+
+def write_parts(playlist, first, count, duration=0.4, keyframes=None):
+    """ffmpeg's playlist for fragments ``first``.. of the current run (keyframes: part -> bool)."""
+    directory = playlist.directory
+    pattern = playlist.fragment_pattern()
+    lines = ["#EXTM3U", f"#EXT-X-MEDIA-SEQUENCE:{first}", f'#EXT-X-MAP:URI="{playlist.init_name()}"']
+    for index in range(first, first + count):
+        name = pattern % index
+        data = fragment(keyframes(index)) if keyframes else b"part"
+        (directory / name).write_bytes(data)
+        lines += [f"#EXTINF:{duration:.6f},", name]
+    (directory / playlist.parts_playlist_name()).write_text("\n".join(lines) + "\n")
+    playlist._mtime = None
+
+
+def test_window_is_bounded_and_expired_parts_are_deleted(tmp_path):
+    async def scenario():
+        playlist = LowLatencyPlaylist(tmp_path, part_duration=0.4, parts_per_segment=5)
+        assert playlist.max_segments == 90  # Three minutes of 2s segments by default
+
+        playlist.max_segments = 2
+        for first in range(0, 40, 10):
+            write_parts(playlist, first, 10)
+            await playlist.refresh()
+
+        assert [part.msn for part in playlist.parts] == [5] * 5 + [6] * 5 + [7] * 5
+        assert not (tmp_path / (playlist.fragment_pattern() % 24)).exists()
+        assert (tmp_path / (playlist.fragment_pattern() % 25)).exists()
+        assert playlist.deleted_parts == 25
+
+    asyncio.run(scenario())
+
+
+def test_targets_follow_the_longest_part_and_segment(tmp_path):
+    async def scenario():
+        playlist = LowLatencyPlaylist(tmp_path, part_duration=0.4, parts_per_segment=5)
+        write_parts(playlist, 0, 10, duration=0.52, keyframes=lambda index: index % 5 == 0)
+        await playlist.refresh()
+
+        text = playlist.render()
+
+        assert "#EXT-X-PART-INF:PART-TARGET=0.52000" in text
+        assert "PART-HOLD-BACK=1.560" in text
+        assert "#EXTINF:2.60000," in text
+        assert "#EXT-X-TARGETDURATION:3" in text
+
+    asyncio.run(scenario())
+
+
+def test_segments_start_on_the_fragments_that_hold_keyframes(tmp_path):
+    async def scenario():
+        playlist = LowLatencyPlaylist(tmp_path, part_duration=0.4, parts_per_segment=5)
+        keyframes = {0, 3, 9, 14}
+        write_parts(playlist, 0, 15, keyframes=lambda index: index in keyframes)
+        await playlist.refresh()
+
+        assert [(part.msn, part.number) for part in playlist.parts][:4] == [(0, 0), (0, 1), (0, 2), (1, 0)]
+        assert playlist.position() == (3, 0)
+        assert [part.uri for part in playlist.segment_parts(1)] == [playlist.fragment_pattern() % index for index in range(3, 9)]
+        assert playlist.has(2, 7)  # Past the end of segment 2: satisfied by segment 3
+        assert not playlist.has(3, None)
+        text = playlist.render()
+        assert text.count("INDEPENDENT=YES") == 3  # Parts of the last three segments
+        assert "ll/2.m4s" in text and "ll/3.m4s" not in text
+
+    asyncio.run(scenario())
+
+
+def test_restarted_ffmpeg_continues_the_media_sequence(tmp_path):
+    async def scenario():
+        playlist = LowLatencyPlaylist(tmp_path, part_duration=0.4, parts_per_segment=5, max_segments=2)
+        playlist.new_run()
+        write_parts(playlist, 0, 12)
+        await playlist.refresh()
+        assert playlist.position() == (2, 1)
+
+        playlist.new_run()  # ffmpeg relaunched: its fragments count from zero again
+        write_parts(playlist, 0, 5)
+        await playlist.refresh()
+
+        assert playlist.position() == (3, 4)
+        text = playlist.render()
+        assert "#EXT-X-MEDIA-SEQUENCE:1" in text
+        assert text.index("#EXT-X-DISCONTINUITY\n") < text.index(f'#EXT-X-MAP:URI="{playlist.init_name(1)}"')
+        assert "#EXTINF:0.80000,\nll/2.m4s" in text  # Cut short by the restart
+
+        write_parts(playlist, 5, 15)
+        await playlist.refresh()
+        text = playlist.render()
+        assert "#EXT-X-MEDIA-SEQUENCE:4" in text and "#EXT-X-DISCONTINUITY-SEQUENCE:1" in text
+        assert playlist.init_name(0) not in text
+        assert not (tmp_path / f"part_{playlist.run_name(0)}_000011.m4s").exists()
+
+    asyncio.run(scenario())
+
+
+def test_new_instance_ignores_and_removes_a_previous_sessions_files(tmp_path):
+    async def scenario():
+        previous = LowLatencyPlaylist(tmp_path, part_duration=0.4, parts_per_segment=5)
+        previous.new_run()
+        write_parts(previous, 0, 13)
+        (tmp_path / previous.init_name()).write_bytes(b"init")
+        (tmp_path / "playlist.m3u8").write_text("#EXTM3U\n")
+
+        playlist = LowLatencyPlaylist(tmp_path, part_duration=0.4, parts_per_segment=5)
+        assert playlist.remove_stale_files() == 15
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["playlist.m3u8"]
+
+        playlist.new_run()
+        write_parts(playlist, 0, 3)
+        await playlist.refresh()
+        assert [part.uri for part in playlist.parts] == [playlist.fragment_pattern() % index for index in range(3)]
+
+    asyncio.run(scenario())
+
+
+def test_keyframe_is_read_from_the_first_sample_flags():
+    assert fragment_starts_with_keyframe(fragment(True)) is True
+    assert fragment_starts_with_keyframe(fragment(False)) is False
+    assert fragment_starts_with_keyframe(b"part") is None
+
+
+FFMPEG = shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg is not installed")
+def test_ffmpeg_fragments_start_segments_on_keyframes(tmp_path):
+    from src.hls_recorder import HLSRecorder
+
+    async def scenario():
+        recorder = HLSRecorder(FFMPEG, tmp_path, segment_seconds=1.0, target_fps=10, low_latency=True, part_seconds=0.2)
+        playlist = recorder.ll_playlist
+        frame = cv2.imencode(".jpg", np.zeros((120, 160, 3), dtype=np.uint8))[1].tobytes()
+        await recorder.setup()
+        try:
+            for _ in range(50):
+                await recorder.write(frame)
+                await asyncio.sleep(0.1)
+            await asyncio.sleep(0.5)
+            await playlist.refresh()
+        finally:
+            await recorder.stop()
+
+        # The encoder trails the input by a few seconds; at least one segment is complete
+        assert playlist.position()[0] >= 1
+        assert len(playlist.segment_parts(0)) == 5
+        for part in playlist.parts:
+            assert part.independent == (part.number == 0)
+        assert "#EXT-X-PART-INF:PART-TARGET=" in playlist.render()
+
+    asyncio.run(scenario())
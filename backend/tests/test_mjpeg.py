@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from src import mjpeg
+from src.mjpeg import MjpegPreviews, MjpegRenditions
+
+
+def test_cancelled_first_viewer_does_not_strand_the_others(monkeypatch):
+    def slow_downscale(frame_bytes, max_height, quality=70):
+        time.sleep(0.2)
+        return b"small"
+
+    monkeypatch.setattr(mjpeg, "downscale_jpeg", slow_downscale)
+
+    async def scenario():
+        renditions = MjpegRenditions()
+        first = asyncio.create_task(renditions.chunk_for("cam", 360, 1, b"frame"))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(renditions.chunk_for("cam", 360, 1, b"frame"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+
+        chunk = await asyncio.wait_for(second, timeout=2.0)
+
+        assert first.cancelled()
+        assert chunk is not None and b"small" in chunk
+        assert (renditions.transcodes, renditions.shared) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_downscale_jpeg_caps_the_height():
+    import cv2
+    import numpy as np
+
+    ok, encoded = cv2.imencode(".jpg", np.zeros((1080, 1920, 3), dtype=np.uint8))
+    assert ok
+
+    scaled = mjpeg.downscale_jpeg(encoded.tobytes(), 360)
+
+    assert cv2.imdecode(np.frombuffer(scaled, dtype=np.uint8), cv2.IMREAD_COLOR).shape == (360, 640, 3)
+    assert mjpeg.downscale_jpeg(encoded.tobytes(), 1080) == encoded.tobytes()
+    assert mjpeg.downscale_jpeg(b"not a jpeg", 360) is None
+
+
+def encode_frame(height, width):
+    import cv2
+    import numpy as np
+
+    ok, encoded = cv2.imencode(".jpg", np.zeros((height, width, 3), dtype=np.uint8))
+    assert ok
+    return encoded.tobytes()
+
+
+def test_preview_renders_only_while_watched_and_at_its_frame_rate():
+    import cv2
+    import numpy as np
+
+    async def scenario():
+        previews = MjpegPreviews(max_height=180, fps=5)
+        frame = encode_frame(720, 1280)
+        previews.offer("cam", frame, now=0.0)  # Nobody watching yet
+
+        preview = previews.add_viewer("cam")
+        assert previews.add_viewer("cam") is preview
+        previews.offer("cam", frame, now=1.0)
+        seq, chunk = await asyncio.wait_for(preview.wait_for_frame(0, timeout=2.0), timeout=3.0)
+        previews.offer("cam", frame, now=1.1)  # Inside the 0.2 s frame interval
+
+        assert seq == 1
+        jpeg = chunk[chunk.index(b"\r\n\r\n") + 4:-2]
+        assert cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR).shape == (180, 320, 3)
+        assert await preview.wait_for_frame(1, timeout=0.05) is None
+        assert previews.stats()["rendered"] == 1 and previews.stats()["viewers"] == 2
+
+        previews.remove_viewer("cam")
+        previews.remove_viewer("cam")
+        assert previews.stats()["streams"] == 0
+
+    asyncio.run(scenario())
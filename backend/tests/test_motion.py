@@ -0,0 +1,62 @@
+import asyncio
+
+import cv2
+import numpy as np
+
+from src.motion import SceneChangeGate
+
+
+def encode_frame(brightness: int, box: bool = False) -> bytes:
+    frame = np.full((240, 320, 3), brightness, dtype=np.uint8)
+    if box:
+        cv2.rectangle(frame, (40, 40), (280, 200), (255, 255, 255), thickness=-1)
+    ok, jpeg = cv2.imencode(".jpg", frame)
+    assert ok
+    return jpeg.tobytes()
+
+
+def test_static_scene_is_skipped_when_due():
+    async def scenario():
+        gate = SceneChangeGate()
+        still = encode_frame(60)
+
+        assert await gate.should_analyze("cam", still, now=0.0, due=True)
+        assert not await gate.should_analyze("cam", still, now=5.0, due=True)
+
+        assert gate.stats()["skippedStatic"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_motion_between_intervals_triggers_early_analysis():
+    async def scenario():
+        gate = SceneChangeGate(sample_interval=0.25, min_trigger_interval=1.0)
+        still, moved = encode_frame(60), encode_frame(60, box=True)
+
+        assert await gate.should_analyze("cam", still, now=0.0, due=True)
+        assert not await gate.should_analyze("cam", still, now=0.5, due=False)
+        # Inside the sampling interval the frame is not even decoded
+        assert not await gate.should_analyze("cam", moved, now=0.6, due=False)
+        assert await gate.should_analyze("cam", moved, now=1.0, due=False)
+
+        stats = gate.stats()
+        assert stats["triggeredByMotion"] == 1
+        assert stats["samples"] == 3
+        assert gate.motion_level("cam") >= gate.motion_threshold
+
+    asyncio.run(scenario())
+
+
+def test_forget_starts_the_stream_over():
+    async def scenario():
+        gate = SceneChangeGate()
+        still = encode_frame(60)
+        assert await gate.should_analyze("cam", still, now=0.0, due=True)
+
+        gate.forget("cam")
+
+        # Without a reference frame the next due frame is analyzed again
+        assert await gate.should_analyze("cam", still, now=5.0, due=True)
+        assert gate.motion_level("cam") == 0.0
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+
+from src.prefilter import PrefilterGate
+
+
+class FakeWorker:
+    def __init__(self):
+        self.forgotten = []
+
+    async def score(self, stream_id, frame_bytes):
+        return 0.0, 0, []
+
+    def forget(self, stream_id):
+        self.forgotten.append(stream_id)
+
+    def stats(self):
+        return {}
+
+
+def test_forget_drops_stream_stats():
+    async def scenario():
+        worker = FakeWorker()
+        gate = PrefilterGate(worker, max_skip_seconds=0)
+        assert await gate.should_escalate("webcam-1", b"frame") is False
+        assert "webcam-1" in gate.stats()["streams"]
+
+        gate.forget("webcam-1")
+
+        assert gate.stats()["streams"] == {}
+        assert worker.forgotten == ["webcam-1"]
+
+    asyncio.run(scenario())
+
+
+def test_busy_stream_is_skipped_not_scored_quiet():
+    async def scenario():
+        release = asyncio.Event()
+
+        class SlowWorker(FakeWorker):
+            async def score(self, stream_id, frame_bytes):
+                await release.wait()
+                return 0.0, 0, []
+
+        gate = PrefilterGate(SlowWorker(), max_skip_seconds=0)
+        first = asyncio.create_task(gate.should_escalate("webcam-1", b"frame"))
+        await asyncio.sleep(0)
+
+        assert await gate.should_escalate("webcam-1", b"frame") is None
+        release.set()
+        assert await first is False
+        assert gate.stats()["skippedBusy"] == 1 and gate.stats()["suppressed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_score_landing_after_forget_leaves_no_state():
+    async def scenario():
+        release = asyncio.Event()
+
+        class SlowWorker(FakeWorker):
+            async def score(self, stream_id, frame_bytes):
+                await release.wait()
+                return 10.0, 3, []
+
+        gate = PrefilterGate(SlowWorker(), max_skip_seconds=0)
+        pending = asyncio.create_task(gate.should_escalate("webcam-1", b"frame"))
+        await asyncio.sleep(0)
+
+        gate.forget("webcam-1")
+        release.set()
+
+        assert await pending is None
+        assert gate.stats()["streams"] == {} and gate._last_escalation == {}
+        assert await gate.should_escalate("webcam-1", b"frame") is True  # Usable again
+
+    asyncio.run(scenario())
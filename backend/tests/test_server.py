@@ -0,0 +1,172 @@
+import asyncio
+import os
+
+import httpx
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("YOLO_PREFILTER_ENABLED", "false")
+
+from src import db_queries, server  # noqa: E402
+from src.webcam_ingest import WebcamStream  # noqa: E402
+
+
+def test_result_for_a_disconnected_webcam_is_dropped(monkeypatch):
+    async def scenario():
+        tracker = server.incident_tracker
+        live = WebcamStream("webcam-live", recorder=None)
+        live.active = True
+        gone = WebcamStream("webcam-gone", recorder=None)  # Released: inactive, evicted
+        monkeypatch.setitem(server.webcam_registry._streams, live.stream_id, live)
+        server.analysis_intervals.interval_for(live.stream_id)
+        try:
+            await server.publish_analysis_result(gone, ("CRITICAL", "fire"))
+            await server.publish_analysis_result(live, ("CRITICAL", "fire"))
+
+            streams = server.analysis_intervals.stats()["streams"]
+            assert "webcam-gone" not in streams
+            assert streams["webcam-live"]["urgent"] is True
+            if tracker is not None:
+                assert tracker.forget("webcam-gone") is None
+                assert tracker.forget("webcam-live") is not None
+        finally:
+            server.analysis_intervals.forget(live.stream_id)
+
+    asyncio.run(scenario())
+
+
+def test_late_verdict_for_a_disconnected_webcam_is_not_cached(monkeypatch):
+    import cv2
+    import numpy as np
+
+    from src.verdict_cache import VerdictCache
+
+    async def scenario():
+        cache = VerdictCache()
+        callbacks = []
+        monkeypatch.setattr(server, "verdict_cache", cache)
+        monkeypatch.setattr(server, "prefilter_gate", None)
+        monkeypatch.setattr(server.inference_scheduler, "submit", lambda stream_id, payload, on_result: callbacks.append(on_result))
+        stream = WebcamStream("webcam-late", recorder=None)
+        stream.active = True
+        monkeypatch.setitem(server.webcam_registry._streams, stream.stream_id, stream)
+        frame = cv2.imencode(".jpg", np.full((64, 64, 3), 128, dtype=np.uint8))[1].tobytes()
+
+        await server.analyze_webcam_frame(stream, frame)
+        # The publisher disconnects (and the cache forgets the stream) before Bedrock answers
+        stream.active = False
+        del server.webcam_registry._streams[stream.stream_id]
+        cache.forget(stream.stream_id)
+        await callbacks[0](("DANGEROUS", "fight"))
+
+        assert cache.stats()["entries"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_skipped_prefilter_frame_leaves_interval_state_unchanged(monkeypatch):
+    class FakeGate:
+        def __init__(self, verdicts):
+            self.verdicts = verdicts
+
+        async def should_escalate(self, stream_id, frame_bytes):
+            return self.verdicts.pop(0)
+
+    async def scenario():
+        stream = WebcamStream("webcam-prefilter", recorder=None)
+        intervals = server.analysis_intervals
+        monkeypatch.setattr(server, "verdict_cache", None)
+        monkeypatch.setattr(server, "prefilter_gate", FakeGate([None, False]))
+        intervals.interval_for(stream.stream_id)
+        try:
+            await server.analyze_webcam_frame(stream, b"frame")
+            assert intervals.stats()["streams"][stream.stream_id]["lastLevel"] is None
+
+            await server.analyze_webcam_frame(stream, b"frame")
+            assert intervals.stats()["streams"][stream.stream_id]["lastLevel"] == "NORMAL"
+        finally:
+            intervals.forget(stream.stream_id)
+
+    asyncio.run(scenario())
+
+
+def test_stream_list_etag_revalidates_and_long_polls():
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            try:
+                first = await client.get("/api/streams")
+                etag = first.headers["etag"]
+                revalidated = await client.get("/api/streams", headers={"If-None-Match": etag})
+                expired = await client.get("/api/streams?wait=0.05", headers={"If-None-Match": etag})
+                assert first.status_code == 200
+                assert revalidated.status_code == 304 and revalidated.content == b""
+                assert expired.status_code == 304
+
+                waiting = asyncio.create_task(
+                    client.get("/api/streams?wait=5", headers={"If-None-Match": etag})
+                )
+                await asyncio.sleep(0.05)
+                await db_queries.create_stream("rtsp://etag-test")
+                changed = await asyncio.wait_for(waiting, timeout=2.0)
+
+                assert changed.status_code == 200
+                assert changed.headers["etag"] != etag
+                assert "rtsp://etag-test" in changed.text
+            finally:
+                await db_queries.reset_stream_store()
+
+    asyncio.run(scenario())
+
+
+def test_long_poll_sees_a_change_made_while_the_body_was_built():
+    from types import SimpleNamespace
+
+    async def scenario():
+        bodies = [(b"old", '"old"'), (b"new", '"new"')]
+
+        async def build_body():
+            # The streams change after this build read them but before it returns
+            server.stream_changes.notify()
+            return bodies.pop(0)
+
+        request = SimpleNamespace(headers={"if-none-match": '"old"'})
+        response = await asyncio.wait_for(
+            server.conditional_json_response(request, build_body, wait=30.0), timeout=2.0
+        )
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"new"'
+
+    asyncio.run(scenario())
+
+
+def test_bulk_video_registration_yields_and_emits_one_reset(monkeypatch):
+    async def scenario():
+        events = []
+        monkeypatch.setattr(db_queries, "_stream_listeners", [lambda event, stream: events.append(event)])
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        tick_task = asyncio.create_task(ticker())
+        try:
+            names = [f"bulk-{index}.mp4" for index in range(1000)]
+            await server.register_video_files(names)
+            await server.register_video_files(["single.mp4"])
+            assert events == ["reset", "added"]
+            assert ticks >= (len(names) - 1) // server.VIDEOS_REGISTER_BATCH
+
+            events.clear()
+            await server.unregister_video_files(names + ["single.mp4"])
+            assert events == ["reset"]
+        finally:
+            tick_task.cancel()
+            await db_queries.reset_stream_store()
+
+    asyncio.run(scenario())
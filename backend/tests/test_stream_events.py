@@ -0,0 +1,64 @@
+import asyncio
+
+from src.alert_hub import AlertHub
+from src.stream_events import StreamChangeFeed
+
+
+class RecordingWebSocket:
+    client = "recording"
+
+    def __init__(self):
+        self.messages = []
+
+    async def send_text(self, message):
+        self.messages.append(message)
+
+    async def close(self, code=1000):
+        pass
+
+
+def test_resume_replays_only_the_subscribed_streams_events():
+    async def scenario():
+        feed = StreamChangeFeed(AlertHub())
+        feed.publish("added", "1", {"id": "1"})
+        feed.publish("added", "2", {"id": "2"})
+        feed.publish("removed", "1", {"id": "1"})
+
+        subscriber = feed.subscribe(RecordingWebSocket(), since=1, stream_id="1")
+
+        assert list(subscriber.queue) == ["3"]
+        await feed.hub.unsubscribe(subscriber)
+
+    asyncio.run(scenario())
+
+
+def test_resume_past_the_history_needs_a_snapshot():
+    async def scenario():
+        feed = StreamChangeFeed(AlertHub(), history=2)
+        for stream_id in ("1", "2", "3"):
+            feed.publish("added", stream_id, {"id": stream_id})
+
+        assert feed.can_resume(feed.epoch, 1)
+        assert not feed.can_resume(feed.epoch, 0)
+        assert not feed.can_resume("another-run", 3)
+        assert feed.subscribe(RecordingWebSocket(), since=0) is None
+
+    asyncio.run(scenario())
+
+
+def test_filtered_subscriber_receives_resets_live_and_on_replay():
+    async def scenario():
+        feed = StreamChangeFeed(AlertHub())
+        feed.publish("added", "1", {"id": "1"})
+        feed.publish("reset", None)
+        feed.publish("added", "2", {"id": "2"})
+
+        subscriber = feed.subscribe(RecordingWebSocket(), since=0, stream_id="1")
+        subscriber.task.cancel()  # Keep everything in the queue
+        feed.publish("reset", None)
+        feed.publish("removed", "2", {"id": "2"})
+
+        assert list(subscriber.queue) == ["1", "2", "4"]
+        await feed.hub.unsubscribe(subscriber)
+
+    asyncio.run(scenario())
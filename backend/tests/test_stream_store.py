@@ -0,0 +1,54 @@
+import asyncio
+
+from src.stream_store import MemoryStreamStore, SqlStreamStore
+
+
+def test_sql_version_changes_when_a_deleted_id_is_reused(tmp_path):
+    async def scenario():
+        store = SqlStreamStore(f"sqlite:///{tmp_path / 'streams.db'}")
+        await store.open()
+        try:
+            await store.get_or_create_stream("rtsp://a")
+            second, _ = await store.get_or_create_stream("rtsp://b")
+            before = await store.streams_version()
+            await store.delete_stream_by_url("rtsp://b")
+            reused, _ = await store.get_or_create_stream("rtsp://c")
+            # SQLite hands the freed rowid out again, so (count, max id) would not change
+            assert reused["id"] == second["id"]
+            assert await store.streams_version() != before
+        finally:
+            await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_sql_version_ignores_duplicate_create(tmp_path):
+    async def scenario():
+        store = SqlStreamStore(f"sqlite:///{tmp_path / 'streams.db'}")
+        await store.open()
+        try:
+            first, created = await store.get_or_create_stream("rtsp://a")
+            before = await store.streams_version()
+            assert created
+            assert await store.get_or_create_stream("rtsp://a") == (first, False)
+            assert await store.streams_version() == before
+        finally:
+            await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_memory_get_or_create_stream_dedupes_urls():
+    async def scenario():
+        store = MemoryStreamStore()
+        await store.open()
+        first, _ = await store.get_or_create_stream("rtsp://a")
+        version = store.version
+
+        again, created = await store.get_or_create_stream("rtsp://a")
+        assert again is first and not created
+        assert store.version == version
+        assert await store.delete_stream_by_url("rtsp://a") == first
+        assert await store.get_all_streams() == []
+
+    asyncio.run(scenario())
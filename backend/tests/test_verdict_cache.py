@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+
+from src.verdict_cache import VerdictCache, perceptual_hash
+
+
+def encode_frame(frame: np.ndarray, quality: int = 90) -> bytes:
+    ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    assert ok
+    return jpeg.tobytes()
+
+
+def gradient_frame(flip: bool = False) -> np.ndarray:
+    ramp = np.tile(np.linspace(0, 255, 320, dtype=np.uint8), (240, 1))
+    if flip:
+        ramp = ramp[:, ::-1]
+    return np.dstack([ramp] * 3)
+
+
+def test_recompressed_frame_hashes_close_and_different_scene_far():
+    original = perceptual_hash(encode_frame(gradient_frame(), quality=95))
+    recompressed = perceptual_hash(encode_frame(gradient_frame(), quality=40))
+    flipped = perceptual_hash(encode_frame(gradient_frame(flip=True)))
+
+    assert (original ^ recompressed).bit_count() <= 4
+    assert (original ^ flipped).bit_count() > 32
+    assert perceptual_hash(b"not a jpeg") is None
+
+
+def test_lookup_hits_within_distance_per_stream():
+    cache = VerdictCache(max_distance=2)
+    cache.put("cam-a", 0b1111, ("HIGH", "fight"))
+
+    assert cache.get("cam-a", 0b1101) == ("HIGH", "fight")
+    assert cache.get("cam-a", 0b0001) is None
+    assert cache.get("cam-b", 0b1111) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_expired_and_evicted_entries_miss(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("src.verdict_cache.time.monotonic", lambda: clock[0])
+    cache = VerdictCache(ttl_seconds=10.0, max_distance=0, max_entries_per_stream=2)
+    cache.put("cam", 1, ("LOW", "a"))
+    cache.put("cam", 2, ("LOW", "b"))
+    cache.put("cam", 3, ("LOW", "c"))
+
+    assert cache.get("cam", 1) is None
+    assert cache.stats()["evicted"] == 1
+
+    clock[0] += 11.0
+    assert cache.get("cam", 3) is None
+    assert cache.stats()["expired"] == 2
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import time
+
+from src.videos_watcher import VideosFolderWatcher
+
+
+def test_new_file_is_reported_once_it_stops_growing(tmp_path):
+    async def scenario():
+        added = []
+
+        async def on_added(names):
+            added.extend(names)
+
+        async def on_removed(names):
+            pass
+
+        old = tmp_path / "old.mp4"
+        old.write_bytes(b"x")
+        os.utime(old, (time.time() - 60, time.time() - 60))
+        watcher = VideosFolderWatcher(
+            tmp_path, on_added, on_removed, poll_interval=60.0, force_polling=True, settle_seconds=0.3,
+        )
+        await watcher.start()
+        try:
+            assert added == ["old.mp4"]  # Untouched for longer than the settle interval
+
+            upload = tmp_path / "upload.mp4"
+            with open(upload, "wb") as handle:
+                for _ in range(4):
+                    handle.write(b"x" * 1024)
+                    handle.flush()
+                    await watcher.rescan()
+                    await asyncio.sleep(0.1)
+                assert added == ["old.mp4"]
+                assert watcher.stats()["pending"] == 1
+
+            await asyncio.sleep(0.6)
+            assert added == ["old.mp4", "upload.mp4"]
+            assert watcher.stats()["pending"] == 0
+        finally:
+            await watcher.stop()
+
+    asyncio.run(scenario())
+
+
+def test_notifications_only_touch_the_reported_names(tmp_path, monkeypatch):
+    from src import videos_watcher
+
+    async def scenario():
+        added, removed, statted = [], [], []
+
+        async def on_added(names):
+            added.extend(names)
+
+        async def on_removed(names):
+            removed.extend(names)
+
+        def stat_video_files(directory, names):
+            statted.extend(names)
+            return {name: (1, 0) for name in names}  # Settled long ago
+
+        def list_video_files(directory):
+            raise AssertionError("a notification batch must not list the folder")
+
+        watcher = VideosFolderWatcher(tmp_path, on_added, on_removed, settle_seconds=0.3)
+        watcher._known = {f"video{index}.mp4" for index in range(1000)}
+        monkeypatch.setattr(videos_watcher, "stat_video_files", stat_video_files)
+        monkeypatch.setattr(videos_watcher, "list_video_files", list_video_files)
+
+        await watcher._apply_changes({"new.mp4": True, "video1.mp4": False, "video2.mp4": True, "gone.mp4": False})
+
+        assert statted == ["new.mp4"]
+        assert added == ["new.mp4"] and removed == ["video1.mp4"]
+        assert len(watcher._known) == 1000 and "new.mp4" in watcher._known
+
+    asyncio.run(scenario())
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from src.webcam_ingest import WebcamIngestRegistry, WebcamStream, build_mjpeg_chunk
+
+
+class FakeRecorder:
+    def __init__(self, fail_setup):
+        self.fail_setup = fail_setup
+
+    async def setup(self):
+        if self.fail_setup:
+            raise OSError("disk full")
+
+    async def stop(self):
+        pass
+
+
+def test_failed_setup_releases_the_stream_id():
+    async def scenario():
+        failures = [True, False]
+        events = []
+        registry = WebcamIngestRegistry(
+            lambda stream_id: FakeRecorder(failures.pop(0)),
+            on_change=lambda event, stream: events.append(event),
+        )
+
+        with pytest.raises(OSError):
+            await registry.acquire("webcam-a", publisher=object())
+        assert registry.get("webcam-a") is None
+        assert events == []
+
+        stream = await registry.acquire("webcam-a", publisher=object())
+        assert stream is not None and stream.active
+        await registry.release(stream)
+
+        assert registry.get("webcam-a") is None
+        assert events == ["webcam_active", "webcam_inactive"]
+
+    asyncio.run(scenario())
+
+
+def test_waiting_viewers_share_each_pushed_frame_chunk():
+    async def scenario():
+        stream = WebcamStream("webcam-a", recorder=FakeRecorder(False))
+        stream.active = True
+        viewers = [asyncio.create_task(stream.wait_for_frame(0, timeout=1.0)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        await stream.push_frame(b"jpeg-1")
+        results = await asyncio.gather(*viewers)
+
+        assert {result[0] for result in results} == {1}
+        assert all(result[-1] is results[0][-1] for result in results)
+        assert results[0][-1] == build_mjpeg_chunk(b"jpeg-1")
+
+    asyncio.run(scenario())
+
+
+def test_lagging_viewer_skips_to_the_latest_frame():
+    async def scenario():
+        stream = WebcamStream("webcam-a", recorder=FakeRecorder(False))
+        stream.active = True
+        for frame in (b"jpeg-1", b"jpeg-2", b"jpeg-3"):
+            await stream.push_frame(frame)
+
+        result = await stream.wait_for_frame(1, timeout=1.0)
+
+        assert result[0] == 3 and result[-1] == build_mjpeg_chunk(b"jpeg-3")
+        assert await stream.wait_for_frame(3, timeout=0.01) is None
+
+    asyncio.run(scenario())
+
+
+def test_reconnecting_camera_keeps_its_recording(tmp_path):
+    from src.hls_recorder import HLSRecorder
+
+    async def scenario():
+        registry = WebcamIngestRegistry(
+            lambda stream_id: HLSRecorder("ffmpeg", tmp_path / stream_id),
+            max_prepared=1,
+        )
+        stream = await registry.acquire("webcam-a", publisher=object())
+        (tmp_path / "webcam-a" / "segment_00000.ts").write_bytes(b"ts")
+        await registry.release(stream)
+        assert registry.get("webcam-a") is None
+
+        stream = await registry.acquire("webcam-a", publisher=object())
+        assert (tmp_path / "webcam-a" / "segment_00000.ts").exists()
+        await registry.release(stream)
+
+        # Once the id falls out of the bounded set a new session starts clean
+        await registry.release(await registry.acquire("webcam-b", publisher=object()))
+        await registry.acquire("webcam-a", publisher=object())
+        assert not (tmp_path / "webcam-a" / "segment_00000.ts").exists()
+
+    asyncio.run(scenario())
+
+
+FFMPEG = shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg is not installed")
+def test_reconnecting_low_latency_camera_starts_a_fresh_part_playlist(tmp_path):
+    from src.hls_recorder import HLSRecorder
+
+    async def publish(stream, frames):
+        for _ in range(frames):
+            await stream.recorder.write(frame)
+            await asyncio.sleep(0.1)
+        await asyncio.sleep(0.5)
+        await stream.recorder.ll_playlist.refresh()
+
+    frame = cv2.imencode(".jpg", np.zeros((120, 160, 3), dtype=np.uint8))[1].tobytes()
+
+    async def scenario():
+        registry = WebcamIngestRegistry(lambda stream_id: HLSRecorder(
+            FFMPEG, tmp_path / stream_id, segment_seconds=1.0, target_fps=10, low_latency=True, part_seconds=0.2,
+        ))
+        stream = await registry.acquire("webcam-a", publisher=object())
+        await publish(stream, 40)
+        previous = stream.recorder.ll_playlist
+        assert previous.position()[0] >= 1
+        await registry.release(stream)
+
+        stream = await registry.acquire("webcam-a", publisher=object())
+        try:
+            await publish(stream, 30)
+        finally:
+            await registry.release(stream)
+        playlist = stream.recorder.ll_playlist
+
+        # Only the new session's parts, counted from its own first fragment
+        assert playlist.parts and playlist.parts[0].uri == playlist.fragment_pattern() % 0
+        assert not any(previous.instance_id in path.name for path in (tmp_path / "webcam-a").iterdir())
+
+    asyncio.run(scenario())
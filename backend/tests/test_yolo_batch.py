@@ -0,0 +1,53 @@
+import asyncio
+
+import cv2
+import numpy as np
+
+from src.yolo_batch import YoloBatchWorker
+
+
+class FakeDetector:
+    def __init__(self):
+        self.on_detect = None
+        self.states_created = 0
+
+    def new_scorer_state(self):
+        self.states_created += 1
+        return []
+
+    def detect_batch(self, frames):
+        if self.on_detect is not None:
+            self.on_detect()
+        return [[] for _ in frames]
+
+    def calculate_danger_score(self, detections, frame_shape, state):
+        state.append(frame_shape)
+        return float(len(state)), 0, []
+
+
+FRAME = cv2.imencode(".jpg", np.zeros((16, 16, 3), dtype=np.uint8))[1].tobytes()
+
+
+def test_forgotten_stream_gets_no_score_and_no_state():
+    async def scenario():
+        detector = FakeDetector()
+        worker = YoloBatchWorker(detector, max_wait_seconds=0)
+        queued = asyncio.create_task(worker.score("cam", FRAME))
+        await asyncio.sleep(0)
+        worker.forget("cam")  # Before the worker picked the frame up
+        assert await queued is None
+
+        worker.start()
+        try:
+            # Forgotten while its batch is already running in the worker thread
+            detector.on_detect = lambda: worker.forget("cam")
+            assert await asyncio.wait_for(worker.score("cam", FRAME), 1.0) is None
+            assert detector.states_created == 0 and worker.stats()["trackedStreams"] == 0
+
+            detector.on_detect = None
+            assert await asyncio.wait_for(worker.score("cam", FRAME), 1.0) == (1.0, 0, [])
+            assert worker.stats()["trackedStreams"] == 1
+        finally:
+            await worker.stop()
+
+    asyncio.run(scenario())
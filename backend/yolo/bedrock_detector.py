@@ -16,6 +16,11 @@ from PIL import Image
 import boto3
 from botocore.exceptions import ClientError
 
+try:
+    from yolo.jpeg_codec import decode_jpeg_reduced, jpeg_header
+except ImportError:  # Run as a script from this folder
+    from jpeg_codec import decode_jpeg_reduced, jpeg_header
+
 # Load environment variables from .env file
 try:
     from dotenv import load_dotenv
@@ -96,6 +101,28 @@ CRITICAL: Weapons, violence, panic"""
         
         return img_base64
 
+    def jpeg_to_base64(self, jpeg_bytes, quality=60, max_width=640):
+        """Base64 an already-encoded JPEG, only transcoding when it is too large"""
+        image_format, width, height = jpeg_header(jpeg_bytes)
+
+        if image_format == 'JPEG' and width <= max_width:
+            # Common path: send the incoming buffer as-is
+            return base64.b64encode(jpeg_bytes).decode()
+
+        frame = decode_jpeg_reduced(jpeg_bytes, width, max_width)
+        if frame is None:
+            raise ValueError('Could not decode JPEG frame')
+
+        new_width = min(width, max_width)
+        new_height = int(height * new_width / width)
+        if frame.shape[1] != new_width:
+            frame = cv2.resize(frame, (new_width, new_height))
+
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError('Could not encode JPEG frame')
+        return base64.b64encode(encoded.tobytes()).decode()
+
     def analyze_frame_background(self, frame, frame_time):
         """Analyze frame in background thread (non-blocking)"""
         try:
@@ -139,7 +166,23 @@ CRITICAL: Weapons, violence, panic"""
         """Send frame to Haiku for fast, cheap analysis"""
         try:
             img_base64 = self.frame_to_base64(frame, quality=60)
-            
+        except Exception as e:
+            print(f"Analysis error: {e}")
+            return 'NORMAL', 'API error'
+        return self.analyze_base64(img_base64)
+
+    def analyze_jpeg(self, jpeg_bytes):
+        """Analyze an already-encoded JPEG without a decode/re-encode round trip"""
+        try:
+            img_base64 = self.jpeg_to_base64(jpeg_bytes, quality=60)
+        except Exception as e:
+            print(f"Analysis error: {e}")
+            return 'NORMAL', 'API error'
+        return self.analyze_base64(img_base64)
+
+    def analyze_base64(self, img_base64):
+        """Send a base64 JPEG to Haiku and parse the verdict"""
+        try:
             # Simpler request structure for Haiku
             request_body = {
                 "anthropic_version": "bedrock-2023-05-31",
@@ -1,15 +1,47 @@
 import cv2
 import numpy as np
 from ultralytics import YOLO
-import time
-from collections import deque
+import threading
 import argparse
 
+class ScorerState:
+    """Per-stream temporal state for danger scoring, so one model can serve many streams"""
+    __slots__ = ('person_counts', 'frames_seen', 'recent_person_sum', 'older_person_sum')
+
+    def __init__(self, person_window=60):
+        # Fixed-size ring buffer of the last 60 person counts
+        self.person_counts = np.zeros(person_window, dtype=np.int32)
+        self.frames_seen = 0
+        # Running sums of the last 10 and the 10 before that person counts
+        self.recent_person_sum = 0
+        self.older_person_sum = 0
+
+    @property
+    def person_history_length(self):
+        return min(self.frames_seen, len(self.person_counts))
+
+    def _person_count_ago(self, offset):
+        """Person count recorded ``offset`` frames back (1 = latest)"""
+        return int(self.person_counts[(self.frames_seen - offset) % len(self.person_counts)])
+
+    def push_person_count(self, person_count):
+        """Append to the person count history, keeping the 10-frame window sums in step"""
+        length = self.person_history_length
+        if length >= 10:
+            leaving_recent = self._person_count_ago(10)
+            self.recent_person_sum -= leaving_recent
+            self.older_person_sum += leaving_recent
+            if length >= 20:
+                self.older_person_sum -= self._person_count_ago(20)
+        self.person_counts[self.frames_seen % len(self.person_counts)] = person_count
+        self.frames_seen += 1
+        self.recent_person_sum += person_count
+
 class IncidentDetector:
-    def __init__(self):
+    def __init__(self, model_path='yolov8n.pt'):
         # Load YOLOv8 model (will download automatically first time)
         print("Loading YOLO model...")
-        self.model = YOLO('yolov8n.pt')  # nano version for speed
+        self.model = YOLO(model_path)  # nano version for speed
         
         # Danger scoring weights for different objects
         self.danger_weights = {
@@ -26,9 +58,21 @@ class IncidentDetector:
             'truck': 15
         }
         
-        # Track detection history for temporal analysis
-        self.detection_history = deque(maxlen=30)  # Last 30 frames
-        self.person_count_history = deque(maxlen=60)  # Last 60 frames for crowd analysis
+        # Class-id indexed lookup tables so scoring needs no per-detection Python work
+        names = self.model.names
+        self.class_names = dict(names) if isinstance(names, dict) else dict(enumerate(names))
+        self.class_weight_table = np.zeros(max(self.class_names) + 1, dtype=np.float64)
+        self.class_weighted = np.zeros(max(self.class_names) + 1, dtype=bool)
+        for class_id, class_name in self.class_names.items():
+            self.class_weight_table[class_id] = self.danger_weights.get(class_name, 0)
+            self.class_weighted[class_id] = class_name in self.danger_weights
+        self.person_class_id = next(
+            (class_id for class_id, class_name in self.class_names.items() if class_name == 'person'), -1
+        )
+        
+        # The model is shared between streams; temporal history lives in ScorerState
+        self.model_lock = threading.Lock()
+        self.default_state = self.new_scorer_state()
         
         # Danger thresholds
         self.thresholds = {
@@ -44,26 +88,62 @@ class IncidentDetector:
             'NORMAL': (0, 255, 0)       # Green
         }
 
-    def calculate_danger_score(self, detections, frame_shape):
+    def _extract_detections(self, result):
+        """Convert one YOLO result into an (N, 6) array of x1, y1, x2, y2, conf, class_id"""
+        detections = []
+        if len(result.boxes) > 0:
+            boxes = result.boxes.xyxy.cpu().numpy()
+            confidences = result.boxes.conf.cpu().numpy()
+            class_ids = result.boxes.cls.cpu().numpy()
+            
+            detections = np.column_stack([boxes, confidences, class_ids])
+        
+        return detections
+
+    def detect(self, frame):
+        """Run YOLO on a single frame"""
+        with self.model_lock:
+            results = self.model(frame, verbose=False)
+        return self._extract_detections(results[0])
+
+    def detect_batch(self, frames):
+        """Run YOLO on a list of frames in one forward pass"""
+        if not frames:
+            return []
+        with self.model_lock:
+            results = self.model(list(frames), verbose=False)
+        return [self._extract_detections(result) for result in results]
+
+    def new_scorer_state(self):
+        """Create isolated temporal history for one stream"""
+        return ScorerState()
+
+    def score_frame(self, frame, state=None):
+        """Detect objects in a frame and return (score, person_count, objects)"""
+        detections = self.detect(frame)
+        return self.calculate_danger_score(detections, frame.shape, state)
+
+    def calculate_danger_score(self, detections, frame_shape, state=None):
         """Calculate danger score based on current detections"""
-        score = 0
-        person_count = 0
-        detected_objects = []
+        if state is None:
+            state = self.default_state
         
-        for detection in detections:
-            class_name = self.model.names[int(detection[5])]
-            confidence = detection[4]
-            
-            # Only consider high-confidence detections
-            if confidence > 0.5:
-                detected_objects.append(class_name)
-                
-                if class_name == 'person':
-                    person_count += 1
-                
-                # Add base score for detected objects
-                if class_name in self.danger_weights:
-                    score += self.danger_weights[class_name] * confidence
+        # Keep the caller's dtype (float32 from YOLO) so scores match the per-detection loop exactly
+        detections = np.asarray(detections).reshape(-1, 6)
+        
+        # Only consider high-confidence detections
+        confident = detections[:, 4] > 0.5
+        confidences = detections[confident, 4]
+        class_ids = detections[confident, 5].astype(np.intp)
+        
+        # Add base score for detected objects, summed left to right in the detections' dtype
+        weighted = self.class_weighted[class_ids]
+        score = 0
+        if weighted.any():
+            weights = self.class_weight_table[class_ids[weighted]].astype(confidences.dtype)
+            score = np.add.accumulate(weights * confidences[weighted])[-1]
+        person_count = int(np.count_nonzero(class_ids == self.person_class_id))
+        detected_objects = [self.class_names[class_id] for class_id in class_ids.tolist()]
         
         # Crowd density analysis
         frame_area = frame_shape[0] * frame_shape[1]
@@ -75,10 +155,10 @@ class IncidentDetector:
                 score += 10
         
         # Temporal analysis - sudden changes in person count
-        self.person_count_history.append(person_count)
-        if len(self.person_count_history) > 10:
-            recent_avg = np.mean(list(self.person_count_history)[-10:])
-            older_avg = np.mean(list(self.person_count_history)[-20:-10]) if len(self.person_count_history) > 20 else recent_avg
+        state.push_person_count(person_count)
+        if state.person_history_length > 10:
+            recent_avg = state.recent_person_sum / 10
+            older_avg = state.older_person_sum / 10 if state.person_history_length > 20 else recent_avg
             
             # Sudden increase in people (possible emergency gathering)
             if recent_avg > older_avg * 1.5:
@@ -88,14 +168,6 @@ class IncidentDetector:
             elif recent_avg < older_avg * 0.5 and older_avg > 3:
                 score += 25
         
-        # Store current detection for history
-        self.detection_history.append({
-            'score': score,
-            'person_count': person_count,
-            'objects': detected_objects,
-            'timestamp': time.time()
-        })
-        
         return score, person_count, detected_objects
 
     def classify_danger_level(self, score):
@@ -183,16 +255,7 @@ class IncidentDetector:
                 # Process every 3rd frame for speed (adjust as needed)
                 if frame_count % 3 == 0:
                     # Run YOLO detection
-                    results = self.model(frame, verbose=False)
-                    
-                    # Extract detections
-                    detections = []
-                    if len(results[0].boxes) > 0:
-                        boxes = results[0].boxes.xyxy.cpu().numpy()
-                        confidences = results[0].boxes.conf.cpu().numpy()
-                        class_ids = results[0].boxes.cls.cpu().numpy()
-                        
-                        detections = np.column_stack([boxes, confidences, class_ids])
+                    detections = self.detect(frame)
                     
                     # Calculate danger score
                     score, person_count, objects = self.calculate_danger_score(detections, frame.shape)
@@ -0,0 +1,34 @@
+"""
+JPEG helpers shared by the Bedrock detector and the MJPEG renditions
+"""
+
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+_REDUCED_READS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def jpeg_header(jpeg_bytes):
+    """(format, width, height) of an encoded image; reads the header only"""
+    image = Image.open(BytesIO(jpeg_bytes))
+    width, height = image.size
+    return image.format, width, height
+
+
+def decode_jpeg_reduced(jpeg_bytes, size, min_size):
+    """Decode a JPEG at the smallest 1/2, 1/4 or 1/8 scale that keeps ``size`` (its width
+    or height) at least ``min_size``; libjpeg scales straight from the DCT, which is far
+    cheaper than a full decode and resize. Returns None if the data does not decode."""
+    read_flag = cv2.IMREAD_COLOR
+    for scale, flag in _REDUCED_READS:
+        if size // scale >= min_size:
+            read_flag = flag
+            break
+    return cv2.imdecode(np.frombuffer(jpeg_bytes, dtype=np.uint8), read_flag)